@@ -3,16 +3,4 @@
 VERSION = (1, 2, 1)
 __version__ = '.'.join(map(str, VERSION))
 
-
-try:
-    from geokey.extensions.base import register
-
-    register(
-        'geokey_airquality',
-        'Air Quality',
-        display_admin=True,
-        superuser=True,
-        version=__version__
-    )
-except BaseException:
-    print 'Please install GeoKey first'
+default_app_config = 'geokey_airquality.apps.AirQualityConfig'
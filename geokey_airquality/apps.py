@@ -0,0 +1,37 @@
+"""Configuration of the extension."""
+
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class AirQualityConfig(AppConfig):
+    """
+    Configuration of the extension. When the app is ready, the extension is
+    registered with GeoKey and signal receivers are connected. Caches are
+    warmed up in the background, when `AIRQUALITY_WARM_CACHES` is set.
+    """
+
+    name = 'geokey_airquality'
+    verbose_name = 'Air Quality'
+
+    def ready(self):
+        """Register the extension and connect signal receivers."""
+        from geokey.extensions.base import extensions, register
+
+        from geokey_airquality import __version__
+        from geokey_airquality.signals import connect_signals
+        from geokey_airquality.warmup import start_warm_up
+
+        if self.name not in extensions:
+            register(
+                self.name,
+                self.verbose_name,
+                display_admin=True,
+                superuser=True,
+                version=__version__
+            )
+
+        connect_signals()
+
+        if getattr(settings, 'AIRQUALITY_WARM_CACHES', False):
+            start_warm_up()
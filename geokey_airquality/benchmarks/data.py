@@ -0,0 +1,241 @@
+"""Synthetic data for benchmarks."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import random
+import uuid
+
+from datetime import timedelta
+
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from geokey.users.models import User
+
+from geokey_airquality.models import (
+    AirQualityProject,
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement
+)
+
+
+CHARACTERISTICS = [
+    'Busy road',
+    'Quiet residential street',
+    'School entrance',
+    'Bus stop',
+    'Park',
+    None
+]
+
+
+def bulk_create(model, objects, batch_size):
+    """
+    Inserts objects in batches and returns them with primary keys set.
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Model of the objects.
+    objects : list
+        Objects to be inserted.
+    batch_size : int
+        Number of objects inserted at once.
+
+    Returns
+    -------
+    list
+        Inserted objects.
+    """
+    created = []
+
+    for index in range(0, len(objects), batch_size):
+        created.extend(
+            model.objects.bulk_create(objects[index:index + batch_size])
+        )
+
+    return created
+
+
+def seed(users=100, locations=10, measurements=5, batch_size=1000,
+         random_seed=0):
+    """
+    Seeds synthetic users, locations and measurements using bulk inserts.
+
+    Locations are scattered around London. Measurements start within the
+    last two years, most of them are finished after about four weeks of
+    exposure, the rest are left open. Results follow a skewed distribution
+    around the 40 ug/m3 limit, and a few barcodes are reused.
+
+    Parameters
+    ----------
+    users : int
+        Number of users.
+    locations : int
+        Number of locations per user.
+    measurements : int
+        Number of measurements per location.
+    batch_size : int
+        Number of rows inserted at once.
+    random_seed : int
+        Seed making the data reproducible.
+
+    Returns
+    -------
+    dict
+        Created users, locations and measurements.
+    """
+    generator = random.Random(random_seed)
+    prefix = uuid.uuid4().hex[:8]
+    now = timezone.now()
+
+    created_users = bulk_create(User, [
+        User(
+            email='benchmark-%s-%s@example.com' % (prefix, index),
+            display_name='benchmark-%s-%s' % (prefix, index),
+            password='!'
+        )
+        for index in range(users)
+    ], batch_size)
+
+    created_locations = []
+
+    for user in created_users:
+        for index in range(locations):
+            properties = {
+                'height': round(generator.uniform(1, 4), 1),
+                'distance': round(generator.expovariate(0.2), 1),
+                'characteristics': generator.choice(CHARACTERISTICS)
+            }
+
+            # Bulk inserts skip saving, so properties are copied here
+            created_locations.append(AirQualityLocation(
+                name='Location %s' % index,
+                geometry=Point(
+                    generator.gauss(-0.1276, 0.1),
+                    generator.gauss(51.5072, 0.05)
+                ),
+                creator=user,
+                created=now - timedelta(days=generator.randint(0, 730)),
+                properties=properties,
+                height=properties['height'],
+                distance=properties['distance'],
+                characteristics=properties['characteristics']
+            ))
+
+    created_locations = bulk_create(
+        AirQualityLocation,
+        created_locations,
+        batch_size
+    )
+
+    created_measurements = []
+
+    for location in created_locations:
+        for index in range(measurements):
+            started = now - timedelta(minutes=generator.randint(0, 1051200))
+            finished = None
+            properties = {
+                'additional_details': None,
+                'made_by_students': generator.random() < 0.2
+            }
+
+            # Recent tubes are still out, older ones are mostly collected
+            if started < now - timedelta(days=35) or generator.random() < 0.3:
+                if generator.random() < 0.9:
+                    finished = started + timedelta(
+                        minutes=int(generator.gauss(40320, 2880))
+                    )
+                    properties['results'] = round(
+                        generator.lognormvariate(3.6, 0.4),
+                        2
+                    )
+
+            created_measurements.append(AirQualityMeasurement(
+                location=location,
+                barcode='%06d' % generator.randint(0, 999999),
+                creator_id=location.creator_id,
+                started=started,
+                finished=finished,
+                properties=properties,
+                results=properties.get('results'),
+                made_by_students=properties['made_by_students']
+            ))
+
+    created_measurements = bulk_create(
+        AirQualityMeasurement,
+        created_measurements,
+        batch_size
+    )
+
+    return {
+        'users': created_users,
+        'locations': created_locations,
+        'measurements': created_measurements
+    }
+
+
+def seed_project(creator, contributors):
+    """
+    Seeds a GeoKey project mapped to Air Quality, with a category for each
+    category type and a field for each field type.
+
+    The project structure is small, so it is created with the GeoKey model
+    factories (requires factory-boy).
+
+    Parameters
+    ----------
+    creator : geokey.users.models.User
+        Creator of the project.
+    contributors : list
+        Users allowed to contribute to the project.
+
+    Returns
+    -------
+    geokey_airquality.models.AirQualityProject
+        Created Air Quality project.
+    """
+    from geokey.projects.tests.model_factories import ProjectFactory
+    from geokey.categories.tests.model_factories import (
+        CategoryFactory,
+        TextFieldFactory,
+        LookupFieldFactory,
+        LookupValueFactory
+    )
+
+    project = ProjectFactory.create(
+        creator=creator,
+        add_contributors=contributors
+    )
+    aq_project = AirQualityProject.objects.create(
+        status='active',
+        creator=creator,
+        project=project
+    )
+
+    for category_type, category_label in AirQualityCategory.TYPES:
+        category = CategoryFactory.create(project=project, creator=creator)
+        aq_category = AirQualityCategory.objects.create(
+            type=category_label,
+            category=category,
+            project=aq_project
+        )
+
+        for field_type, field_label in AirQualityField.TYPES:
+            if field_type == 'made_by_students':
+                field = LookupFieldFactory.create(category=category)
+                LookupValueFactory.create(field=field, name='Yes')
+                LookupValueFactory.create(field=field, name='No')
+            else:
+                field = TextFieldFactory.create(category=category)
+
+            AirQualityField.objects.create(
+                type=field_label,
+                field=field,
+                category=aq_category
+            )
+
+    return aq_project
@@ -0,0 +1,114 @@
+"""Timings of exporting measurements."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import csv
+import tempfile
+import time
+
+from geokey_airquality.exports import (
+    copy_measurements,
+    stream_measurements,
+    write_measurements
+)
+
+
+def write_streamed(out):
+    """Write lines of CSV streamed from a server-side cursor."""
+    out.writelines(stream_measurements())
+
+
+EXPORTS = collections.OrderedDict([
+    ('orm', write_measurements),
+    ('copy', copy_measurements),
+    ('stream', write_streamed),
+])
+
+
+def get_rows(csv_file):
+    """
+    Reads rows of the exported CSV file, ignoring their order.
+
+    Parameters
+    ----------
+    csv_file : file
+        Exported CSV file.
+
+    Returns
+    -------
+    list
+        Sorted hashes of rows, the header first.
+    """
+    csv_file.seek(0)
+    reader = csv.reader(csv_file)
+    header = next(reader)
+
+    return [hash(tuple(header))] + sorted(hash(tuple(row)) for row in reader)
+
+
+def measure(export, repeat=3):
+    """
+    Measures the time of exporting all measurements to a temporary file.
+
+    Parameters
+    ----------
+    export : callable
+        Function writing the CSV to a file.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    tuple
+        Median time in milliseconds, size of the output in bytes and hashes
+        of the exported rows.
+    """
+    timings = []
+
+    for run in range(repeat):
+        with tempfile.TemporaryFile() as csv_file:
+            start = time.time()
+            export(csv_file)
+            timings.append((time.time() - start) * 1000)
+
+            output_size = csv_file.tell()
+
+            if run == 0:
+                rows = get_rows(csv_file)
+
+    return sorted(timings)[len(timings) // 2], output_size, rows
+
+
+def run(repeat=3):
+    """
+    Compares exporting measurements through the ORM with PostgreSQL COPY
+    and with lines of CSV streamed from a server-side cursor.
+
+    Parameters
+    ----------
+    repeat : int
+        Number of runs of each export.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Median time in milliseconds and output size stored by the export,
+        number of rows and whether all exports contain the same rows.
+    """
+    results = collections.OrderedDict()
+    exported = []
+
+    for name, export in EXPORTS.items():
+        median, output_size, rows = measure(export, repeat)
+        exported.append(rows)
+        results[name] = collections.OrderedDict([
+            ('median_ms', round(median, 3)),
+            ('bytes', output_size),
+        ])
+
+    results['rows'] = len(exported[0]) - 1
+    results['identical'] = all(rows == exported[0] for rows in exported)
+
+    return results
@@ -0,0 +1,240 @@
+"""
+Import time of the extension, as paid by every worker when it starts. Run
+as a module, it imports the extension in a fresh process and prints timings
+of imported modules as JSON.
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+from timeit import default_timer
+
+# Django is not imported here, so that importing it is timed as well
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+
+PACKAGE = 'geokey_airquality'
+
+# Modules imported by a worker serving the extension
+ENTRY_POINTS = ['geokey_airquality.urls']
+
+
+class ImportTimer(object):
+    """
+    Times imports, the same way as `python -X importtime` does in Python 3.7
+    and later. Cumulative time of a module includes modules imported by it,
+    its own time does not.
+    """
+
+    def __init__(self):
+        """Initiates a new timer."""
+        self.timings = []
+        self.nested = []
+        self.original_import = builtins.__import__
+        self.original_import_module = importlib.import_module
+
+    def install(self):
+        """Start timing imports."""
+        builtins.__import__ = self.timed(self.original_import, self.resolve)
+        importlib.import_module = self.timed(
+            self.original_import_module,
+            lambda name, package=None: (name, None)
+        )
+
+    def uninstall(self):
+        """Stop timing imports."""
+        builtins.__import__ = self.original_import
+        importlib.import_module = self.original_import_module
+
+    @staticmethod
+    def resolve(name, globals=None, locals=None, fromlist=(), level=0):
+        """Get the full name of the imported module and its importer."""
+        importer = (globals or {}).get('__name__')
+
+        if level > 0 and importer:
+            package = globals.get('__package__') or importer
+            base = package.rsplit('.', level - 1)[0]
+            name = '%s.%s' % (base, name) if name else base
+        elif name not in sys.modules and importer and '.' in importer:
+            # Implicit relative import (Python 2)
+            relative = '%s.%s' % (importer.rpartition('.')[0], name)
+
+            if sys.modules.get(relative) is not None:
+                name = relative
+
+        return name, importer
+
+    def timed(self, function, resolve):
+        """Wrap the import function, recording modules it loads."""
+        def wrapper(*args, **kwargs):
+            loaded = len(sys.modules)
+            self.nested.append(0.0)
+            start = default_timer()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = default_timer() - start
+                nested = self.nested.pop()
+
+                if self.nested:
+                    self.nested[-1] += elapsed
+
+                if len(sys.modules) > loaded:
+                    name, importer = resolve(*args, **kwargs)
+                    self.timings.append({
+                        'module': name,
+                        'importer': importer,
+                        'cumulative_ms': elapsed * 1000,
+                        'self_ms': (elapsed - nested) * 1000,
+                    })
+
+        return wrapper
+
+
+def is_own(module):
+    """
+    Checks if the module is part of the extension.
+
+    Parameters
+    ----------
+    module : str
+        Full name of the module, can be None.
+
+    Returns
+    -------
+    bool
+        True when the module is part of the extension.
+    """
+    return module == PACKAGE or (module or '').startswith(PACKAGE + '.')
+
+
+def get_costs(timings):
+    """
+    Gets costs of modules imported by the extension: the own time of its
+    modules and the cumulative time of other modules imported by them first.
+
+    Parameters
+    ----------
+    timings : list
+        Timings recorded by `ImportTimer`.
+
+    Returns
+    -------
+    list
+        Costs of modules in milliseconds, the largest first.
+    """
+    costs = collections.defaultdict(float)
+
+    for timing in timings:
+        if is_own(timing['module']):
+            costs[timing['module']] += timing['self_ms']
+        elif is_own(timing['importer']):
+            costs[timing['module']] += timing['cumulative_ms']
+
+    return [
+        {'module': module, 'ms': ms}
+        for module, ms in sorted(costs.items(), key=lambda item: -item[1])
+    ]
+
+
+def measure():
+    """
+    Times setting up Django (which imports models and the configuration of
+    the extension) and importing entry points of the extension. Must be run
+    in a fresh process, before anything is imported.
+
+    Returns
+    -------
+    dict
+        Time of the whole startup and costs of modules in milliseconds.
+    """
+    timer = ImportTimer()
+    timer.install()
+    start = default_timer()
+
+    try:
+        import django
+        django.setup()
+
+        for module in ENTRY_POINTS:
+            importlib.import_module(module)
+    finally:
+        timer.uninstall()
+
+    return {
+        'startup_ms': (default_timer() - start) * 1000,
+        'modules': get_costs(timer.timings),
+    }
+
+
+def run(repeat=3, limit=20):
+    """
+    Measures import time of the extension in fresh processes, using the
+    same settings and path as the current process.
+
+    Parameters
+    ----------
+    repeat : int
+        Number of processes.
+    limit : int
+        Number of the most costly modules reported.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Median time of the whole startup and of the extension (its modules
+        and modules imported by them) in milliseconds, with median costs of
+        the most costly modules.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    runs = []
+
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-m', __name__],
+            env=env
+        )
+        runs.append(json.loads(output.decode('utf-8')))
+
+    def median(values):
+        values = sorted(values)
+        return round(values[len(values) // 2], 3)
+
+    modules = collections.defaultdict(list)
+
+    for result in runs:
+        for cost in result['modules']:
+            modules[cost['module']].append(cost['ms'])
+
+    costs = [
+        collections.OrderedDict([
+            ('module', module),
+            ('ms', median(values + [0.0] * (repeat - len(values)))),
+        ])
+        for module, values in modules.items()
+    ]
+    costs.sort(key=lambda cost: -cost['ms'])
+
+    return collections.OrderedDict([
+        ('startup_ms', median([result['startup_ms'] for result in runs])),
+        ('extension_ms', median([
+            sum(cost['ms'] for cost in result['modules'])
+            for result in runs
+        ])),
+        ('modules', costs[:limit]),
+    ])
+
+
+if __name__ == '__main__':
+    sys.stdout.write(json.dumps(measure()))
@@ -0,0 +1,229 @@
+"""Query plans and timings of the hot query paths."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import time
+
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from geokey_airquality.models import (
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityMeasurement
+)
+
+
+# Indexes added on top of the default foreign key indexes
+INDEXES = [
+    'aq_category_project_type_idx',
+    'aq_field_category_type_idx',
+    'aq_measurement_open_idx',
+    'aq_measurement_finished_idx'
+]
+
+
+def get_hot_paths(user, location, barcode):
+    """
+    Gets all querysets used on the hot paths of the extension.
+
+    Parameters
+    ----------
+    user : geokey.users.models.User
+        User whose measurements are queried.
+    location : geokey_airquality.models.AirQualityLocation
+        Location whose measurements are queried.
+    barcode : str
+        Barcode that is looked up.
+
+    Returns
+    -------
+    list
+        Tuples of name and queryset.
+    """
+    some_time_ago = timezone.now() - timedelta(27)
+
+    hot_paths = [
+        ('check_measurements', AirQualityMeasurement.objects.filter(
+            started__lt=some_time_ago,
+            started__gte=some_time_ago - timedelta(4),
+            finished__isnull=True
+        )),
+        ('sheet', AirQualityMeasurement.objects.filter(
+            creator=user
+        ).exclude(finished=None)),
+        ('location_measurements', AirQualityMeasurement.objects.filter(
+            location=location
+        )),
+        ('barcode', AirQualityMeasurement.objects.filter(barcode=barcode)),
+        ('results_band', AirQualityMeasurement.objects.in_band('2')),
+    ]
+
+    aq_category = AirQualityCategory.objects.first()
+
+    if aq_category is not None:
+        hot_paths.extend([
+            ('submit_category', AirQualityCategory.objects.filter(
+                type=aq_category.type,
+                project_id=aq_category.project_id
+            )),
+            ('submit_field', AirQualityField.objects.filter(
+                type=AirQualityField.TYPES[0][1],
+                category=aq_category
+            )),
+        ])
+
+    return hot_paths
+
+
+def get_extra_indexes():
+    """
+    Gets names of all indexes that are not created for foreign keys.
+
+    Returns
+    -------
+    list
+        Names of the indexes present in the database.
+    """
+    names = []
+
+    with connection.cursor() as cursor:
+        for model in [AirQualityCategory, AirQualityField]:
+            constraints = connection.introspection.get_constraints(
+                cursor,
+                model._meta.db_table
+            )
+            names.extend(name for name in constraints if name in INDEXES)
+
+        constraints = connection.introspection.get_constraints(
+            cursor,
+            AirQualityMeasurement._meta.db_table
+        )
+
+        for name, constraint in constraints.items():
+            if name in INDEXES or (
+                constraint['index'] and constraint['columns'] == ['barcode']
+            ):
+                names.append(name)
+
+    return names
+
+
+def drop_indexes(names):
+    """
+    Drops the indexes. Should be run inside a transaction that is rolled
+    back afterwards.
+
+    Parameters
+    ----------
+    names : list
+        Names of the indexes.
+    """
+    with connection.cursor() as cursor:
+        for name in names:
+            cursor.execute(
+                'DROP INDEX %s' % connection.ops.quote_name(name)
+            )
+
+
+def analyze():
+    """Updates planner statistics of all Air Quality tables."""
+    with connection.cursor() as cursor:
+        for model in [
+            AirQualityCategory,
+            AirQualityField,
+            AirQualityMeasurement
+        ]:
+            cursor.execute(
+                'ANALYZE %s' % connection.ops.quote_name(model._meta.db_table)
+            )
+
+
+def explain(queryset):
+    """
+    Gets the query plan of the queryset, executing the query.
+
+    Parameters
+    ----------
+    queryset : django.db.models.query.QuerySet
+        Queryset to be explained.
+
+    Returns
+    -------
+    str
+        Query plan.
+    """
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def measure(queryset, repeat=5):
+    """
+    Measures the time of evaluating the queryset.
+
+    Parameters
+    ----------
+    queryset : django.db.models.query.QuerySet
+        Queryset to be measured.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    float
+        Median time in milliseconds.
+    """
+    timings = []
+
+    for run in range(repeat):
+        start = time.time()
+        list(queryset.all())
+        timings.append((time.time() - start) * 1000)
+
+    return sorted(timings)[len(timings) // 2]
+
+
+def warm_up(hot_paths):
+    """
+    Evaluates all hot paths once, discarding the results, so that plans and
+    timings are not affected by which pass is run first.
+
+    Parameters
+    ----------
+    hot_paths : list
+        Tuples of name and queryset.
+    """
+    for name, queryset in hot_paths:
+        list(queryset.all())
+
+
+def run(hot_paths, repeat=5):
+    """
+    Gets query plans and timings of all hot paths, after a warm-up run.
+
+    Parameters
+    ----------
+    hot_paths : list
+        Tuples of name and queryset.
+    repeat : int
+        Number of runs of each query.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Plan and median time in milliseconds stored by the name.
+    """
+    analyze()
+    warm_up(hot_paths)
+
+    return collections.OrderedDict(
+        (name, {'plan': explain(queryset), 'time': measure(queryset, repeat)})
+        for name, queryset in hot_paths
+    )
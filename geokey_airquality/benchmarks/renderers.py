@@ -0,0 +1,154 @@
+"""Timings of rendering and parsing JSON of the public API."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import decimal
+import io
+import random
+import time
+
+from django.utils import timezone
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from geokey_airquality.parsers import FastJSONParser
+from geokey_airquality.renderers import JSON_LIBRARY, FastJSONRenderer
+
+
+def get_locations(size, measurements=5, random_seed=0):
+    """
+    Builds native representations of locations with their measurements, the
+    same shape as sent by the locations API. Datetimes and decimals are left
+    for the renderer to encode.
+
+    Parameters
+    ----------
+    size : int
+        Number of locations.
+    measurements : int
+        Number of measurements of each location.
+    random_seed : int
+        Seed making the data reproducible.
+
+    Returns
+    -------
+    list
+        Representations of locations.
+    """
+    generator = random.Random(random_seed)
+    now = timezone.now()
+    locations = []
+
+    for index in range(size):
+        locations.append({
+            'type': 'Feature',
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [
+                    round(generator.gauss(-0.1276, 0.1), 6),
+                    round(generator.gauss(51.5072, 0.05), 6)
+                ]
+            },
+            'id': index + 1,
+            'name': 'Location %s' % index,
+            'created': now,
+            'properties': {
+                'height': decimal.Decimal('2.5'),
+                'distance': generator.randint(0, 100),
+                'characteristics': 'Caf\xe9 on a busy road'
+            },
+            'measurements': [
+                {
+                    'id': index * measurements + number + 1,
+                    'barcode': '%06d' % (index * measurements + number),
+                    'started': now,
+                    'finished': None,
+                    'called': None,
+                    'properties': {
+                        'results': round(generator.uniform(10, 120), 2),
+                        'additional_details': None,
+                        'made_by_students': generator.random() < 0.5
+                    }
+                }
+                for number in range(measurements)
+            ]
+        })
+
+    return locations
+
+
+def measure(function, repeat=5):
+    """
+    Measures the time of calling the function.
+
+    Parameters
+    ----------
+    function : callable
+        Function to be called.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    tuple
+        Median time in milliseconds and the result of the last call.
+    """
+    timings = []
+
+    for run in range(repeat):
+        start = time.time()
+        result = function()
+        timings.append((time.time() - start) * 1000)
+
+    return sorted(timings)[len(timings) // 2], result
+
+
+def run(size=10000, measurements=5, repeat=5):
+    """
+    Compares rendering and parsing locations with the default JSON renderer
+    and parser, and with the fast ones.
+
+    Parameters
+    ----------
+    size : int
+        Number of locations.
+    measurements : int
+        Number of measurements of each location.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Median times in milliseconds and output size stored by the variant,
+        the fast JSON library used and whether outputs of both variants are
+        identical.
+    """
+    locations = get_locations(size, measurements)
+    results = collections.OrderedDict([('library', JSON_LIBRARY)])
+    outputs = []
+
+    for name, renderer, parser in [
+            ('default', JSONRenderer(), JSONParser()),
+            ('fast', FastJSONRenderer(), FastJSONParser())]:
+        render_median, content = measure(
+            lambda: renderer.render(locations),
+            repeat
+        )
+        parse_median, parsed = measure(
+            lambda: parser.parse(io.BytesIO(content)),
+            repeat
+        )
+        outputs.append((content, parsed))
+        results[name] = collections.OrderedDict([
+            ('render_ms', round(render_median, 3)),
+            ('parse_ms', round(parse_median, 3)),
+            ('bytes', len(content)),
+        ])
+
+    results['identical'] = all(output == outputs[0] for output in outputs)
+
+    return results
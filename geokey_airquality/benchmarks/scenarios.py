@@ -0,0 +1,214 @@
+"""Timed scenarios of the main Air Quality workloads."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import json
+import time
+
+from datetime import timedelta
+
+from django.core import mail
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey_airquality import views
+from geokey_airquality.models import (
+    AirQualityLocation,
+    AirQualityMeasurement
+)
+from geokey_airquality.management.commands.check_measurements import Command
+
+
+def get_scenarios(superuser, user, aq_project):
+    """
+    Gets all scenarios, each of them a callable running the workload once.
+
+    Parameters
+    ----------
+    superuser : geokey.users.models.User
+        User exporting all measurements.
+    user : geokey.users.models.User
+        User with seeded locations and measurements.
+    aq_project : geokey_airquality.models.AirQualityProject
+        Project the measurements are submitted to.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Callables stored by the name of the scenario.
+    """
+    factory = APIRequestFactory()
+    location = AirQualityLocation.objects.filter(creator=user).first()
+    measurement = AirQualityMeasurement.objects.create(
+        location=location,
+        barcode='benchmark',
+        creator=user,
+        started=timezone.now() - timedelta(days=28),
+        properties={}
+    )
+
+    def export():
+        request = factory.get('/admin/airquality/export/measurements.csv')
+        request.user = superuser
+        response = views.AQExportView.as_view()(request, file='measurements')
+        return b''.join(response.streaming_content)
+
+    def sheet():
+        request = factory.get('/api/airquality/sheet/')
+        force_authenticate(request, user=user)
+        return views.AQSheetAPIView.as_view()(request).render().content
+
+    def locations():
+        request = factory.get('/api/airquality/locations/')
+        force_authenticate(request, user=user)
+        return views.AQLocationsAPIView.as_view()(request).render().content
+
+    def submit():
+        request = factory.patch(
+            '/api/airquality/locations/%s/measurements/%s/' % (
+                location.id,
+                measurement.id
+            ),
+            json.dumps({
+                'finished': timezone.now().isoformat(),
+                'project': aq_project.project.id,
+                'properties': {'results': 45.15}
+            }),
+            content_type='application/json'
+        )
+        force_authenticate(request, user=user)
+        return views.AQMeasurementsSingleAPIView.as_view()(
+            request,
+            location_id=location.id,
+            measurement_id=measurement.id
+        ).render().content
+
+    def check_measurements():
+        Command().check_measurements()
+
+    def signals():
+        category = aq_project.categories.select_related('category').first()
+        category.category.status = 'inactive'
+        category.category.save()
+
+    return collections.OrderedDict([
+        ('export', export),
+        ('sheet', sheet),
+        ('locations', locations),
+        ('submit', submit),
+        ('check_measurements', check_measurements),
+        ('signals', signals),
+    ])
+
+
+def measure(scenario, repeat=5):
+    """
+    Measures the scenario. Each run is rolled back, so that all of them
+    start from the same data.
+
+    Parameters
+    ----------
+    scenario : callable
+        Scenario to be measured.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Timings in milliseconds and number of SQL queries of a single run.
+    """
+    timings = []
+    queries = None
+
+    for run in range(repeat):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as context:
+                start = time.time()
+                scenario()
+                timings.append((time.time() - start) * 1000)
+
+            if queries is None:
+                queries = len(context.captured_queries)
+
+            transaction.set_rollback(True)
+
+        mail.outbox = []
+
+    timings.sort()
+
+    return collections.OrderedDict([
+        ('runs', repeat),
+        ('median_ms', round(timings[len(timings) // 2], 3)),
+        ('mean_ms', round(sum(timings) / len(timings), 3)),
+        ('min_ms', round(timings[0], 3)),
+        ('max_ms', round(timings[-1], 3)),
+        ('queries', queries),
+    ])
+
+
+def run(scenarios, repeat=5, names=None):
+    """
+    Measures all scenarios, or only the named ones.
+
+    Parameters
+    ----------
+    scenarios : collections.OrderedDict
+        Callables stored by the name of the scenario.
+    repeat : int
+        Number of runs of each scenario.
+    names : list
+        Names of scenarios to be measured, all when not set.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Results stored by the name of the scenario.
+    """
+    return collections.OrderedDict(
+        (name, measure(scenario, repeat))
+        for name, scenario in scenarios.items()
+        if not names or name in names
+    )
+
+
+def compare(results, baseline):
+    """
+    Compares median timings and query counts with the baseline.
+
+    Parameters
+    ----------
+    results : dict
+        Results of the current run.
+    baseline : dict
+        Results of a previous run.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Relative change of the median time and change of the number of
+        queries stored by the name of the scenario.
+    """
+    changes = collections.OrderedDict()
+
+    for name, current in results.items():
+        previous = baseline.get(name)
+
+        if previous is None:
+            continue
+
+        changes[name] = collections.OrderedDict([
+            ('median_change', round(
+                (current['median_ms'] - previous['median_ms']) /
+                previous['median_ms'],
+                3
+            ) if previous['median_ms'] else None),
+            ('queries_change', current['queries'] - previous['queries']),
+        ])
+
+    return changes
@@ -0,0 +1,137 @@
+"""Timings of serializing locations."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import json
+import random
+import time
+
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from geokey_airquality.models import AirQualityLocation, AirQualityMeasurement
+from geokey_airquality.serializers import LocationSerializer
+
+
+class GeoJSONLocationSerializer(LocationSerializer):
+    """Serializer encoding all geometries through GEOS GeoJSON output."""
+
+    def get_geometry(self, geometry):
+        """Returns the GeoJSON geometry parsed from the GEOS output."""
+        return json.loads(geometry.geojson)
+
+
+def get_locations(size, random_seed=0):
+    """
+    Builds unsaved locations with no measurements, so that serializing them
+    does not query the database.
+
+    Parameters
+    ----------
+    size : int
+        Number of locations.
+    random_seed : int
+        Seed making the data reproducible.
+
+    Returns
+    -------
+    list
+        Locations.
+    """
+    generator = random.Random(random_seed)
+    now = timezone.now()
+    locations = []
+
+    for index in range(size):
+        location = AirQualityLocation(
+            id=index + 1,
+            name='Location %s' % index,
+            geometry=Point(
+                generator.gauss(-0.1276, 0.1),
+                generator.gauss(51.5072, 0.05)
+            ),
+            created=now,
+            properties={'height': 2, 'distance': 10}
+        )
+        location._prefetched_objects_cache = {
+            'measurements': AirQualityMeasurement.objects.none()
+        }
+        locations.append(location)
+
+    return locations
+
+
+def measure(serializer_class, locations, repeat=5, precision=None):
+    """
+    Measures the time of serializing the locations.
+
+    Parameters
+    ----------
+    serializer_class : type
+        Serializer of locations.
+    locations : list
+        Locations to be serialized.
+    repeat : int
+        Number of runs.
+    precision : int
+        Number of decimal places of coordinates.
+
+    Returns
+    -------
+    tuple
+        Median time in milliseconds and size of the JSON output in bytes.
+    """
+    timings = []
+
+    for run in range(repeat):
+        start = time.time()
+        data = serializer_class(
+            locations,
+            many=True,
+            context={'precision': precision}
+        ).data
+        timings.append((time.time() - start) * 1000)
+
+    return sorted(timings)[len(timings) // 2], len(json.dumps(data))
+
+
+def run(size=10000, repeat=5, precision=6):
+    """
+    Compares serializing locations through GEOS GeoJSON output with building
+    point geometries from their coordinates.
+
+    Parameters
+    ----------
+    size : int
+        Number of locations.
+    repeat : int
+        Number of runs.
+    precision : int
+        Number of decimal places of coordinates in the last variant.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Median time in milliseconds and output size stored by the variant.
+    """
+    locations = get_locations(size)
+    results = collections.OrderedDict()
+
+    for name, serializer_class, variant_precision in [
+            ('geojson', GeoJSONLocationSerializer, None),
+            ('coordinates', LocationSerializer, None),
+            ('coordinates_precision', LocationSerializer, precision)]:
+        median, output_size = measure(
+            serializer_class,
+            locations,
+            repeat,
+            variant_precision
+        )
+        results[name] = collections.OrderedDict([
+            ('median_ms', round(median, 3)),
+            ('bytes', output_size),
+        ])
+
+    return results
@@ -0,0 +1,263 @@
+"""Cache backends for the extension."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import threading
+import time
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.six.moves import cPickle as pickle
+
+
+# Shared by all threads, the same way as the local-memory backend does
+_entries = {}
+_sizes = {}
+_locks = {}
+
+
+class LRUMemoryCache(BaseCache):
+    """
+    A local-memory cache bounded by the size of stored values in bytes. When
+    full, the least recently used entries are evicted first. Each process has
+    its own cache.
+
+    Set `MAX_BYTES` in `OPTIONS` to change the bound (64 MB by default):
+
+        CACHES['airquality'] = {
+            'BACKEND': 'geokey_airquality.cache.LRUMemoryCache',
+            'LOCATION': 'airquality',
+            'OPTIONS': {'MAX_BYTES': 64 * 1024 * 1024}
+        }
+    """
+
+    def __init__(self, name, params):
+        super(LRUMemoryCache, self).__init__(params)
+
+        options = params.get('OPTIONS', {})
+
+        self.name = name
+        self.max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._entries = _entries.setdefault(name, collections.OrderedDict())
+        self._lock = _locks.setdefault(name, threading.Lock())
+
+        _sizes.setdefault(name, 0)
+
+    @property
+    def size(self):
+        """Total size of stored values in bytes."""
+        return _sizes[self.name]
+
+    def _get(self, key):
+        """Return the pickled value, when stored and not expired."""
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return None
+
+        expiry, pickled = entry
+
+        if expiry is not None and expiry <= time.time():
+            _sizes[self.name] -= len(pickled)
+            return None
+
+        # Moved to the end, as the most recently used
+        self._entries[key] = entry
+        return pickled
+
+    def _set(self, key, pickled, expiry):
+        """Store the pickled value, evicting least recently used ones."""
+        self._delete(key)
+
+        if len(pickled) > self.max_bytes:
+            return
+
+        self._entries[key] = (expiry, pickled)
+        _sizes[self.name] += len(pickled)
+
+        while _sizes[self.name] > self.max_bytes:
+            evicted, entry = self._entries.popitem(last=False)
+            _sizes[self.name] -= len(entry[1])
+
+    def _delete(self, key):
+        """Remove the value, return True when it was stored."""
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return False
+
+        _sizes[self.name] -= len(entry[1])
+        return True
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Store the value, only when the key is not already stored.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        value : object
+            Any value that can be pickled.
+        timeout : int
+            Number of seconds to keep the value, None to keep it until it is
+            evicted. Default timeout of the cache when not set.
+        version : int
+            Version of the key, default version of the cache when not set.
+
+        Returns
+        -------
+        bool
+            True when the value was stored.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+
+            self._set(key, pickled, self.get_backend_timeout(timeout))
+            return True
+
+    def get(self, key, default=None, version=None):
+        """
+        Get the stored value, marking it as the most recently used.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        default : object
+            Returned when the value is not stored or has expired.
+        version : int
+            Version of the key, default version of the cache when not set.
+
+        Returns
+        -------
+        object
+            Stored value or the default.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        with self._lock:
+            pickled = self._get(key)
+
+        if pickled is None:
+            return default
+
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Store the value, replacing the one already stored.
+
+        The value is not stored when it is larger than the bound of the cache.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        value : object
+            Any value that can be pickled.
+        timeout : int
+            Number of seconds to keep the value, None to keep it until it is
+            evicted. Default timeout of the cache when not set.
+        version : int
+            Version of the key, default version of the cache when not set.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._set(key, pickled, self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Increment the stored value within the lock, keeping its expiry.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        delta : int
+            Number added to the value, can be negative.
+        version : int
+            Version of the key, default version of the cache when not set.
+
+        Returns
+        -------
+        int
+            Incremented value.
+
+        Raises
+        ------
+        ValueError
+            If the value is not stored or has expired.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        with self._lock:
+            pickled = self._get(key)
+
+            if pickled is None:
+                raise ValueError("Key '%s' not found" % key)
+
+            value = pickle.loads(pickled) + delta
+            expiry = self._entries[key][0]
+            self._set(
+                key,
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                expiry
+            )
+            return value
+
+    def delete(self, key, version=None):
+        """
+        Remove the stored value.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        version : int
+            Version of the key, default version of the cache when not set.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        with self._lock:
+            self._delete(key)
+
+    def has_key(self, key, version=None):
+        """
+        Check if the value is stored and has not expired.
+
+        Parameters
+        ----------
+        key : str
+            Key of the value.
+        version : int
+            Version of the key, default version of the cache when not set.
+
+        Returns
+        -------
+        bool
+            True when the value is stored.
+        """
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        with self._lock:
+            return self._get(key) is not None
+
+    def clear(self):
+        """Remove all stored values of the cache (in all its instances)."""
+        with self._lock:
+            self._entries.clear()
+            _sizes[self.name] = 0
@@ -0,0 +1,232 @@
+"""
+Changes of the public API: validators used for conditional requests and
+cached responses (of locations and projects).
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from geokey_airquality import __version__
+from geokey_airquality.cache import LRUMemoryCache
+from geokey_airquality.compression import compress
+from geokey_airquality.models import AirQualityChange
+
+
+LOCATIONS_KEY = 'airquality:locations:%s'
+RESPONSE_KEY = 'airquality:response:%s'
+
+# Used when `AIRQUALITY_LOCATIONS_CACHE` is not set: local to the process,
+# bounded by size and evicting the least recently used responses first
+DEFAULT_CACHE = LRUMemoryCache('geokey_airquality', {
+    'TIMEOUT': None,
+    'OPTIONS': {'MAX_BYTES': 64 * 1024 * 1024},
+})
+
+
+def get_etag(*parts):
+    """
+    Gets a strong ETag from all parts of the representation. Version of the
+    extension is included, so that ETags change when representations do.
+
+    Returns
+    -------
+    str
+        Quoted ETag.
+    """
+    value = '|'.join(['%s' % part for part in (__version__,) + parts])
+    return '"%s"' % hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+def get_locations_changed(user):
+    """
+    Gets the time locations (or their measurements) of the user were changed
+    last time. It is set to now when not stored yet, so that any later change
+    is noticed.
+
+    Parameters
+    ----------
+    user : geokey.users.models.User
+        Creator of the locations.
+
+    Returns
+    -------
+    datetime.datetime
+        Time of the last change.
+    """
+    change, created = AirQualityChange.objects.get_or_create(
+        user_id=user.id,
+        defaults={'changed': timezone.now()}
+    )
+
+    return change.changed
+
+
+def touch_locations(user_ids):
+    """
+    Marks locations of the users as changed and removes their cached
+    responses. Only users, whose changes were already requested, are updated
+    (using a single query).
+
+    Parameters
+    ----------
+    user_ids : list
+        IDs of users, can also be a flat queryset of IDs.
+    """
+    user_ids = list(user_ids)
+
+    AirQualityChange.objects.filter(
+        user_id__in=user_ids
+    ).update(changed=timezone.now())
+
+    # Cached responses are outdated now, the memory can be freed
+    cache = get_locations_cache()
+
+    if cache is not None and user_ids:
+        cache.delete_many([LOCATIONS_KEY % user_id for user_id in user_ids])
+
+
+def get_locations_cache():
+    """
+    Gets the cache of responses.
+
+    Returns
+    -------
+    django.core.cache.backends.base.BaseCache
+        Cache set by `AIRQUALITY_LOCATIONS_CACHE` (an alias of `CACHES`),
+        the bundled local-memory cache of 64 MB when not set, None when set
+        to None.
+    """
+    if not hasattr(settings, 'AIRQUALITY_LOCATIONS_CACHE'):
+        return DEFAULT_CACHE
+
+    alias = settings.AIRQUALITY_LOCATIONS_CACHE
+    return None if alias is None else caches[alias]
+
+
+def get_cached_locations(user, changed, etag):
+    """
+    Gets the cached response of locations.
+
+    Parameters
+    ----------
+    user : geokey.users.models.User
+        Creator of the locations.
+    changed : datetime.datetime
+        Time locations of the user were changed last time.
+    etag : str
+        Quoted ETag of the representation.
+
+    Returns
+    -------
+    tuple
+        Bodies of the response stored by the content coding and its content
+        type, None when not cached or cached before the last change.
+    """
+    cache = get_locations_cache()
+
+    if cache is None:
+        return None
+
+    cached = cache.get(LOCATIONS_KEY % user.id)
+
+    if cached is None or cached['changed'] != changed:
+        return None
+
+    return cached['responses'].get(etag)
+
+
+def cache_locations(user, changed, etag, content, content_type):
+    """
+    Caches the response of locations, compressed with all available
+    encodings. Responses of all representations (format, precision) are
+    stored together for each user, so that they can be removed at once.
+
+    Parameters
+    ----------
+    user : geokey.users.models.User
+        Creator of the locations.
+    changed : datetime.datetime
+        Time locations of the user were changed last time, read before the
+        locations.
+    etag : str
+        Quoted ETag of the representation.
+    content : bytes
+        Rendered content of the response.
+    content_type : str
+        Content type of the response.
+
+    Returns
+    -------
+    dict
+        Bodies of the response stored by the content coding.
+    """
+    bodies = compress(content)
+    cache = get_locations_cache()
+
+    if cache is None:
+        return bodies
+
+    key = LOCATIONS_KEY % user.id
+    cached = cache.get(key)
+
+    if cached is None or cached['changed'] != changed:
+        cached = {'changed': changed, 'responses': {}}
+
+    cached['responses'][etag] = (bodies, content_type)
+    cache.set(key, cached)
+
+    return bodies
+
+
+def get_cached_response(etag):
+    """
+    Gets the cached response of the representation. As the ETag changes
+    with the representation, the response never has to be removed.
+
+    Parameters
+    ----------
+    etag : str
+        Quoted ETag of the representation.
+
+    Returns
+    -------
+    tuple
+        Bodies of the response stored by the content coding and its content
+        type, None when not cached.
+    """
+    cache = get_locations_cache()
+    return None if cache is None else cache.get(RESPONSE_KEY % etag.strip('"'))
+
+
+def cache_response(etag, content, content_type):
+    """
+    Caches the response of the representation, compressed with all available
+    encodings.
+
+    Parameters
+    ----------
+    etag : str
+        Quoted ETag of the representation.
+    content : bytes
+        Rendered content of the response.
+    content_type : str
+        Content type of the response.
+
+    Returns
+    -------
+    dict
+        Bodies of the response stored by the content coding.
+    """
+    bodies = compress(content)
+    cache = get_locations_cache()
+
+    if cache is not None:
+        cache.set(RESPONSE_KEY % etag.strip('"'), (bodies, content_type))
+
+    return bodies
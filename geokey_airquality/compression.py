@@ -0,0 +1,177 @@
+"""
+Compression of cached responses: bodies are compressed once, when cached,
+and the one accepted by the client is served without compressing it again.
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import gzip
+import io
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from django.utils.cache import patch_vary_headers
+
+
+# Bodies smaller than that are not worth compressing
+MIN_SIZE = 200
+
+# Encodings in order of preference, when accepted equally
+ENCODINGS = ['br', 'gzip', 'identity']
+
+
+def compress(content):
+    """
+    Compresses the body with all available encodings.
+
+    Parameters
+    ----------
+    content : bytes
+        Body of the response.
+
+    Returns
+    -------
+    dict
+        Bodies stored by the content coding, the original one as "identity".
+        Brotli is included only when the optional `brotli` package is
+        installed.
+    """
+    bodies = {'identity': content}
+
+    if len(content) < MIN_SIZE:
+        return bodies
+
+    out = io.BytesIO()
+
+    # Without a time, the same body is always compressed the same way
+    with gzip.GzipFile(fileobj=out, mode='wb', mtime=0) as gz:
+        gz.write(content)
+
+    bodies['gzip'] = out.getvalue()
+
+    if brotli is not None:
+        bodies['br'] = brotli.compress(content)
+
+    # Compressed bodies are only kept when they are smaller
+    return {
+        coding: body for coding, body in bodies.items()
+        if coding == 'identity' or len(body) < len(content)
+    }
+
+
+def parse_accept_encoding(header):
+    """
+    Parses the `Accept-Encoding` header.
+
+    Parameters
+    ----------
+    header : str
+        Value of the header, can be empty.
+
+    Returns
+    -------
+    dict
+        Quality values stored by the content coding (in lower case).
+    """
+    accepted = {}
+
+    for part in header.split(','):
+        params = part.strip().split(';')
+        coding = params[0].strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+
+        for param in params[1:]:
+            name, _, value = param.strip().partition('=')
+
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        accepted[coding] = quality
+
+    return accepted
+
+
+def choose_encoding(header, available):
+    """
+    Chooses the content coding of the response, preferring the one with the
+    highest quality value (and then Brotli, gzip and no compression).
+
+    Parameters
+    ----------
+    header : str
+        Value of the `Accept-Encoding` header, can be empty.
+    available : list
+        Available content codings.
+
+    Returns
+    -------
+    str
+        Chosen content coding, "identity" when none is accepted.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*')
+    choices = []
+
+    for coding in ENCODINGS:
+        if coding not in available:
+            continue
+
+        quality = accepted.get(coding, wildcard)
+
+        # Without compression is acceptable, unless explicitly excluded
+        if quality is None:
+            quality = 0.001 if coding == 'identity' else 0.0
+
+        if quality > 0:
+            choices.append((-quality, ENCODINGS.index(coding), coding))
+
+    return min(choices)[2] if choices else 'identity'
+
+
+def encode_response(request, response, bodies):
+    """
+    Sets the body accepted by the client on the response.
+
+    Parameters
+    ----------
+    request : django.http.HttpRequest
+        Represents the request.
+    response : django.http.HttpResponse
+        Response to be sent.
+    bodies : dict
+        Bodies stored by the content coding, as returned by `compress`.
+
+    Returns
+    -------
+    django.http.HttpResponse
+        The same response.
+    """
+    coding = choose_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        list(bodies.keys())
+    )
+
+    response.content = bodies[coding]
+
+    if coding != 'identity':
+        response['Content-Encoding'] = coding
+
+        # Weak, as the compressed representation has different bytes
+        etag = response.get('ETag')
+
+        if etag is not None and not etag.startswith('W/'):
+            response['ETag'] = 'W/%s' % etag
+
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
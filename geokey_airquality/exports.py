@@ -0,0 +1,744 @@
+"""Exports for the extension."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import gzip
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.template.defaultfilters import date as filter_date
+from django.utils import six, timezone
+
+from geokey.categories.models import LookupValue
+from geokey.contributions.models import Observation
+
+from geokey_airquality.models import (
+    AirQualityProject,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+)
+from geokey_airquality.singleflight import single_flight
+from geokey_airquality.streaming import iter_chunks
+from geokey_airquality.submissions import get_mapping
+
+
+FIELDNAMES = [
+    'Barcode',
+    'Location',
+    'Site characteristics',
+    'Height from ground (m)',
+    'Distance from the road (m)',
+    'Additional details',
+    'Date out',
+    'Date in',
+    'Time out',
+    'Time in',
+    'Exposure time (min)',
+    'Exposure time (hr)',
+    'Diffusion tube made by students',
+    'Added by'
+]
+
+# Measurements submitted as contributions are no longer stored, so the
+# unified export tells where results were submitted to
+UNIFIED_FIELDNAMES = FIELDNAMES + ['Results', 'Submitted to']
+
+# Exported files are opened by concurrent exports within seconds of being
+# written, older ones are removed by later exports (seconds)
+EXPORT_MAX_AGE = 60
+
+
+def format_row(row):
+    """Return values of the row as CSV cells, leaving empty ones out."""
+    return {
+        key: six.text_type(value).encode('utf-8') if value else None
+        for key, value in row.iteritems()
+    }
+
+
+def get_measurements(chunk_size=500):
+    """
+    Gets all measurements (including archived ones) with their locations and
+    creators. Each table is read in chunks, so only a chunk of measurements
+    is held in memory at once.
+
+    Parameters
+    ----------
+    chunk_size : int
+        Number of measurements read at once.
+
+    Returns
+    -------
+    generator
+        Measurements, archived ones as `AirQualityMeasurementArchive`.
+    """
+    for model in [AirQualityMeasurement, AirQualityMeasurementArchive]:
+        for measurement in iter_chunks(
+            model.objects.select_related('location', 'creator'),
+            chunk_size
+        ):
+            yield measurement
+
+
+def get_measurement_rows():
+    """
+    Gets rows of all measurements (including archived ones), building each
+    row in Python.
+
+    Returns
+    -------
+    generator
+        Rows stored by the column name.
+    """
+    for measurement in get_measurements():
+        location = measurement.location
+
+        if measurement.finished:
+            exposure = measurement.finished - measurement.started
+            exposure_min = int(exposure.total_seconds() / 60)
+            exposure_hr = int(exposure.total_seconds() / 3600)
+            date_in = filter_date(measurement.finished, 'd/m/Y')
+            time_in = filter_date(measurement.finished, 'H:i')
+        else:
+            exposure_min = None
+            exposure_hr = None
+            date_in = None
+            time_in = None
+
+        yield {
+            'Barcode': measurement.barcode,
+            'Location': location.name,
+            'Site characteristics': location.properties.get(
+                'characteristics'),
+            'Height from ground (m)': location.properties.get(
+                'height'),
+            'Distance from the road (m)': location.properties.get(
+                'distance'),
+            'Additional details': measurement.properties.get(
+                'additional_details'),
+            'Date out': filter_date(measurement.started, 'd/m/Y'),
+            'Date in': date_in,
+            'Time out': filter_date(measurement.started, 'H:i'),
+            'Time in': time_in,
+            'Exposure time (min)': exposure_min,
+            'Exposure time (hr)': exposure_hr,
+            'Diffusion tube made by students': measurement.properties.get(
+                'made_by_students'),
+            'Added by': measurement.creator.display_name,
+            'Results': measurement.properties.get('results'),
+            'Submitted to': None
+        }
+
+
+def write_measurements(out):
+    """
+    Writes all measurements (including archived ones) as CSV, building each
+    row in Python.
+
+    Parameters
+    ----------
+    out : file
+        File-like object the CSV is written to.
+    """
+    writer = csv.DictWriter(out, fieldnames=FIELDNAMES, extrasaction='ignore')
+    writer.writeheader()
+
+    for row in get_measurement_rows():
+        writer.writerow(format_row(row))
+
+
+def get_length(value):
+    """Return the length without its unit ("2.5m" is "2.5")."""
+    if value is None:
+        return None
+
+    value = six.text_type(value)
+
+    if value.endswith('m'):
+        value = value[:-1]
+
+    return None if value == 'None' else value
+
+
+def get_contribution_row(properties, keys, lookup_values):
+    """
+    Gets the row of a measurement submitted as a contribution.
+
+    Parameters
+    ----------
+    properties : dict
+        Properties of the contribution.
+    keys : dict
+        Keys of fields stored by the Air Quality field type.
+    lookup_values : dict
+        Names of lookup values stored by their IDs (as text).
+
+    Returns
+    -------
+    dict
+        Row stored by the column name (without location, creator and
+        project).
+    """
+    values = {
+        field_type: properties.get(key)
+        for field_type, key in keys.items()
+    }
+
+    try:
+        exposure_min = int(values.get('exposure_min'))
+        exposure_hr = exposure_min // 60
+    except (TypeError, ValueError):
+        exposure_min = None
+        exposure_hr = None
+
+    made_by_students = lookup_values.get(
+        six.text_type(values.get('made_by_students'))
+    )
+
+    return {
+        'Barcode': None,
+        'Site characteristics': values.get('site_characteristics'),
+        'Height from ground (m)': get_length(values.get('height')),
+        'Distance from the road (m)': get_length(
+            values.get('distance_from_road')),
+        'Additional details': values.get('additional_details'),
+        'Date out': values.get('date_out'),
+        'Date in': values.get('date_collected'),
+        'Time out': values.get('time_out'),
+        'Time in': values.get('time_collected'),
+        'Exposure time (min)': exposure_min,
+        'Exposure time (hr)': exposure_hr,
+        'Diffusion tube made by students': made_by_students == 'Yes',
+        'Results': values.get('results')
+    }
+
+
+def get_contribution_rows():
+    """
+    Gets rows of measurements submitted as contributions to active Air
+    Quality projects, projecting properties of contributions to the columns
+    of measurements with the Air Quality field mapping. Contributions of each
+    project are read with a single query (joined with their creators and
+    locations).
+
+    Returns
+    -------
+    generator
+        Rows stored by the column name.
+    """
+    field_types = {value: key for key, value in AirQualityField.TYPES}
+
+    for aq_project in AirQualityProject.objects.filter(
+        status='active'
+    ).select_related('project').order_by('id'):
+        mapping = get_mapping(aq_project)
+        keys = {}
+
+        for aq_category, aq_fields in mapping.values():
+            keys[aq_category.category_id] = {
+                field_types[field_type]: aq_field.field.key
+                for field_type, aq_field in aq_fields.items()
+            }
+
+        if not keys:
+            continue
+
+        lookup_values = dict(
+            (six.text_type(value_id), name)
+            for value_id, name in LookupValue.objects.filter(
+                field_id__in=[
+                    aq_field.field_id
+                    for aq_category, aq_fields in mapping.values()
+                    for aq_field in aq_fields.values()
+                ]
+            ).values_list('id', 'name')
+        )
+
+        contributions = Observation.objects.filter(
+            project_id=aq_project.project_id,
+            category_id__in=keys.keys()
+        ).exclude(
+            status__in=['draft', 'deleted']
+        ).order_by('id').values_list(
+            'category_id',
+            'properties',
+            'creator__display_name',
+            'location__name'
+        )
+
+        for category_id, properties, display_name, name in (
+                contributions.iterator()):
+            row = get_contribution_row(
+                properties or {},
+                keys[category_id],
+                lookup_values
+            )
+            row['Location'] = name
+            row['Added by'] = display_name
+            row['Submitted to'] = aq_project.project.name
+
+            yield row
+
+
+class Echo(object):
+    """A file-like object returning what is written, used for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def stream_unified():
+    """
+    Streams all measurements (including archived ones) and measurements
+    already submitted as contributions as CSV, one line at a time.
+
+    Returns
+    -------
+    generator
+        Lines of CSV.
+    """
+    writer = csv.DictWriter(Echo(), fieldnames=UNIFIED_FIELDNAMES)
+    yield writer.writerow(dict(zip(UNIFIED_FIELDNAMES, UNIFIED_FIELDNAMES)))
+
+    for row in get_measurement_rows():
+        yield writer.writerow(format_row(row))
+
+    for row in get_contribution_rows():
+        yield writer.writerow(format_row(row))
+
+
+def get_property_sql(alias, key):
+    """
+    Gets SQL reading a property of the JSON column as text, formatted the
+    same way as in Python: false, zero and empty values are left empty, true
+    is "True".
+
+    Parameters
+    ----------
+    alias : str
+        Alias of the table in the query.
+    key : str
+        Key of the property.
+
+    Returns
+    -------
+    str
+        SQL expression.
+    """
+    value = "{alias}.properties -> '{key}'".format(alias=alias, key=key)
+    text = "{alias}.properties ->> '{key}'".format(alias=alias, key=key)
+
+    return (
+        "CASE jsonb_typeof({value}) "
+        "WHEN 'boolean' THEN CASE WHEN {text} = 'true' THEN 'True' END "
+        "WHEN 'number' THEN CASE WHEN ({text})::numeric <> 0 THEN {text} END "
+        "WHEN 'string' THEN NULLIF({text}, '') "
+        "WHEN 'null' THEN NULL "
+        "ELSE {text} END"
+    ).format(value=value, text=text)
+
+
+def get_measurements_sql(sharded=False):
+    """
+    Gets SQL selecting all measurements (including archived ones) with the
+    same columns and formatting as `write_measurements`. Dates and times are
+    formatted in the time zone passed as the first parameter.
+
+    Parameters
+    ----------
+    sharded : Boolean
+        Indicates if only measurements with IDs in a range should be selected
+        (ordered by their IDs), the range start (inclusive) and end
+        (exclusive) are passed as next parameters.
+
+    Returns
+    -------
+    str
+        SQL query.
+    """
+    columns = (
+        'id, barcode, location_id, creator_id, started, finished, properties'
+    )
+    exposure = 'trunc(extract(epoch FROM m.finished - m.started) / {seconds})'
+
+    return (
+        'SELECT '
+        "NULLIF(m.barcode, '') AS \"Barcode\", "
+        "NULLIF(l.name, '') AS \"Location\", "
+        '{characteristics} AS "Site characteristics", '
+        '{height} AS "Height from ground (m)", '
+        '{distance} AS "Distance from the road (m)", '
+        '{additional_details} AS "Additional details", '
+        "to_char(m.started AT TIME ZONE tz.name, 'DD/MM/YYYY') "
+        'AS "Date out", '
+        "to_char(m.finished AT TIME ZONE tz.name, 'DD/MM/YYYY') "
+        'AS "Date in", '
+        "to_char(m.started AT TIME ZONE tz.name, 'HH24:MI') AS \"Time out\", "
+        "to_char(m.finished AT TIME ZONE tz.name, 'HH24:MI') AS \"Time in\", "
+        'NULLIF({exposure_min}, 0)::bigint AS "Exposure time (min)", '
+        'NULLIF({exposure_hr}, 0)::bigint AS "Exposure time (hr)", '
+        '{made_by_students} AS "Diffusion tube made by students", '
+        "NULLIF(u.display_name, '') AS \"Added by\" "
+        'FROM ('
+        'SELECT {columns} FROM {main} '
+        'UNION ALL '
+        'SELECT {columns} FROM {archive}'
+        ') AS m '
+        'JOIN {location} AS l ON l.id = m.location_id '
+        'JOIN {user} AS u ON u.id = m.creator_id '
+        'CROSS JOIN (SELECT %s::text AS name) AS tz'
+        '{where}'
+    ).format(
+        characteristics=get_property_sql('l', 'characteristics'),
+        height=get_property_sql('l', 'height'),
+        distance=get_property_sql('l', 'distance'),
+        additional_details=get_property_sql('m', 'additional_details'),
+        exposure_min=exposure.format(seconds=60),
+        exposure_hr=exposure.format(seconds=3600),
+        made_by_students=get_property_sql('m', 'made_by_students'),
+        columns=columns,
+        main=AirQualityMeasurement._meta.db_table,
+        archive=AirQualityMeasurementArchive._meta.db_table,
+        location=AirQualityLocation._meta.db_table,
+        user=get_user_model()._meta.db_table,
+        where=(
+            ' WHERE m.id >= %s AND m.id < %s ORDER BY m.id' if sharded else ''
+        )
+    )
+
+
+def copy_measurements(out, id_range=None, header=True):
+    """
+    Writes all measurements (including archived ones) as CSV, shaping rows in
+    a single SQL query streamed by PostgreSQL `COPY ... TO STDOUT`. Columns
+    are the same as of `write_measurements`, lines end with LF rather than
+    CRLF.
+
+    Parameters
+    ----------
+    out : file
+        File-like object the CSV is written to.
+    id_range : tuple
+        Start (inclusive) and end (exclusive) of IDs of measurements to be
+        written, ordered by their IDs. All measurements are written when not
+        set.
+    header : Boolean
+        Indicates if the header should be written.
+    """
+    params = [timezone.get_current_timezone_name()]
+
+    if id_range is not None:
+        params.extend(id_range)
+
+    with connection.cursor() as cursor:
+        query = cursor.mogrify(
+            get_measurements_sql(sharded=id_range is not None),
+            params
+        )
+
+        if isinstance(query, bytes):
+            query = query.decode('utf-8')
+
+        cursor.copy_expert(
+            'COPY ({query}) TO STDOUT WITH CSV{header}'.format(
+                query=query,
+                header=' HEADER' if header else ''
+            ),
+            out
+        )
+
+
+def read_measurements(chunk_size=2000):
+    """
+    Reads rows of all measurements (including archived ones), shaped by the
+    same SQL query as `copy_measurements`, from a server-side cursor. Only a
+    chunk of rows is held in memory at once.
+
+    Parameters
+    ----------
+    chunk_size : int
+        Number of rows fetched at once.
+
+    Returns
+    -------
+    generator
+        Rows stored by the column name.
+    """
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(
+            get_measurements_sql(),
+            [timezone.get_current_timezone_name()]
+        )
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+
+            if not rows:
+                break
+
+            for row in rows:
+                yield dict(zip(FIELDNAMES, row))
+
+
+def stream_measurements():
+    """
+    Streams all measurements (including archived ones) as CSV, one line at
+    a time. Rows are read from a server-side cursor on PostgreSQL and built
+    in Python otherwise.
+
+    Returns
+    -------
+    generator
+        Lines of CSV.
+    """
+    if connection.vendor == 'postgresql':
+        rows = read_measurements()
+    else:
+        rows = get_measurement_rows()
+
+    writer = csv.DictWriter(Echo(), fieldnames=FIELDNAMES)
+    yield writer.writerow(dict(zip(FIELDNAMES, FIELDNAMES)))
+
+    for row in rows:
+        yield writer.writerow(format_row(row))
+
+
+def get_export_directory():
+    """
+    Gets the directory of exported files, creating it when missing.
+
+    Returns
+    -------
+    str
+        Path of the directory.
+    """
+    directory = os.path.join(tempfile.gettempdir(), 'airquality-exports')
+
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+
+    return directory
+
+
+def remove_stale_exports(directory):
+    """
+    Removes exported files older than `EXPORT_MAX_AGE`. Files still being
+    streamed are kept open, so their content is not lost.
+
+    Parameters
+    ----------
+    directory : str
+        Path of the directory of exported files.
+    """
+    stale = time.time() - EXPORT_MAX_AGE
+
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+
+        try:
+            if os.path.getmtime(path) < stale:
+                os.remove(path)
+        except OSError:
+            # Removed by another export in the meantime
+            pass
+
+
+def write_export():
+    """
+    Writes all measurements (including archived ones) as CSV to a new file,
+    with PostgreSQL `COPY` (or in Python on other databases), so that the
+    content is never held in memory.
+
+    Returns
+    -------
+    str
+        Path of the written file.
+    """
+    directory = get_export_directory()
+    remove_stale_exports(directory)
+    handle, path = tempfile.mkstemp(
+        prefix='measurements-',
+        suffix='.csv',
+        dir=directory
+    )
+
+    try:
+        with os.fdopen(handle, 'wb') as out:
+            if connection.vendor == 'postgresql':
+                copy_measurements(out)
+            else:
+                write_measurements(out)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path
+
+
+def open_export():
+    """
+    Opens a CSV file of all measurements (including archived ones).
+    Concurrent exports share the same file, written once: by another thread
+    or, when the cache of responses is shared, by another process on the
+    same host. Only the path of the file is shared through the cache.
+
+    Returns
+    -------
+    file
+        Exported file, opened in binary mode.
+    """
+    path = single_flight('export:measurements', write_export)
+
+    try:
+        return open(path, 'rb')
+    except IOError:
+        # Written by a process on another host
+        return open(write_export(), 'rb')
+
+
+def get_id_ranges(count):
+    """
+    Splits IDs of all measurements (including archived ones, which keep IDs
+    of measurements) into ranges of the same size.
+
+    Parameters
+    ----------
+    count : int
+        Number of ranges.
+
+    Returns
+    -------
+    list
+        Start (inclusive) and end (exclusive) of each range, ordered. A single
+        empty range is returned when there are no measurements.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT min(id), max(id) FROM ('
+            'SELECT id FROM {main} UNION ALL SELECT id FROM {archive}'
+            ') AS m'.format(
+                main=AirQualityMeasurement._meta.db_table,
+                archive=AirQualityMeasurementArchive._meta.db_table
+            )
+        )
+        first, last = cursor.fetchone()
+
+    if first is None:
+        return [(0, 0)]
+
+    size = (last - first + count) // count
+
+    return [
+        (start, min(start + size, last + 1))
+        for start in range(first, last + 1, size)
+    ]
+
+
+def export_shard(task):
+    """
+    Writes a shard of measurements to its own file. Runs in a worker process
+    of the pool, using its own database connection.
+
+    Parameters
+    ----------
+    task : tuple
+        Path of the file, ID range of the shard, whether the header should be
+        written, name of the time zone and whether the file should be
+        gzip-compressed.
+
+    Returns
+    -------
+    str
+        Path of the written file.
+    """
+    path, id_range, header, timezone_name, compress = task
+    timezone.activate(timezone_name)
+
+    with open(path, 'wb') as shard_file:
+        if compress:
+            with gzip.GzipFile(
+                filename='',
+                mode='wb',
+                fileobj=shard_file
+            ) as out:
+                copy_measurements(out, id_range, header)
+        else:
+            copy_measurements(shard_file, id_range, header)
+
+    return path
+
+
+def export_measurements(out, processes=1, shards=None, compress=False):
+    """
+    Writes all measurements (including archived ones) as CSV, split into
+    shards by their IDs. Shards are formatted in parallel by a pool of
+    processes and merged in order of IDs. When compressed, each shard is a
+    separate gzip member (concatenated members are a valid gzip file).
+
+    Must not run in a transaction, as workers cannot see its changes.
+
+    Parameters
+    ----------
+    out : file
+        File-like object the CSV is written to, in binary mode.
+    processes : int
+        Number of worker processes. Shards are written in the current
+        process when 1.
+    shards : int
+        Number of shards, 4 for each process when not set.
+    compress : Boolean
+        Indicates if the output should be gzip-compressed.
+
+    Returns
+    -------
+    int
+        Number of written shards.
+    """
+    id_ranges = get_id_ranges(shards or processes * 4)
+    directory = tempfile.mkdtemp(prefix='airquality-export-')
+    tasks = [
+        (
+            os.path.join(directory, '%s.csv' % index),
+            id_range,
+            index == 0,
+            timezone.get_current_timezone_name(),
+            compress
+        )
+        for index, id_range in enumerate(id_ranges)
+    ]
+
+    try:
+        if processes > 1:
+            # Workers must open their own connections, not forked ones
+            connections.close_all()
+            pool = multiprocessing.Pool(processes)
+
+            try:
+                for path in pool.imap(export_shard, tasks):
+                    with open(path, 'rb') as shard_file:
+                        shutil.copyfileobj(shard_file, out)
+
+                    os.remove(path)
+            finally:
+                pool.terminate()
+                pool.join()
+        else:
+            for task in tasks:
+                with open(export_shard(task), 'rb') as shard_file:
+                    shutil.copyfileobj(shard_file, out)
+    finally:
+        shutil.rmtree(directory)
+
+    return len(tasks)
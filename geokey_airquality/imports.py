@@ -0,0 +1,868 @@
+"""Imports for the extension."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+from django.utils import six, timezone
+
+from geokey_airquality.changes import touch_locations
+from geokey_airquality.models import (
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive,
+    get_float
+)
+from geokey_airquality.serializers import (
+    LocationSerializer,
+    MeasurementSerializer,
+    to_datetime
+)
+from geokey_airquality.submissions import get_mapping, submit_measurement
+
+
+def update_properties(measurements):
+    """
+    Updates properties of all measurements using a single query.
+
+    Parameters
+    ----------
+    measurements : list
+        Measurements with the properties already changed.
+    """
+    if len(measurements) == 0:
+        return
+
+    params = []
+
+    for measurement in measurements:
+        params.extend([
+            measurement.id,
+            json.dumps(measurement.properties),
+            get_float(measurement.properties.get('results'))
+        ])
+
+    sql = (
+        'UPDATE {table} AS measurement '
+        'SET properties = data.properties, results = data.results '
+        'FROM (VALUES {values}) AS data (id, properties, results) '
+        'WHERE measurement.id = data.id'
+    ).format(
+        table=AirQualityMeasurement._meta.db_table,
+        values=', '.join(
+            ['(%s, %s::jsonb, %s::double precision)'] * len(measurements)
+        )
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+class ResultsImport(object):
+    """
+    Import lab results of measurements from a CSV file.
+
+    The file needs a header with "Barcode" and "Results" (or "NO2") columns,
+    otherwise the first two columns are used. Rows are read as a stream and
+    matched to measurements by barcode in batches.
+    """
+
+    def __init__(self, aq_project=None, batch_size=1000):
+        """
+        Initiates a new import.
+
+        Parameters
+        ----------
+        aq_project : geokey_airquality.models.AirQualityProject
+            When set, measurements are also submitted to this project.
+        batch_size : int
+            Number of rows matched and updated at once.
+        """
+        self.aq_project = aq_project
+        self.batch_size = batch_size
+        self.mapping = None
+        self.seen = set()
+        self.report = {
+            'updated': 0,
+            'submitted': 0,
+            'not_submitted': [],
+            'unmatched': [],
+            'ambiguous': [],
+            'invalid': []
+        }
+
+        if aq_project is not None:
+            self.mapping = get_mapping(aq_project)
+
+    def read(self, csv_file):
+        """
+        Reads all rows of the CSV file.
+
+        Parameters
+        ----------
+        csv_file : file
+            CSV file, opened in binary mode.
+
+        Returns
+        -------
+        generator
+            Tuples of line number, barcode and results.
+
+        Raises
+        ------
+        ValueError
+            If header is present, but results column is not found.
+        """
+        barcode_column = 0
+        results_column = 1
+
+        for line, row in enumerate(csv.reader(csv_file), 1):
+            row = [
+                cell.decode('utf-8').lstrip('\ufeff').strip() for cell in row
+            ]
+
+            if line == 1 and 'barcode' in [cell.lower() for cell in row]:
+                columns = [cell.lower() for cell in row]
+                barcode_column = columns.index('barcode')
+                results_column = None
+
+                for index, column in enumerate(columns):
+                    if column.startswith(('result', 'no2')):
+                        results_column = index
+                        break
+
+                if results_column is None:
+                    raise ValueError('Results column not found.')
+
+                continue
+
+            if not any(row):
+                continue
+
+            try:
+                barcode = row[barcode_column]
+                results = row[results_column]
+            except IndexError:
+                barcode = None
+                results = None
+
+            yield line, barcode, results
+
+    def run(self, csv_file):
+        """
+        Runs the import.
+
+        Parameters
+        ----------
+        csv_file : file
+            CSV file, opened in binary mode.
+
+        Returns
+        -------
+        dict
+            Report of the import.
+        """
+        batch = []
+
+        for line, barcode, results in self.read(csv_file):
+            if not barcode:
+                self.report['invalid'].append({
+                    'line': line,
+                    'barcode': barcode,
+                    'error': 'Barcode is not set.'
+                })
+                continue
+
+            try:
+                results = float(results)
+            except (TypeError, ValueError):
+                self.report['invalid'].append({
+                    'line': line,
+                    'barcode': barcode,
+                    'error': 'Results are incorrect.'
+                })
+                continue
+
+            if barcode in self.seen:
+                self.report['ambiguous'].append({
+                    'line': line,
+                    'barcode': barcode,
+                    'error': 'Barcode is repeated in the file.'
+                })
+                continue
+
+            self.seen.add(barcode)
+            batch.append((line, barcode, results))
+
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+
+        if batch:
+            self.import_batch(batch)
+
+        return self.report
+
+    def import_batch(self, batch):
+        """
+        Matches a batch of rows to measurements, updates their results and
+        submits them, when project is set.
+
+        Parameters
+        ----------
+        batch : list
+            Tuples of line number, barcode and results.
+        """
+        found = {}
+        measurements = AirQualityMeasurement.objects.filter(
+            barcode__in=[barcode for line, barcode, results in batch]
+        ).select_related('location', 'creator')
+
+        for measurement in measurements:
+            found.setdefault(measurement.barcode, []).append(measurement)
+
+        matched = []
+
+        for line, barcode, results in batch:
+            measurements = found.get(barcode, [])
+
+            if len(measurements) == 0:
+                self.report['unmatched'].append({
+                    'line': line,
+                    'barcode': barcode
+                })
+            elif len(measurements) > 1:
+                self.report['ambiguous'].append({
+                    'line': line,
+                    'barcode': barcode,
+                    'error': 'Barcode is used by %s measurements.' % len(
+                        measurements
+                    )
+                })
+            else:
+                measurement = measurements[0]
+                measurement.properties = dict(
+                    measurement.properties or {},
+                    results=results
+                )
+                matched.append(measurement)
+
+        with transaction.atomic():
+            update_properties(matched)
+
+        self.report['updated'] += len(matched)
+
+        if self.aq_project is not None:
+            for measurement in matched:
+                self.submit(measurement)
+
+        touch_locations(set(measurement.creator_id for measurement in matched))
+
+    def submit(self, measurement):
+        """
+        Submits the finished measurement to the project.
+
+        Parameters
+        ----------
+        measurement : geokey_airquality.models.AirQualityMeasurement
+            Measurement with the results.
+        """
+        submitted = False
+
+        if measurement.finished is not None:
+            try:
+                with transaction.atomic():
+                    submitted = submit_measurement(
+                        measurement.creator,
+                        self.aq_project,
+                        measurement,
+                        measurement.properties.get('results'),
+                        self.mapping
+                    )
+            except ValidationError:
+                pass
+
+        if submitted:
+            self.report['submitted'] += 1
+        else:
+            self.report['not_submitted'].append(measurement.barcode)
+
+
+def get_copy_line(values):
+    """
+    Formats values as a line of CSV read by PostgreSQL `COPY`. None is left
+    unquoted (read as NULL), all text is quoted (read as is, even if empty).
+
+    Parameters
+    ----------
+    values : list
+        Values of the line.
+
+    Returns
+    -------
+    str
+        Line of CSV.
+    """
+    cells = []
+
+    for value in values:
+        if value is None:
+            cells.append('')
+        elif isinstance(value, bool):
+            cells.append('t' if value else 'f')
+        elif isinstance(value, six.integer_types):
+            cells.append('%d' % value)
+        elif isinstance(value, float):
+            cells.append(repr(value))
+        else:
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+
+            cells.append('"%s"' % value.replace('"', '""'))
+
+    return ','.join(cells) + '\n'
+
+
+def get_boolean(value):
+    """Convert value to boolean, or return None when it is not set."""
+    if value is None or isinstance(value, bool):
+        return value
+
+    value = six.text_type(value).strip().lower()
+
+    if value in ['1', 'true', 't', 'yes', 'y']:
+        return True
+    elif value in ['0', 'false', 'f', 'no', 'n']:
+        return False
+
+    return None
+
+
+def get_properties(**values):
+    """Return properties that are set, leaving out empty ones."""
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def get_text(value):
+    """Convert value to text, or return None when it is empty."""
+    if value is None:
+        return None
+
+    value = six.text_type(value).strip()
+    return value or None
+
+
+class HistoryImport(object):
+    """
+    Import historical locations and measurements from a CSV file (with a
+    header) or NDJSON file (one JSON object per line).
+
+    Each row describes a measurement with its location, using "email",
+    "location", "longitude", "latitude", "height", "distance",
+    "characteristics", "created", "barcode", "started", "finished",
+    "results", "additional_details" and "made_by_students" columns (keys).
+    Rows without a barcode only add a location. Rows of the same creator,
+    location name and coordinates share a location; locations already in the
+    database are reused. Measurements already in the database (including
+    archived ones) or repeated in the file are skipped.
+
+    Rows are validated with the rules of the API serializers in batches,
+    loaded into temporary staging tables with `COPY FROM` and merged into
+    the Air Quality tables within a single transaction.
+    """
+
+    STAGING_LOCATIONS = 'airquality_import_locations'
+    STAGING_MEASUREMENTS = 'airquality_import_measurements'
+
+    LOCATION_COLUMNS = [
+        'key', 'name', 'x', 'y', 'creator_id', 'created', 'properties',
+        'height', 'distance', 'characteristics'
+    ]
+    REQUIRED_COLUMNS = ['email', 'location', 'longitude', 'latitude']
+    MEASUREMENT_COLUMNS = [
+        'location_key', 'barcode', 'creator_id', 'started', 'finished',
+        'properties', 'results', 'made_by_students'
+    ]
+
+    def __init__(self, batch_size=10000, progress=None):
+        """
+        Initiates a new import.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of rows validated and loaded at once.
+        progress : callable
+            Called with the report after each batch, when set.
+        """
+        self.batch_size = batch_size
+        self.progress = progress
+        self.locations = {}
+        self.creators = set()
+        self.report = {
+            'read': 0,
+            'locations': 0,
+            'measurements': 0,
+            'skipped': 0,
+            'rejected': []
+        }
+
+    def read(self, input_file, file_format):
+        """
+        Reads all rows of the file.
+
+        Parameters
+        ----------
+        input_file : file
+            CSV or NDJSON file, opened in binary mode.
+        file_format : str
+            Either "csv" or "ndjson".
+
+        Returns
+        -------
+        generator
+            Tuples of line number and row (dict), row is None when it cannot
+            be read.
+
+        Raises
+        ------
+        ValueError
+            If the CSV file has no header with required columns.
+        """
+        if file_format == 'csv':
+            reader = csv.reader(input_file)
+            header = None
+
+            for line, row in enumerate(reader, 1):
+                row = [cell.decode('utf-8').lstrip('\ufeff') for cell in row]
+
+                if header is None:
+                    header = [cell.strip().lower() for cell in row]
+                    missing = [
+                        column for column in self.REQUIRED_COLUMNS
+                        if column not in header
+                    ]
+
+                    if missing:
+                        raise ValueError(
+                            'Columns are missing: %s.' % ', '.join(missing)
+                        )
+                elif any(row):
+                    yield line, dict(zip(header, row))
+        else:
+            for line, row in enumerate(input_file, 1):
+                if not row.strip():
+                    continue
+
+                try:
+                    row = json.loads(row.decode('utf-8'))
+                except ValueError:
+                    row = None
+
+                yield line, row if isinstance(row, dict) else None
+
+    def get_datetime(self, value):
+        """
+        Converts the value to an aware datetime, the same way as the API
+        does. Naive datetimes are in the current time zone.
+
+        Returns
+        -------
+        datetime.datetime
+            Converted datetime, None when not set or invalid.
+        """
+        if get_text(value) is None:
+            return None
+
+        try:
+            value = to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if value is not None and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+
+        return value
+
+    def get_errors(self, serializer):
+        """Return errors of the serializer as text."""
+        return '; '.join(
+            '%s: %s' % (field, ' '.join(error.messages))
+            for field, error in sorted(serializer.errors.items())
+        )
+
+    def validate(self, row):
+        """
+        Validates the row with the rules of the API serializers.
+
+        Parameters
+        ----------
+        row : dict
+            Row read from the file.
+
+        Returns
+        -------
+        tuple
+            Validated location and measurement (None when the row has no
+            barcode), or an error message instead of the location.
+        """
+        location = LocationSerializer(data={
+            'name': get_text(row.get('location')),
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [
+                    get_float(row.get('longitude')),
+                    get_float(row.get('latitude'))
+                ]
+            },
+            'properties': get_properties(
+                height=get_float(row.get('height')),
+                distance=get_float(row.get('distance')),
+                characteristics=get_text(row.get('characteristics'))
+            )
+        })
+
+        if not location.is_valid():
+            return self.get_errors(location), None
+
+        location = location.validated_data
+        location['created'] = self.get_datetime(row.get('created'))
+        name_length = AirQualityLocation._meta.get_field('name').max_length
+
+        if len(location['name']) > name_length:
+            return 'name: Name is too long.', None
+
+        barcode = get_text(row.get('barcode'))
+
+        if barcode is None:
+            if location['created'] is None:
+                location['created'] = timezone.now()
+
+            return location, None
+
+        measurement = MeasurementSerializer(data={
+            'barcode': barcode,
+            'properties': get_properties(
+                results=get_float(row.get('results')),
+                additional_details=get_text(row.get('additional_details')),
+                made_by_students=get_boolean(row.get('made_by_students'))
+            )
+        })
+
+        if not measurement.is_valid():
+            return self.get_errors(measurement), None
+
+        measurement = measurement.validated_data
+        barcode_length = AirQualityMeasurement._meta.get_field(
+            'barcode'
+        ).max_length
+
+        if len(barcode) > barcode_length:
+            return 'barcode: Barcode is too long.', None
+
+        measurement['started'] = self.get_datetime(row.get('started'))
+        measurement['finished'] = self.get_datetime(row.get('finished'))
+
+        if measurement['started'] is None:
+            return 'started: Start must be a valid date and time.', None
+
+        if get_text(row.get('finished')) and measurement['finished'] is None:
+            return 'finished: Finish must be a valid date and time.', None
+
+        if location['created'] is None:
+            location['created'] = measurement['started']
+
+        return location, measurement
+
+    def get_creators(self, emails):
+        """
+        Gets IDs of users by their emails (in any case) using one query.
+
+        Parameters
+        ----------
+        emails : set
+            Emails in lower case.
+
+        Returns
+        -------
+        dict
+            User IDs stored by the email in lower case.
+        """
+        return dict(
+            get_user_model().objects.annotate(
+                lower_email=Lower('email')
+            ).filter(
+                lower_email__in=emails
+            ).values_list('lower_email', 'id')
+        )
+
+    def create_staging_tables(self, cursor):
+        """Create temporary tables, dropped when the import is finished."""
+        cursor.execute(
+            'CREATE TEMPORARY TABLE {table} ('
+            'key integer PRIMARY KEY, id integer, '
+            'is_new boolean NOT NULL DEFAULT true, name text NOT NULL, '
+            'x double precision NOT NULL, y double precision NOT NULL, '
+            'creator_id integer NOT NULL, created timestamptz NOT NULL, '
+            'properties jsonb NOT NULL, height double precision, '
+            'distance double precision, characteristics text'
+            ') ON COMMIT DROP'.format(table=self.STAGING_LOCATIONS)
+        )
+        cursor.execute(
+            'CREATE TEMPORARY TABLE {table} ('
+            'position serial, '
+            'location_key integer NOT NULL, barcode text NOT NULL, '
+            'creator_id integer NOT NULL, started timestamptz NOT NULL, '
+            'finished timestamptz, properties jsonb NOT NULL, '
+            'results double precision, made_by_students boolean'
+            ') ON COMMIT DROP'.format(table=self.STAGING_MEASUREMENTS)
+        )
+
+    def drop_staging_tables(self, cursor):
+        """Drop temporary tables, even when in an outer transaction."""
+        cursor.execute('DROP TABLE {locations}, {measurements}'.format(
+            locations=self.STAGING_LOCATIONS,
+            measurements=self.STAGING_MEASUREMENTS
+        ))
+
+    def copy(self, cursor, table, columns, lines):
+        """Load lines of CSV into the staging table."""
+        if lines:
+            cursor.copy_expert(
+                'COPY {table} ({columns}) FROM STDIN WITH CSV'.format(
+                    table=table,
+                    columns=', '.join(columns)
+                ),
+                io.BytesIO(''.join(lines).encode('utf-8'))
+            )
+
+    def load_batch(self, cursor, batch):
+        """
+        Validates a batch of rows and loads valid ones into staging tables.
+
+        Parameters
+        ----------
+        cursor : django.db.backends.utils.CursorWrapper
+            Cursor of the import transaction.
+        batch : list
+            Tuples of line number and row.
+        """
+        validated = []
+
+        for line, row in batch:
+            if row is None:
+                self.report['rejected'].append({
+                    'line': line,
+                    'error': 'Row cannot be read.'
+                })
+                continue
+
+            location, measurement = self.validate(row)
+
+            if not isinstance(location, dict):
+                self.report['rejected'].append({
+                    'line': line,
+                    'error': location
+                })
+                continue
+
+            email = (get_text(row.get('email')) or '').lower()
+            validated.append((line, email, location, measurement))
+
+        creators = self.get_creators(
+            set(email for line, email, location, measurement in validated)
+        )
+        location_lines = []
+        measurement_lines = []
+
+        for line, email, location, measurement in validated:
+            creator_id = creators.get(email)
+
+            if creator_id is None:
+                self.report['rejected'].append({
+                    'line': line,
+                    'error': 'email: User not found.'
+                })
+                continue
+
+            geometry = location['geometry']
+            identifier = (creator_id, location['name'], geometry.x, geometry.y)
+            key = self.locations.get(identifier)
+
+            if key is None:
+                key = len(self.locations) + 1
+                self.locations[identifier] = key
+                properties = location['properties']
+                location_lines.append(get_copy_line([
+                    key,
+                    location['name'],
+                    geometry.x,
+                    geometry.y,
+                    creator_id,
+                    location['created'],
+                    json.dumps(properties),
+                    properties.get('height'),
+                    properties.get('distance'),
+                    properties.get('characteristics')
+                ]))
+
+            if measurement is not None:
+                properties = measurement['properties']
+                measurement_lines.append(get_copy_line([
+                    key,
+                    measurement['barcode'],
+                    creator_id,
+                    measurement['started'],
+                    measurement['finished'],
+                    json.dumps(properties),
+                    properties.get('results'),
+                    properties.get('made_by_students')
+                ]))
+
+            self.creators.add(creator_id)
+
+        self.copy(
+            cursor,
+            self.STAGING_LOCATIONS,
+            self.LOCATION_COLUMNS,
+            location_lines
+        )
+        self.copy(
+            cursor,
+            self.STAGING_MEASUREMENTS,
+            self.MEASUREMENT_COLUMNS,
+            measurement_lines
+        )
+
+    def merge(self, cursor):
+        """
+        Merges staging tables into the Air Quality tables.
+
+        Parameters
+        ----------
+        cursor : django.db.backends.utils.CursorWrapper
+            Cursor of the import transaction.
+        """
+        tables = {
+            'staging_locations': self.STAGING_LOCATIONS,
+            'staging_measurements': self.STAGING_MEASUREMENTS,
+            'location': AirQualityLocation._meta.db_table,
+            'measurement': AirQualityMeasurement._meta.db_table,
+            'archive': AirQualityMeasurementArchive._meta.db_table
+        }
+
+        cursor.execute('ANALYZE {staging_locations}'.format(**tables))
+        cursor.execute('ANALYZE {staging_measurements}'.format(**tables))
+
+        # Reuse locations already in the database
+        cursor.execute(
+            'UPDATE {staging_locations} AS s '
+            'SET id = l.id, is_new = false '
+            'FROM {location} AS l '
+            'WHERE l.creator_id = s.creator_id AND l.name = s.name '
+            'AND ST_X(l.geometry::geometry) = s.x '
+            'AND ST_Y(l.geometry::geometry) = s.y'.format(**tables)
+        )
+
+        # IDs are taken first, so that measurements can refer to them
+        cursor.execute(
+            "UPDATE {staging_locations} "
+            "SET id = nextval(pg_get_serial_sequence('{location}', 'id')) "
+            "WHERE id IS NULL".format(**tables)
+        )
+        cursor.execute(
+            'INSERT INTO {location} (id, name, geometry, creator_id, '
+            'created, properties, height, distance, characteristics) '
+            'SELECT id, name, '
+            'ST_SetSRID(ST_MakePoint(x, y), 4326)::geography, '
+            'creator_id, created, properties, height, distance, '
+            'characteristics '
+            'FROM {staging_locations} WHERE is_new'.format(**tables)
+        )
+        self.report['locations'] = cursor.rowcount
+
+        cursor.execute(
+            'SELECT count(*) FROM {staging_measurements}'.format(**tables)
+        )
+        staged = cursor.fetchone()[0]
+
+        # Only the first of rows repeated in the file is kept, measurements
+        # already in the database (also archived ones) are skipped
+        cursor.execute(
+            'INSERT INTO {measurement} (location_id, barcode, creator_id, '
+            'started, finished, properties, results, made_by_students) '
+            'SELECT DISTINCT ON (s.id, m.barcode, m.started) '
+            's.id, m.barcode, m.creator_id, m.started, m.finished, '
+            'm.properties, m.results, m.made_by_students '
+            'FROM {staging_measurements} AS m '
+            'JOIN {staging_locations} AS s ON s.key = m.location_key '
+            'WHERE NOT EXISTS ('
+            'SELECT 1 FROM {measurement} AS e '
+            'WHERE e.location_id = s.id AND e.barcode = m.barcode '
+            'AND e.started = m.started'
+            ') AND NOT EXISTS ('
+            'SELECT 1 FROM {archive} AS a '
+            'WHERE a.location_id = s.id AND a.barcode = m.barcode '
+            'AND a.started = m.started'
+            ') '
+            'ORDER BY s.id, m.barcode, m.started, m.position'.format(**tables)
+        )
+        self.report['measurements'] = cursor.rowcount
+        self.report['skipped'] = staged - cursor.rowcount
+
+    def run(self, input_file, file_format='csv', dry_run=False):
+        """
+        Runs the import.
+
+        Parameters
+        ----------
+        input_file : file
+            CSV or NDJSON file, opened in binary mode.
+        file_format : str
+            Either "csv" or "ndjson".
+        dry_run : Boolean
+            Indicates if all changes should be rolled back at the end.
+
+        Returns
+        -------
+        dict
+            Report of the import.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self.create_staging_tables(cursor)
+                batch = []
+
+                for line, row in self.read(input_file, file_format):
+                    batch.append((line, row))
+                    self.report['read'] += 1
+
+                    if len(batch) >= self.batch_size:
+                        self.load_batch(cursor, batch)
+                        batch = []
+
+                        if self.progress is not None:
+                            self.progress(self.report)
+
+                if batch:
+                    self.load_batch(cursor, batch)
+
+                    if self.progress is not None:
+                        self.progress(self.report)
+
+                self.merge(cursor)
+                self.drop_staging_tables(cursor)
+
+            if dry_run:
+                transaction.set_rollback(True)
+            else:
+                touch_locations(self.creators)
+
+        return self.report
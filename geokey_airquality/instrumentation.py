@@ -0,0 +1,428 @@
+"""Opt-in instrumentation of Air Quality endpoints."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import bisect
+import collections
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorWrapper
+from django.utils.deprecation import MiddlewareMixin
+
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216
+)
+
+METRICS = collections.OrderedDict([
+    ('request_duration_seconds', (
+        'Time spent handling the request.',
+        DURATION_BUCKETS
+    )),
+    ('sql_queries', (
+        'Number of SQL queries run while handling the request.',
+        QUERIES_BUCKETS
+    )),
+    ('sql_duration_seconds', (
+        'Time spent on SQL queries while handling the request.',
+        DURATION_BUCKETS
+    )),
+    ('serialization_duration_seconds', (
+        'Time spent rendering the response.',
+        DURATION_BUCKETS
+    )),
+    ('response_size_bytes', (
+        'Size of the response body.',
+        SIZE_BUCKETS
+    )),
+])
+
+
+class Histogram(object):
+    """
+    A histogram with fixed upper bounds of buckets.
+
+    Parameters
+    ----------
+    buckets : tuple
+        Sorted upper bounds of the buckets, the last one is open.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Adds a value to the histogram.
+
+        Parameters
+        ----------
+        value : float
+            Observed value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative(self):
+        """
+        Gets cumulative counts of values by the upper bounds of buckets.
+
+        Returns
+        -------
+        list
+            Tuples of upper bound and count, the last bound is `+Inf`.
+        """
+        cumulative = []
+        total = 0
+
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative.append((bound, total))
+
+        return cumulative
+
+
+class Registry(object):
+    """
+    An in-process registry of histograms, stored by the metric name and
+    labels. Each process (i.e. web server worker) has its own registry.
+
+    Parameters
+    ----------
+    metrics : collections.OrderedDict
+        Description and buckets stored by the metric name.
+    prefix : str
+        Prefix of metric names when rendered.
+    """
+
+    def __init__(self, metrics=METRICS, prefix='airquality_'):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        """
+        Adds a value to the histogram of the metric and labels.
+
+        Parameters
+        ----------
+        name : str
+            Name of the metric.
+        value : float
+            Observed value.
+        """
+        key = (name, tuple(sorted(labels.items())))
+
+        with self.lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = Histogram(self.metrics[name][1])
+                self.histograms[key] = histogram
+
+            histogram.observe(value)
+
+    def reset(self):
+        """Removes all histograms."""
+        with self.lock:
+            self.histograms = {}
+
+    def render(self):
+        """
+        Renders all histograms in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            Metrics in the Prometheus text format (version 0.0.4).
+        """
+        lines = []
+
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+
+            for name, (description, buckets) in self.metrics.items():
+                metric = self.prefix + name
+                lines.append('# HELP %s %s' % (metric, description))
+                lines.append('# TYPE %s histogram' % metric)
+
+                for (key, labels), histogram in histograms:
+                    if key != name:
+                        continue
+
+                    for bound, count in histogram.get_cumulative():
+                        if bound != '+Inf':
+                            bound = repr(float(bound))
+
+                        lines.append('%s_bucket{%s} %s' % (
+                            metric,
+                            format_labels(labels + (('le', bound),)),
+                            count
+                        ))
+
+                    lines.append('%s_sum{%s} %s' % (
+                        metric,
+                        format_labels(labels),
+                        repr(float(histogram.sum))
+                    ))
+                    lines.append('%s_count{%s} %s' % (
+                        metric,
+                        format_labels(labels),
+                        histogram.count
+                    ))
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    """
+    Formats labels of a metric.
+
+    Parameters
+    ----------
+    labels : tuple
+        Tuples of label name and value.
+
+    Returns
+    -------
+    str
+        Labels in the Prometheus text format, without braces.
+    """
+    return ','.join(
+        '%s="%s"' % (
+            name,
+            ('%s' % value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for name, value in labels
+    )
+
+
+registry = Registry()
+
+
+class QueryRecorder(object):
+    """
+    Counts and times SQL queries run through cursors of the connection while
+    installed. Unlike the log of queries, it is never truncated and does not
+    require the debug cursor.
+
+    Parameters
+    ----------
+    db : django.db.backends.base.base.BaseDatabaseWrapper
+        Connection of the current thread.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.count = 0
+        self.duration = 0.0
+        self.originals = None
+
+    def install(self):
+        """Start recording queries of cursors made from now on."""
+        self.originals = {}
+
+        for name in ['make_cursor', 'make_debug_cursor']:
+            # Set on the instance only when already wrapped
+            self.originals[name] = vars(self.db).get(name)
+            self.wrap(name, getattr(self.db, name))
+
+    def wrap(self, name, make):
+        """Wrap cursors made by the method of the connection."""
+        setattr(self.db, name, lambda cursor: RecordingCursorWrapper(
+            make(cursor),
+            self.db,
+            self
+        ))
+
+    def uninstall(self):
+        """Stop recording queries."""
+        if self.originals is None:
+            return
+
+        for name, original in self.originals.items():
+            if original is None:
+                delattr(self.db, name)
+            else:
+                setattr(self.db, name, original)
+
+        self.originals = None
+
+    def record(self, started):
+        """
+        Adds a query to the counts.
+
+        Parameters
+        ----------
+        started : float
+            Time the query started.
+        """
+        if self.originals is not None:
+            self.count += 1
+            self.duration += time.time() - started
+
+
+class RecordingCursorWrapper(CursorWrapper):
+    """A cursor adding queries run through it to the recorder."""
+
+    def __init__(self, cursor, db, recorder):
+        super(RecordingCursorWrapper, self).__init__(cursor, db)
+        self.recorder = recorder
+
+    def execute(self, sql, params=None):
+        """Run the query, recording it."""
+        started = time.time()
+
+        try:
+            return super(RecordingCursorWrapper, self).execute(sql, params)
+        finally:
+            self.recorder.record(started)
+
+    def executemany(self, sql, param_list):
+        """Run the query for all parameters, recording it once."""
+        started = time.time()
+
+        try:
+            return super(RecordingCursorWrapper, self).executemany(
+                sql,
+                param_list
+            )
+        finally:
+            self.recorder.record(started)
+
+
+class StreamObserver(object):
+    """
+    Observes a streamed response once it is closed (after its content was
+    sent), counting its size and queries run while it was streamed.
+    """
+
+    def __init__(self, middleware, request, response):
+        self.middleware = middleware
+        self.request = request
+        self.size = 0
+        response.streaming_content = self.count(response.streaming_content)
+
+    def count(self, content):
+        """Count the size of the streamed content."""
+        for chunk in content:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        """Add all values of the request to the registry."""
+        self.middleware.observe(self.request, self.size)
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    A middleware recording latency, SQL queries, serialization time and
+    response size of all Air Quality views. It is opt-in, add it to the
+    middleware setting to start collecting.
+    """
+
+    namespace = 'geokey_airquality'
+
+    def process_request(self, request):
+        """Store the time the request started."""
+        request._airquality_started = time.time()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Start recording SQL queries when the view is an Air Quality one."""
+        match = request.resolver_match
+
+        if match is None or self.namespace not in match.namespaces:
+            return None
+
+        recorder = QueryRecorder(connections[DEFAULT_DB_ALIAS])
+        recorder.install()
+
+        request._airquality_instrumentation = {
+            'view': match.url_name,
+            'started': getattr(request, '_airquality_started', time.time()),
+            'queries': recorder
+        }
+
+        return None
+
+    def process_template_response(self, request, response):
+        """Time rendering of the response, e.g. by the DRF renderers."""
+        state = getattr(request, '_airquality_instrumentation', None)
+
+        if state is not None:
+            state['rendering'] = time.time()
+            response.add_post_render_callback(
+                lambda response: state.update(rendered=time.time())
+            )
+
+        return response
+
+    def process_response(self, request, response):
+        """
+        Add all values of the request to the registry. Streamed responses are
+        observed once they are closed, so that queries run while streaming
+        them are included.
+        """
+        state = getattr(request, '_airquality_instrumentation', None)
+
+        if state is None:
+            return response
+
+        if response.streaming:
+            response._closable_objects.append(
+                StreamObserver(self, request, response)
+            )
+        else:
+            self.observe(request, len(response.content))
+
+        return response
+
+    def observe(self, request, size):
+        """
+        Adds all values of the request to the registry, and stops recording
+        its queries.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            Represents the request.
+        size : int
+            Size of the response body.
+        """
+        state = request._airquality_instrumentation
+        recorder = state['queries']
+        recorder.uninstall()
+        labels = {'view': state['view'], 'method': request.method}
+
+        registry.observe(
+            'request_duration_seconds',
+            time.time() - state['started'],
+            **labels
+        )
+        registry.observe('sql_queries', recorder.count, **labels)
+        registry.observe(
+            'sql_duration_seconds',
+            recorder.duration,
+            **labels
+        )
+
+        if 'rendered' in state:
+            registry.observe(
+                'serialization_duration_seconds',
+                state['rendered'] - state['rendering'],
+                **labels
+            )
+
+        registry.observe('response_size_bytes', size, **labels)
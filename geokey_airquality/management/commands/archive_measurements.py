@@ -0,0 +1,176 @@
+"""`archive_measurements` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from datetime import date
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.changes import touch_locations
+from geokey_airquality.models import (
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+)
+
+
+COLUMNS = [
+    'id',
+    'location_id',
+    'barcode',
+    'creator_id',
+    'started',
+    'finished',
+    'properties',
+    'results',
+    'made_by_students'
+]
+
+
+def add_months(period, months):
+    """
+    Add months to the first day of a month.
+
+    Parameters
+    ----------
+    period : datetime.date
+        First day of a month.
+    months : int
+        Number of months, can be negative.
+
+    Returns
+    -------
+    datetime.date
+        First day of the resulting month.
+    """
+    month = period.year * 12 + period.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    """
+    A command to move measurements of closed periods to the archive table.
+
+    Measurements are grouped by the month they were started in. Each month
+    older than the given number of months is moved in its own transaction.
+    Only finished measurements with results are archived: unfinished ones are
+    still read from the main table by the app and by `check_measurements`,
+    ones without results by the import of lab results.
+
+    All months share a single archive table (the `period` column keeps the
+    month) instead of a table partition per month. Declarative partitioning
+    needs PostgreSQL 10 or later and is not supported by Django 1.11, while
+    one table keeps the UNION of `TieredMeasurementManager` and the exports
+    to a single extra query.
+    """
+
+    help = 'Moves measurements of closed months to the archive table.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=12,
+            help='Number of recent months to keep in the main table'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the number of measurements to be archived'
+        )
+
+    def archive_period(self, period):
+        """
+        Move all finished measurements with results started within the month
+        to the archive table.
+
+        Parameters
+        ----------
+        period : datetime.date
+            First day of the month.
+
+        Returns
+        -------
+        int
+            Number of archived measurements.
+        """
+        columns = ', '.join(COLUMNS)
+        sql = (
+            'WITH moved AS ('
+            'DELETE FROM {main} WHERE started >= %s AND started < %s '
+            'AND finished IS NOT NULL AND results IS NOT NULL '
+            'RETURNING {columns}'
+            ') '
+            'INSERT INTO {archive} ({columns}, period) '
+            'SELECT {columns}, %s FROM moved'
+        ).format(
+            main=AirQualityMeasurement._meta.db_table,
+            archive=AirQualityMeasurementArchive._meta.db_table,
+            columns=columns
+        )
+
+        start = self.get_datetime(period)
+        end = self.get_datetime(add_months(period, 1))
+
+        with transaction.atomic():
+            # Archived measurements are no longer listed with locations
+            touch_locations(AirQualityMeasurement.objects.filter(
+                started__gte=start,
+                started__lt=end,
+                finished__isnull=False,
+                results__isnull=False
+            ).values_list('creator_id', flat=True).distinct())
+
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [start, end, period])
+                return cursor.rowcount
+
+    def get_datetime(self, period):
+        """Return the start of the month in the current time zone."""
+        return timezone.make_aware(
+            timezone.datetime(period.year, period.month, 1)
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['months'] < 1:
+            raise CommandError('At least one month must be kept.')
+
+        today = timezone.localtime(timezone.now()).date()
+        cutoff = add_months(today.replace(day=1), -options['months'])
+
+        oldest = AirQualityMeasurement.objects.filter(
+            started__lt=self.get_datetime(cutoff),
+            finished__isnull=False,
+            results__isnull=False
+        ).order_by('started').values_list('started', flat=True).first()
+
+        if oldest is None:
+            self.stdout.write('No measurements to archive.')
+            return
+
+        oldest = timezone.localtime(oldest).date()
+        period = oldest.replace(day=1)
+
+        while period < cutoff:
+            if options['dry_run']:
+                total = AirQualityMeasurement.objects.filter(
+                    started__gte=self.get_datetime(period),
+                    started__lt=self.get_datetime(add_months(period, 1)),
+                    finished__isnull=False,
+                    results__isnull=False
+                ).count()
+            else:
+                total = self.archive_period(period)
+
+            if total > 0:
+                self.stdout.write('%s: %s measurement%s' % (
+                    period.strftime('%Y-%m'),
+                    total,
+                    '' if total == 1 else 's'
+                ))
+
+            period = add_months(period, 1)
@@ -0,0 +1,132 @@
+"""`benchmark` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import json
+import platform
+
+import django
+
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.benchmarks import data, scenarios
+
+
+class Command(BaseCommand):
+    """
+    A command to time the main workloads (export, sheet, location listing,
+    measurement submit, checking measurements and the signals) against
+    seeded synthetic data. All changes are rolled back at the end and no
+    emails are sent. Results are written as JSON, so that runs can be
+    compared with each other.
+    """
+
+    help = 'Times the main Air Quality workloads against synthetic data.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--measurements', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Run only this scenario, can be repeated'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write results to this file instead of the standard output'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Compare results with a file written by a previous run'
+        )
+
+    def get_meta(self, options):
+        """Return information needed to compare runs with each other."""
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW server_version')
+            server_version = cursor.fetchone()[0]
+
+        return collections.OrderedDict([
+            ('created', timezone.now().isoformat()),
+            ('python', platform.python_version()),
+            ('django', django.get_version()),
+            ('database', server_version),
+            ('parameters', collections.OrderedDict(
+                (name, options[name])
+                for name in ['users', 'locations', 'measurements', 'repeat',
+                             'seed']
+            )),
+        ])
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['users'] < 2 or options['locations'] < 1:
+            raise CommandError('At least two users with a location needed.')
+
+        baseline = None
+
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)['scenarios']
+            except (IOError, ValueError, KeyError):
+                raise CommandError('Baseline cannot be read.')
+
+        email_backend = 'django.core.mail.backends.locmem.EmailBackend'
+
+        with override_settings(EMAIL_BACKEND=email_backend):
+            with transaction.atomic():
+                seeded = data.seed(
+                    users=options['users'],
+                    locations=options['locations'],
+                    measurements=options['measurements'],
+                    random_seed=options['seed']
+                )
+                superuser, user = seeded['users'][:2]
+                superuser.is_superuser = True
+                superuser.save()
+
+                aq_project = data.seed_project(superuser, [user])
+                available = scenarios.get_scenarios(
+                    superuser,
+                    user,
+                    aq_project
+                )
+
+                for name in options['scenarios'] or []:
+                    if name not in available:
+                        raise CommandError('Unknown scenario: %s.' % name)
+
+                results = scenarios.run(
+                    available,
+                    options['repeat'],
+                    options['scenarios']
+                )
+
+                transaction.set_rollback(True)
+
+        output = collections.OrderedDict([
+            ('meta', self.get_meta(options)),
+            ('scenarios', results),
+        ])
+
+        if baseline is not None:
+            output['changes'] = scenarios.compare(results, baseline)
+
+        output = json.dumps(output, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
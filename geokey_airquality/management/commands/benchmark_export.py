@@ -0,0 +1,57 @@
+"""`benchmark_export` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import json
+
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.benchmarks import data, exports
+
+
+class Command(BaseCommand):
+    """
+    A command to compare exporting measurements through the ORM with the
+    PostgreSQL COPY fast path, against seeded synthetic data (1M measurements
+    by default). All changes are rolled back at the end.
+    """
+
+    help = 'Compares timings of exporting measurements.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--measurements', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['repeat'] < 1:
+            raise CommandError('At least one run needed.')
+
+        with transaction.atomic():
+            data.seed(
+                users=options['users'],
+                locations=options['locations'],
+                measurements=options['measurements'],
+                random_seed=options['seed']
+            )
+            results = exports.run(options['repeat'])
+
+            transaction.set_rollback(True)
+
+        output = collections.OrderedDict([
+            ('parameters', collections.OrderedDict(
+                (name, options[name])
+                for name in ['users', 'locations', 'measurements', 'repeat',
+                             'seed']
+            )),
+            ('results', results),
+        ])
+
+        self.stdout.write(json.dumps(output, indent=2))
@@ -0,0 +1,52 @@
+"""`benchmark_imports` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.benchmarks import imports
+
+
+class Command(BaseCommand):
+    """
+    A command to report the import time of the extension (its modules and
+    modules imported by them first) in fresh processes, as paid by every
+    worker when it starts. Fails when the time exceeds the budget.
+    """
+
+    help = 'Reports the import time of the extension and module costs.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--budget',
+            type=float,
+            help='Maximum import time of the extension in milliseconds.'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['repeat'] < 1:
+            raise CommandError('Number of runs must be at least 1.')
+
+        results = imports.run(
+            repeat=options['repeat'],
+            limit=options['limit']
+        )
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+        budget = options['budget']
+
+        if budget is not None and results['extension_ms'] > budget:
+            raise CommandError(
+                'Import time of %.1f ms exceeds the budget of %.1f ms.' % (
+                    results['extension_ms'],
+                    budget
+                )
+            )
@@ -0,0 +1,76 @@
+"""`benchmark_indexes` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.benchmarks import data, indexes
+
+
+class Command(BaseCommand):
+    """
+    A command to compare query plans and timings of the hot paths with and
+    without the extra indexes. Synthetic data is seeded and all changes are
+    rolled back at the end, tables are locked while the command runs. Both
+    passes start with the same (warmed up) caches.
+    """
+
+    help = 'Reports query plans and timings of the hot query paths.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--measurements', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print full query plans'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        for name in ['users', 'locations', 'measurements', 'repeat']:
+            if options[name] < 1:
+                raise CommandError('Number of %s must be at least 1.' % name)
+
+        with transaction.atomic():
+            seeded = data.seed(
+                users=options['users'],
+                locations=options['locations'],
+                measurements=options['measurements']
+            )
+
+            hot_paths = indexes.get_hot_paths(
+                seeded['users'][0],
+                seeded['locations'][0],
+                seeded['measurements'][0].barcode
+            )
+
+            # Indexes are dropped in a separate pass, restored afterwards
+            with transaction.atomic():
+                indexes.drop_indexes(indexes.get_extra_indexes())
+                before = indexes.run(hot_paths, options['repeat'])
+                transaction.set_rollback(True)
+
+            after = indexes.run(hot_paths, options['repeat'])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write('Seeded %s measurements' % len(
+            seeded['measurements']
+        ))
+
+        for name in after:
+            self.stdout.write('%-24s before %10.2f ms  after %10.2f ms' % (
+                name,
+                before[name]['time'],
+                after[name]['time']
+            ))
+
+            if options['plans']:
+                self.stdout.write('Before:\n%s' % before[name]['plan'])
+                self.stdout.write('After:\n%s\n' % after[name]['plan'])
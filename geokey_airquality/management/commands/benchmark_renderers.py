@@ -0,0 +1,39 @@
+"""`benchmark_renderers` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.benchmarks import renderers
+
+
+class Command(BaseCommand):
+    """
+    A command to compare rendering and parsing JSON of locations with the
+    default renderer and parser, and with the fast ones. Locations are built
+    in memory, the database is not used.
+    """
+
+    help = 'Compares timings of rendering and parsing JSON.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--size', type=int, default=10000)
+        parser.add_argument('--measurements', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['repeat'] < 1:
+            raise CommandError('Number of runs must be at least 1.')
+
+        results = renderers.run(
+            size=options['size'],
+            measurements=options['measurements'],
+            repeat=options['repeat']
+        )
+
+        self.stdout.write(json.dumps(results, indent=2))
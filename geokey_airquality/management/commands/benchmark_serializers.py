@@ -0,0 +1,36 @@
+"""`benchmark_serializers` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from geokey_airquality.benchmarks import serializers
+
+
+class Command(BaseCommand):
+    """
+    A command to compare serializing locations through GEOS GeoJSON output
+    with building point geometries from their coordinates. Locations are
+    built in memory, the database is not used.
+    """
+
+    help = 'Reports timings of serializing locations.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('--size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--precision', type=int, default=6)
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        results = serializers.run(
+            size=options['size'],
+            repeat=options['repeat'],
+            precision=options['precision']
+        )
+
+        self.stdout.write(json.dumps(results, indent=2))
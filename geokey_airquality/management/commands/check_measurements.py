@@ -4,6 +4,7 @@
 from __future__ import unicode_literals
 
 from datetime import datetime, timedelta
+from itertools import groupby
 from pytz import utc
 
 from django.conf import settings
@@ -12,8 +13,6 @@ from django.utils import timezone
 from django.core.management.base import BaseCommand
 from django.template.loader import get_template
 
-from geokey.users.models import User
-
 from geokey_airquality.models import AirQualityMeasurement
 
 
@@ -36,21 +35,27 @@ class Command(BaseCommand):
         ).replace(tzinfo=utc)
         some_time_ago = some_time_ago + timedelta(1)  # checking a day after
 
+        measurements = AirQualityMeasurement.objects.filter(
+            started__lt=some_time_ago,
+            started__gte=some_time_ago - timedelta(4),  # but only once
+            finished__isnull=True
+        ).exclude(
+            creator__display_name='AnonymousUser'
+        ).select_related('location', 'creator').order_by('creator_id', 'id')
+
         messages = []
-        for user in User.objects.exclude(display_name='AnonymousUser'):
-            measurements = AirQualityMeasurement.objects.filter(
-                creator=user,
-                started__lt=some_time_ago,
-                finished__isnull=True
-            ).select_related('location')
+        for user, measurements in groupby(
+                measurements, key=lambda measurement: measurement.creator):
+            measurements = list(measurements)
 
-            due_to_expire = measurements.filter(
-                started__gte=some_time_ago - timedelta(1)  # on that day
-            )
-            already_expired = measurements.filter(
-                started__lt=some_time_ago - timedelta(3),  # more than 30 days
-                started__gte=some_time_ago - timedelta(4)  # but only once
-            )
+            due_to_expire = [
+                measurement for measurement in measurements
+                if measurement.started >= some_time_ago - timedelta(1)
+            ]  # on that day
+            already_expired = [
+                measurement for measurement in measurements
+                if measurement.started < some_time_ago - timedelta(3)
+            ]  # more than 30 days
 
             if len(due_to_expire) > 0 or len(already_expired) > 0:
                 message = get_template(
@@ -0,0 +1,39 @@
+"""`dump_airquality` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.snapshots import dump_snapshot
+
+
+class Command(BaseCommand):
+    """A command to dump a snapshot of all Air Quality data."""
+
+    help = 'Dumps all Air Quality data to a compressed snapshot file.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('file', help='Snapshot file to write')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of rows in each chunk of the snapshot'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be at least 1.')
+
+        try:
+            with open(options['file'], 'wb') as snapshot_file:
+                report = dump_snapshot(snapshot_file, options['batch_size'])
+        except (IOError, ImproperlyConfigured) as error:
+            raise CommandError(str(error))
+
+        for label, count in report.items():
+            self.stdout.write('%s: %s' % (label, count))
@@ -0,0 +1,79 @@
+"""`export_measurements` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import multiprocessing
+import time
+
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.exports import export_measurements
+
+
+class Command(BaseCommand):
+    """
+    A command to export all measurements (including archived ones) to a CSV
+    file, formatting shards of measurements in parallel.
+    """
+
+    help = 'Exports all measurements to a CSV file, using several processes.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            'file',
+            help='CSV file to write (gzip-compressed when ending with .gz)'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help='Number of worker processes (number of CPUs by default)'
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            help='Number of shards (4 for each process by default)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            default=False,
+            help='Compress the file with gzip'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('Exports require PostgreSQL.')
+
+        if options['processes'] < 1:
+            raise CommandError('Number of processes must be at least 1.')
+
+        if options.get('shards') is not None and options['shards'] < 1:
+            raise CommandError('Number of shards must be at least 1.')
+
+        compress = options['gzip'] or options['file'].endswith('.gz')
+        start = time.time()
+
+        try:
+            with open(options['file'], 'wb') as out:
+                shards = export_measurements(
+                    out,
+                    options['processes'],
+                    options.get('shards'),
+                    compress
+                )
+                size = out.tell()
+        except IOError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            'Exported %s shards (%s bytes) in %.3f s' % (
+                shards,
+                size,
+                time.time() - start
+            )
+        )
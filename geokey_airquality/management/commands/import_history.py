@@ -0,0 +1,99 @@
+"""`import_history` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.imports import HistoryImport
+
+
+class Command(BaseCommand):
+    """A command to import historical locations and measurements."""
+
+    help = (
+        'Imports historical locations and measurements from a CSV or NDJSON '
+        'file.'
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument(
+            'file',
+            help='CSV or NDJSON file with locations and measurements'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Format of the file (detected by its extension when not set)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of rows validated and loaded at once'
+        )
+        parser.add_argument(
+            '--rejected',
+            help='NDJSON file to write rejected rows to'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            default=False,
+            help='Validate and merge rows, but roll all changes back'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be at least 1.')
+
+        file_format = options.get('format')
+
+        if file_format is None:
+            extension = os.path.splitext(options['file'])[1].lower()
+            file_format = 'ndjson' if extension in [
+                '.ndjson',
+                '.jsonl'
+            ] else 'csv'
+
+        history_import = HistoryImport(
+            options['batch_size'],
+            progress=self.write_progress
+        )
+
+        try:
+            with open(options['file'], 'rb') as input_file:
+                report = history_import.run(
+                    input_file,
+                    file_format,
+                    options['dry_run']
+                )
+        except (IOError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write('Locations: %s' % report['locations'])
+        self.stdout.write('Measurements: %s' % report['measurements'])
+        self.stdout.write('Skipped (already imported): %s' % report['skipped'])
+
+        if options['dry_run']:
+            self.stdout.write('Dry run, all changes were rolled back.')
+
+        if options.get('rejected'):
+            with open(options['rejected'], 'w') as rejected_file:
+                for row in report['rejected']:
+                    rejected_file.write(json.dumps(row) + '\n')
+        else:
+            for row in report['rejected']:
+                self.stdout.write('Line %s: %s' % (row['line'], row['error']))
+
+    def write_progress(self, report):
+        """Write the progress after each batch."""
+        self.stdout.write('Read %s rows (%s rejected)' % (
+            report['read'],
+            len(report['rejected'])
+        ))
@@ -0,0 +1,70 @@
+"""`import_results` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.models import AirQualityProject
+from geokey_airquality.imports import ResultsImport
+
+
+class Command(BaseCommand):
+    """A command to import lab results of measurements."""
+
+    help = 'Imports lab results of measurements from a CSV file.'
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('file', help='CSV file with barcodes and results')
+        parser.add_argument(
+            '--project',
+            type=int,
+            help='ID of the GeoKey project to submit finished measurements to'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows matched and updated at once'
+        )
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        aq_project = None
+
+        if options.get('project') is not None:
+            try:
+                aq_project = AirQualityProject.objects.select_related(
+                    'project'
+                ).get(
+                    status='active',
+                    project__pk=options['project'],
+                    project__status='active'
+                )
+            except AirQualityProject.DoesNotExist:
+                raise CommandError('Project not found.')
+
+        results_import = ResultsImport(aq_project, options['batch_size'])
+
+        try:
+            with open(options['file'], 'rb') as csv_file:
+                report = results_import.run(csv_file)
+        except (IOError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write('Updated: %s' % report['updated'])
+
+        if aq_project is not None:
+            self.stdout.write('Submitted: %s' % report['submitted'])
+
+            for barcode in report['not_submitted']:
+                self.stdout.write('Not submitted: %s' % barcode)
+
+        for row in report['unmatched']:
+            self.stdout.write(
+                'Line %s: barcode %s not found' % (row['line'], row['barcode'])
+            )
+
+        for row in report['ambiguous'] + report['invalid']:
+            self.stdout.write('Line %s: %s' % (row['line'], row['error']))
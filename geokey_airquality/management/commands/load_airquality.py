@@ -0,0 +1,38 @@
+"""`load_airquality` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from geokey_airquality.snapshots import SnapshotLoad
+
+
+class Command(BaseCommand):
+    """A command to load a snapshot of Air Quality data."""
+
+    help = (
+        'Loads Air Quality data from a snapshot file, adding it to the '
+        'existing data.'
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the command."""
+        parser.add_argument('file', help='Snapshot file to read')
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        try:
+            with open(options['file'], 'rb') as snapshot_file:
+                report = SnapshotLoad().run(snapshot_file)
+        except (IOError, ValueError, ImproperlyConfigured) as error:
+            raise CommandError(str(error))
+
+        for label, counts in report.items():
+            self.stdout.write('%s: %s loaded, %s existing, %s skipped' % (
+                label,
+                counts['loaded'],
+                counts['existing'],
+                counts['skipped']
+            ))
@@ -0,0 +1,27 @@
+"""`refresh_statistics` command."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from geokey_airquality.statistics import refresh_summary
+
+
+class Command(BaseCommand):
+    """
+    A command to recalculate the statistics shown on the index page. It is
+    meant to be run periodically, so that the page never waits for them.
+    """
+
+    help = 'Recalculates the Air Quality statistics.'
+
+    def handle(self, *args, **options):
+        """Execute the code when the command is run."""
+        summary = refresh_summary()
+
+        self.stdout.write('%s location(s), %s measurement(s), %s archived' % (
+            summary.total_locations,
+            summary.total_measurements,
+            summary.total_archived
+        ))
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 09:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geokey_airquality', '0002_auto_20160919_1226'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='airqualitymeasurement',
+            name='barcode',
+            field=models.CharField(db_index=True, max_length=25),
+        ),
+    ]
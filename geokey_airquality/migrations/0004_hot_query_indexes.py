@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 11:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geokey_airquality', '0003_measurement_barcode_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='airqualitycategory',
+            index=models.Index(fields=['project', 'type'], name='aq_category_project_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='airqualityfield',
+            index=models.Index(fields=['category', 'type'], name='aq_field_category_type_idx'),
+        ),
+        # Partial indexes are not supported by Django models yet
+        migrations.RunSQL(
+            'CREATE INDEX aq_measurement_open_idx '
+            'ON geokey_airquality_airqualitymeasurement (creator_id, started) '
+            'WHERE finished IS NULL;',
+            'DROP INDEX aq_measurement_open_idx;'
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX aq_measurement_finished_idx '
+            'ON geokey_airquality_airqualitymeasurement (creator_id, finished) '
+            'WHERE finished IS NOT NULL;',
+            'DROP INDEX aq_measurement_finished_idx;'
+        ),
+    ]
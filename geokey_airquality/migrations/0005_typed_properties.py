@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 13:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+# Same as `get_float` in models: numbers (also stored as strings) that can be
+# cast to a finite float, others (booleans, "NaN", "Infinity", values that
+# overflow) become NULL. Values that underflow become 0, as in Python.
+CREATE_FLOAT_FUNCTION = r"""
+CREATE FUNCTION airquality_float(value jsonb) RETURNS double precision AS $$
+DECLARE
+    text_value text := value #>> '{}';
+BEGIN
+    IF value IS NULL OR jsonb_typeof(value) NOT IN ('number', 'string')
+        OR text_value !~ '^\s*[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?\s*$' THEN
+        RETURN NULL;
+    END IF;
+    RETURN text_value::double precision;
+EXCEPTION WHEN numeric_value_out_of_range THEN
+    BEGIN
+        RETURN CASE WHEN abs(text_value::numeric) < 1 THEN 0 END;
+    EXCEPTION WHEN numeric_value_out_of_range THEN
+        RETURN CASE WHEN text_value ~ '[eE]-' THEN 0 END;
+    END;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+"""
+
+DROP_FLOAT_FUNCTION = 'DROP FUNCTION airquality_float(jsonb);'
+
+
+def get_float(key):
+    return "airquality_float(properties->'{key}')".format(key=key)
+
+
+# Same as `bool` in Python, NULL when not set
+MADE_BY_STUDENTS = (
+    "CASE jsonb_typeof(properties->'made_by_students') "
+    "WHEN 'boolean' THEN (properties->>'made_by_students')::boolean "
+    "WHEN 'string' THEN properties->>'made_by_students' <> '' "
+    "WHEN 'number' THEN (properties->>'made_by_students')::numeric <> 0 "
+    "WHEN 'array' THEN jsonb_array_length("
+    "properties->'made_by_students') > 0 "
+    "WHEN 'object' THEN properties->'made_by_students' <> '{}'::jsonb "
+    "END"
+)
+
+COPY_LOCATION_PROPERTIES = (
+    'UPDATE geokey_airquality_airqualitylocation SET '
+    'height = %s, '
+    'distance = %s, '
+    "characteristics = properties->>'characteristics' "
+    'WHERE properties IS NOT NULL;'
+) % (get_float('height'), get_float('distance'))
+
+COPY_MEASUREMENT_PROPERTIES = (
+    'UPDATE geokey_airquality_airqualitymeasurement SET '
+    'results = %s, '
+    'made_by_students = %s '
+    'WHERE properties IS NOT NULL;'
+) % (get_float('results'), MADE_BY_STUDENTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geokey_airquality', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airqualitylocation',
+            name='characteristics',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airqualitylocation',
+            name='distance',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airqualitylocation',
+            name='height',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='airqualitymeasurement',
+            name='made_by_students',
+            field=models.NullBooleanField(),
+        ),
+        migrations.AddField(
+            model_name='airqualitymeasurement',
+            name='results',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        # Set-based, so that large tables are copied in one statement each
+        migrations.RunSQL(
+            CREATE_FLOAT_FUNCTION,
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            COPY_LOCATION_PROPERTIES,
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            COPY_MEASUREMENT_PROPERTIES,
+            migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            DROP_FLOAT_FUNCTION,
+            migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 14:22
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+try:
+    from django.contrib.postgres.fields import JSONField
+except ImportError:
+    from django_pgjson.fields import JsonBField as JSONField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('geokey_airquality', '0005_typed_properties'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AirQualityMeasurementArchive',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('barcode', models.CharField(max_length=25)),
+                ('started', models.DateTimeField()),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('properties', JSONField(default={})),
+                ('results', models.FloatField(blank=True, null=True)),
+                ('made_by_students', models.NullBooleanField()),
+                ('period', models.DateField(db_index=True)),
+                ('creator', models.ForeignKey(to=settings.AUTH_USER_MODEL)),
+                ('location', models.ForeignKey(related_name='archived_measurements', to='geokey_airquality.AirQualityLocation')),
+            ],
+        ),
+    ]
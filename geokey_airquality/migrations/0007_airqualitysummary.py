@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 15:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+try:
+    from django.contrib.postgres.fields import JSONField
+except ImportError:
+    from django_pgjson.fields import JsonBField as JSONField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geokey_airquality', '0006_airqualitymeasurementarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AirQualitySummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated', models.DateTimeField()),
+                ('total_locations', models.IntegerField(default=0)),
+                ('total_measurements', models.IntegerField(default=0)),
+                ('total_archived', models.IntegerField(default=0)),
+                ('projects', JSONField(default={})),
+                ('bands', JSONField(default={})),
+                ('months', JSONField(default={})),
+            ],
+        ),
+    ]
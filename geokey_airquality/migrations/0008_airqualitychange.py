@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 16:05
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('geokey_airquality', '0007_airqualitysummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AirQualityChange',
+            fields=[
+                ('user', models.OneToOneField(primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('changed', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-19 21:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def create_summary(apps, schema_editor):
+    AirQualitySummary = apps.get_model(
+        'geokey_airquality',
+        'AirQualitySummary'
+    )
+
+    # The only row, so that requests never have to create it
+    AirQualitySummary.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geokey_airquality', '0008_airqualitychange'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='airqualitysummary',
+            name='updated',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(create_summary, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,12 @@
 """All models for the extension."""
 
+import math
+
 from django.conf import settings
 from django.core import mail
-from django.dispatch import receiver
 from django.db import models
 from django.template.loader import get_template
+from django.utils import six
 from django.contrib.gis.db import models as gis
 
 try:
@@ -15,8 +17,39 @@ except ImportError:
 from model_utils import Choices
 from model_utils.models import StatusModel, TimeStampedModel
 
-from geokey.projects.models import Project
-from geokey.categories.models import Category, TextField
+from geokey_airquality.structure import invalidate_structures
+
+
+# Lower (inclusive) and upper (exclusive) limits of category types
+RESULTS_BANDS = {
+    '1': (None, 40),
+    '2': (40, 60),
+    '3': (60, 80),
+    '4': (80, 100),
+    '5': (100, None)
+}
+
+
+def get_float(value):
+    """
+    Convert value to float, or return None when it is not a number.
+
+    Booleans, "NaN" and infinities (also values that overflow) are not
+    numbers, the same rules are used by the `0005_typed_properties`
+    migration.
+    """
+    if isinstance(value, bool):
+        return None
+
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    if math.isnan(value) or math.isinf(value):
+        return None
+
+    return value
 
 
 def email_user(template, subject, receiver, action,
@@ -45,6 +78,14 @@ def email_user(template, subject, receiver, action,
     connection.close()
 
 
+def post_change_structure(sender, instance, **kwargs):
+    """
+    Receiver that is called after a project, category, field or lookup value
+    is saved or deleted. Invalidates cached structures of projects.
+    """
+    invalidate_structures()
+
+
 class AirQualityProject(StatusModel, TimeStampedModel):
     """Store a single Air Quality project."""
 
@@ -57,7 +98,6 @@ class AirQualityProject(StatusModel, TimeStampedModel):
     )
 
 
-@receiver(models.signals.post_save, sender=Project)
 def post_save_project(sender, instance, **kwargs):
     """
     Receiver that is called after a project is saved. Removes it from Air
@@ -85,7 +125,6 @@ def post_save_project(sender, instance, **kwargs):
             pass
 
 
-@receiver(models.signals.pre_delete, sender=Project)
 def pre_delete_project(sender, instance, **kwargs):
     """
     Receiver that is called after a project is deleted. Removes it from Air
@@ -131,8 +170,15 @@ class AirQualityCategory(models.Model):
         related_name='categories'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['project', 'type'],
+                name='aq_category_project_type_idx'
+            ),
+        ]
+
 
-@receiver(models.signals.post_save, sender=Category)
 def post_save_category(sender, instance, **kwargs):
     """
     Receiver that is called after a category is saved. Makes associated Air
@@ -160,7 +206,6 @@ def post_save_category(sender, instance, **kwargs):
             pass
 
 
-@receiver(models.signals.pre_delete, sender=Category)
 def pre_delete_category(sender, instance, **kwargs):
     """
     Receiver that is called after a category is deleted. Makes associated Air
@@ -215,8 +260,15 @@ class AirQualityField(models.Model):
         related_name='fields'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['category', 'type'],
+                name='aq_field_category_type_idx'
+            ),
+        ]
+
 
-@receiver(models.signals.post_save, sender=TextField)
 def post_save_field(sender, instance, **kwargs):
     """
     Receiver that is called after a text field is saved. Makes associated Air
@@ -245,7 +297,6 @@ def post_save_field(sender, instance, **kwargs):
             pass
 
 
-@receiver(models.signals.pre_delete, sender=TextField)
 def pre_delete_field(sender, instance, **kwargs):
     """
     Receiver that is called after a text field is deleted. Makes associated Air
@@ -283,6 +334,111 @@ class AirQualityLocation(models.Model):
     created = models.DateTimeField(auto_now_add=False)
     properties = JSONField(default={})
 
+    # Copies of properties, so they can be filtered in the database
+    height = models.FloatField(blank=True, null=True)
+    distance = models.FloatField(blank=True, null=True)
+    characteristics = models.TextField(blank=True, null=True)
+
+    def save(self, *args, **kwargs):
+        """Save the location, copying properties to their own columns."""
+        properties = self.properties or {}
+        characteristics = properties.get('characteristics')
+
+        self.height = get_float(properties.get('height'))
+        self.distance = get_float(properties.get('distance'))
+        self.characteristics = (
+            None if characteristics is None else six.text_type(characteristics)
+        )
+
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and 'properties' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set([
+                'height',
+                'distance',
+                'characteristics'
+            ])
+
+        super(AirQualityLocation, self).save(*args, **kwargs)
+
+
+class AirQualityMeasurementQuerySet(models.QuerySet):
+    """Queryset of Air Quality measurements."""
+
+    def in_band(self, type):
+        """
+        Filter measurements with results within the band of category type.
+
+        Parameters
+        ----------
+        type : str
+            Key of the Air Quality category type (e.g. "2" for "40-60").
+
+        Returns
+        -------
+        geokey_airquality.models.AirQualityMeasurementQuerySet
+            Measurements with results within the band.
+        """
+        lower, upper = RESULTS_BANDS[type]
+        queryset = self.filter(results__isnull=False)
+
+        if lower is not None:
+            queryset = queryset.filter(results__gte=lower)
+
+        if upper is not None:
+            queryset = queryset.filter(results__lt=upper)
+
+        return queryset
+
+    def made_by_students(self, made_by_students=True):
+        """
+        Filter measurements by whether diffusion tube was made by students.
+
+        Parameters
+        ----------
+        made_by_students : Boolean
+            Indicates if tube was made by students.
+
+        Returns
+        -------
+        geokey_airquality.models.AirQualityMeasurementQuerySet
+            Filtered measurements.
+        """
+        return self.filter(made_by_students=made_by_students)
+
+    def results_summary(self):
+        """
+        Aggregate results of measurements in the database.
+
+        Returns
+        -------
+        dict
+            Count, average, minimum and maximum of results, together with the
+            count of results within each band of category type.
+        """
+        aggregates = {
+            'total': models.Count('results'),
+            'average': models.Avg('results'),
+            'minimum': models.Min('results'),
+            'maximum': models.Max('results')
+        }
+
+        for type, (lower, upper) in RESULTS_BANDS.items():
+            conditions = {}
+
+            if lower is not None:
+                conditions['results__gte'] = lower
+
+            if upper is not None:
+                conditions['results__lt'] = upper
+
+            aggregates['band_%s' % type] = models.Count(models.Case(
+                models.When(then=1, **conditions),
+                output_field=models.IntegerField()
+            ))
+
+        return self.aggregate(**aggregates)
+
 
 class AirQualityMeasurement(models.Model):
     """Store a single Air Quality measurement."""
@@ -291,8 +447,141 @@ class AirQualityMeasurement(models.Model):
         'AirQualityLocation',
         related_name='measurements'
     )
-    barcode = models.CharField(max_length=25)
+    barcode = models.CharField(max_length=25, db_index=True)
     creator = models.ForeignKey(settings.AUTH_USER_MODEL)
     started = models.DateTimeField(auto_now_add=False)
     finished = models.DateTimeField(auto_now_add=False, blank=True, null=True)
     properties = JSONField(default={})
+
+    # Copies of properties, so they can be filtered in the database
+    results = models.FloatField(blank=True, null=True, db_index=True)
+    made_by_students = models.NullBooleanField()
+
+    objects = AirQualityMeasurementQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """Save the measurement, copying properties to their own columns."""
+        properties = self.properties or {}
+        made_by_students = properties.get('made_by_students')
+
+        self.results = get_float(properties.get('results'))
+        self.made_by_students = (
+            None if made_by_students is None else bool(made_by_students)
+        )
+
+        update_fields = kwargs.get('update_fields')
+
+        if update_fields is not None and 'properties' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set([
+                'results',
+                'made_by_students'
+            ])
+
+        super(AirQualityMeasurement, self).save(*args, **kwargs)
+
+
+class AirQualityMeasurementArchive(models.Model):
+    """
+    Store a single archived Air Quality measurement.
+
+    Fields follow the order of `AirQualityMeasurement`, so both tables can be
+    combined in a single query (see `TieredMeasurementManager`).
+    """
+
+    id = models.IntegerField(primary_key=True)
+    location = models.ForeignKey(
+        'AirQualityLocation',
+        related_name='archived_measurements'
+    )
+    barcode = models.CharField(max_length=25)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL)
+    started = models.DateTimeField()
+    finished = models.DateTimeField(blank=True, null=True)
+    properties = JSONField(default={})
+    results = models.FloatField(blank=True, null=True)
+    made_by_students = models.NullBooleanField()
+    period = models.DateField(db_index=True)
+
+
+class TieredMeasurementManager(object):
+    """
+    Query measurements across both the main and the archive table.
+
+    Querysets are combined with UNION, so only ordering, slicing and counting
+    is possible afterwards. Archived measurements are returned as instances of
+    `AirQualityMeasurement`, they should be treated as read-only. Only
+    finished measurements with results are archived, so readers of unfinished
+    ones or ones without results (the app API, `check_measurements`, the
+    import of lab results) use `AirQualityMeasurement.objects`.
+    """
+
+    def combine(self, method, *args, **kwargs):
+        """
+        Combine measurements from both tables.
+
+        Parameters
+        ----------
+        method : str
+            Name of the queryset method, e.g. "filter".
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            Combined measurements.
+        """
+        main = getattr(AirQualityMeasurement.objects, method)(*args, **kwargs)
+        archive = getattr(
+            AirQualityMeasurementArchive.objects,
+            method
+        )(*args, **kwargs).defer('period')
+
+        return main.union(archive, all=True)
+
+    def all(self):
+        """Return all measurements."""
+        return self.combine('all')
+
+    def filter(self, *args, **kwargs):
+        """Return measurements matching the lookup parameters."""
+        return self.combine('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        """Return measurements not matching the lookup parameters."""
+        return self.combine('exclude', *args, **kwargs)
+
+
+AirQualityMeasurement.tiers = TieredMeasurementManager()
+
+
+class AirQualitySummary(models.Model):
+    """Store summary statistics of Air Quality, refreshed periodically."""
+
+    updated = models.DateTimeField(blank=True, null=True)
+    total_locations = models.IntegerField(default=0)
+    total_measurements = models.IntegerField(default=0)
+    total_archived = models.IntegerField(default=0)
+    projects = JSONField(default={})
+    bands = JSONField(default={})
+    months = JSONField(default={})
+
+    def get_bands(self):
+        """Return results of measurements counted by category type."""
+        return [
+            (label, self.bands.get(key, 0))
+            for key, label in AirQualityCategory.TYPES
+        ]
+
+    def get_months(self):
+        """Return measurements counted by month, the latest year only."""
+        return sorted(self.months.items(), reverse=True)[:12]
+
+
+class AirQualityChange(models.Model):
+    """Store when Air Quality locations of a user were changed last time."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        related_name='+'
+    )
+    changed = models.DateTimeField()
@@ -0,0 +1,150 @@
+"""All parsers for the extension."""
+
+import json
+
+from django.conf import settings
+from django.utils import six
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.settings import api_settings
+
+from geokey_airquality.renderers import (
+    JSON_LIBRARY,
+    FastJSONRenderer,
+    msgpack,
+    simplejson
+)
+
+
+def reject_constant(value):
+    """
+    Rejects constants that are not valid JSON (NaN and infinities), as
+    simplejson accepts them by default.
+
+    Raises
+    ------
+    ValueError
+        Always.
+    """
+    raise ValueError('Out of range float values are not JSON compliant')
+
+
+def loads_json(content):
+    """
+    Decodes UTF-8 JSON with simplejson, strictly.
+
+    Parameters
+    ----------
+    content : bytes
+        Encoded data.
+
+    Returns
+    -------
+    object
+        Decoded data.
+
+    Raises
+    ------
+    ValueError
+        If the content is not valid JSON.
+    """
+
+    return simplejson.loads(
+        content.decode('utf-8'),
+        parse_constant=reject_constant
+    )
+
+
+class FastJSONParser(JSONParser):
+    """
+    Parses JSON request bodies with a C-accelerated library (simplejson)
+    when installed, otherwise the same way as the default JSON parser. NaN
+    and infinities are rejected either way.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as JSON.
+
+        Returns
+        -------
+        object
+            Decoded data.
+
+        Raises
+        ------
+        ParseError
+            If the data cannot be decoded.
+        """
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            content = stream.read()
+
+            if (JSON_LIBRARY is None or
+                    encoding.lower() not in ['utf-8', 'utf8']):
+                return json.loads(
+                    content.decode(encoding),
+                    parse_constant=reject_constant
+                )
+
+            return loads_json(content)
+        except ValueError, error:
+            raise ParseError('JSON parse error - %s' % six.text_type(error))
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies. Datetimes can be sent as seconds since
+    the epoch.
+    """
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parses the incoming bytestream as MessagePack.
+
+        Returns
+        -------
+        object
+            Unpacked data.
+
+        Raises
+        ------
+        ParseError
+            If the data cannot be unpacked.
+        """
+
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.exceptions.UnpackException), error:
+            raise ParseError('MessagePack parse error - %s' % error)
+
+
+def get_parser_classes():
+    """
+    Gets parsers of the public API: the default ones (with the fast JSON
+    parser instead of the JSON one), with MessagePack added when the
+    optional `msgpack` package is installed.
+
+    Returns
+    -------
+    list
+        Parser classes.
+    """
+
+    parser_classes = [
+        FastJSONParser if parser_class is JSONParser else parser_class
+        for parser_class in api_settings.DEFAULT_PARSER_CLASSES
+    ]
+
+    if msgpack is not None:
+        parser_classes.append(MessagePackParser)
+
+    return parser_classes
@@ -0,0 +1,198 @@
+"""All renderers for the extension."""
+
+import calendar
+import datetime
+import decimal
+
+from django.utils import six
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import simplejson
+
+    # Without its C extension, it is slower than the standard library
+    if simplejson.encoder.c_make_encoder is None:
+        simplejson = None
+except ImportError:
+    simplejson = None
+
+
+# Fastest JSON library installed, None when only the standard one is
+JSON_LIBRARY = 'simplejson' if simplejson is not None else None
+
+
+def encode_value(value):
+    """
+    Encodes values MessagePack does not support natively. Datetimes become
+    integer seconds since the epoch.
+
+    Parameters
+    ----------
+    value : object
+        Value to be encoded.
+
+    Returns
+    -------
+    object
+        Value MessagePack can pack.
+
+    Raises
+    ------
+    TypeError
+        If the value cannot be encoded.
+    """
+
+    if isinstance(value, datetime.datetime):
+        return calendar.timegm(value.utctimetuple())
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+
+    raise TypeError('%r cannot be packed.' % value)
+
+
+def dumps_json(data):
+    """
+    Encodes data as compact UTF-8 JSON with simplejson. Types the library
+    does not support (datetimes, `Decimal` and others) are encoded by the
+    JSON encoder of the API, so that the output is the same as of the
+    default renderer.
+
+    Parameters
+    ----------
+    data : object
+        Data to be encoded.
+
+    Returns
+    -------
+    bytes
+        Encoded data.
+    """
+
+    content = simplejson.dumps(
+        data,
+        default=JSONEncoder().default,
+        ensure_ascii=False,
+        separators=(',', ':'),
+        use_decimal=False
+    )
+
+    if isinstance(content, six.text_type):
+        content = content.encode('utf-8')
+
+    # Escaped the same way as by the default renderer (JavaScript subset)
+    return content.replace(
+        b'\xe2\x80\xa8', b'\\u2028'
+    ).replace(
+        b'\xe2\x80\xa9', b'\\u2029'
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders data as JSON with a C-accelerated library (simplejson) when
+    installed. Output is the same as of the default JSON renderer, which
+    is used when no such library is installed or when the JSON is indented
+    (e.g. for the browsable API).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Renders data into JSON.
+
+        Parameters
+        ----------
+        data : object
+            Data to be rendered.
+
+        Returns
+        -------
+        bytes
+            Rendered data, empty when there is no data.
+        """
+
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+
+        if (JSON_LIBRARY is None or indent is not None or
+                self.ensure_ascii or not self.compact):
+            return super(FastJSONRenderer, self).render(
+                data,
+                accepted_media_type,
+                renderer_context
+            )
+
+        return dumps_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders data as MessagePack, a compact binary alternative to JSON.
+    Datetimes are sent as integer seconds since the epoch.
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    epoch_datetimes = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Renders data into MessagePack bytes.
+
+        Parameters
+        ----------
+        data : object
+            Data to be rendered.
+
+        Returns
+        -------
+        bytes
+            Packed data, empty when there is no data.
+        """
+
+        if data is None:
+            return b''
+
+        # Native strings of Python 2 (keys and literals of serialisers) are
+        # text, so they must not be sent as binary
+        return msgpack.packb(
+            data,
+            use_bin_type=six.PY3,
+            default=encode_value
+        )
+
+
+def get_renderer_classes():
+    """
+    Gets renderers of the public API: the default ones (with the fast JSON
+    renderer instead of the JSON one), with MessagePack added when the
+    optional `msgpack` package is installed.
+
+    Returns
+    -------
+    list
+        Renderer classes.
+    """
+
+    renderer_classes = [
+        FastJSONRenderer if renderer_class is JSONRenderer else renderer_class
+        for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+
+    if msgpack is not None:
+        renderer_classes.append(MessagePackRenderer)
+
+    return renderer_classes
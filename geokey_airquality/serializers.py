@@ -1,6 +1,10 @@
 """All serializers for the extension."""
 
 import json
+import calendar
+import numbers
+
+from datetime import datetime
 
 from django.core.exceptions import ValidationError
 from django.contrib.gis.geos import Point
@@ -12,6 +16,55 @@ from rest_framework.serializers import BaseSerializer
 from geokey_airquality.models import AirQualityLocation, AirQualityMeasurement
 
 
+def format_datetime(value, epoch=False):
+    """
+    Formats the datetime for the representation.
+
+    Parameter
+    ---------
+    value : datetime.datetime
+        Datetime to be formatted, can be None.
+    epoch : Boolean
+        Indicates if seconds since the epoch should be returned, rather than
+        a string.
+
+    Returns
+    -------
+    str or int
+        Formatted datetime, None when not set.
+    """
+
+    if value is None:
+        return None
+
+    if epoch:
+        return calendar.timegm(value.utctimetuple())
+
+    return str(value)
+
+
+def to_datetime(value):
+    """
+    Converts the value sent by the app to a datetime. Strings are parsed,
+    numbers are taken as seconds since the epoch.
+
+    Parameter
+    ---------
+    value : str or int or float
+        Value to be converted.
+
+    Returns
+    -------
+    datetime.datetime
+        Converted datetime.
+    """
+
+    if isinstance(value, numbers.Number):
+        return datetime.fromtimestamp(value, timezone.utc)
+
+    return parse_datetime(value)
+
+
 class LocationSerializer(BaseSerializer):
     """
     Serialiser for geokey_airquality.models.AirQualityLocation.
@@ -114,7 +167,7 @@ class LocationSerializer(BaseSerializer):
         if created is None or called is None:
             created = now
         else:
-            timedelta = parse_datetime(called) - parse_datetime(created)
+            timedelta = to_datetime(called) - to_datetime(created)
             created = now - timedelta
 
         self.instance = AirQualityLocation.objects.create(
@@ -151,6 +204,35 @@ class LocationSerializer(BaseSerializer):
 
         return instance
 
+    def get_geometry(self, geometry):
+        """
+        Returns the GeoJSON geometry. Points are built straight from their
+        coordinates, rounded when `precision` is set in the context.
+
+        Parameter
+        ---------
+        geometry : django.contrib.gis.geos.GEOSGeometry
+            Geometry of the location.
+
+        Returns
+        -------
+        dict
+            GeoJSON geometry.
+        """
+
+        if geometry.geom_type != 'Point':
+            return json.loads(geometry.geojson)
+
+        coordinates = list(geometry.coords)
+        precision = self.context.get('precision')
+
+        if precision is not None:
+            coordinates = [
+                round(coordinate, precision) for coordinate in coordinates
+            ]
+
+        return {'type': 'Point', 'coordinates': coordinates}
+
     def to_representation(self, object):
         """
         Returns the native representation of a location.
@@ -174,10 +256,13 @@ class LocationSerializer(BaseSerializer):
 
         return {
             'type': 'Feature',
-            'geometry': json.loads(object.geometry.geojson),
+            'geometry': self.get_geometry(object.geometry),
             'id': object.id,
             'name': object.name,
-            'created': str(object.created),
+            'created': format_datetime(
+                object.created,
+                self.context.get('epoch')
+            ),
             'properties': object.properties,
             'measurements': measurement_serializer.data
         }
@@ -268,14 +353,14 @@ class MeasurementSerializer(BaseSerializer):
         if started is None or called is None:
             started = now
         else:
-            timedelta = parse_datetime(called) - parse_datetime(started)
+            timedelta = to_datetime(called) - to_datetime(started)
             started = now - timedelta
 
         if finished is not None:
             if called is None:
                 finished = now
             else:
-                timedelta = parse_datetime(called) - parse_datetime(finished)
+                timedelta = to_datetime(called) - to_datetime(finished)
                 finished = now - timedelta
 
         self.instance = AirQualityMeasurement.objects.create(
@@ -315,7 +400,7 @@ class MeasurementSerializer(BaseSerializer):
             if called is None:
                 finished = now
             else:
-                timedelta = parse_datetime(called) - parse_datetime(finished)
+                timedelta = to_datetime(called) - to_datetime(finished)
                 finished = now - timedelta
 
             instance.finished = finished
@@ -341,15 +426,12 @@ class MeasurementSerializer(BaseSerializer):
             Native represenation of the measurement.
         """
 
-        finished = object.finished or None
-
-        if finished is not None:
-            finished = str(finished)
+        epoch = self.context.get('epoch')
 
         return {
             'id': object.id,
             'barcode': object.barcode,
-            'started': str(object.started),
-            'finished': finished,
+            'started': format_datetime(object.started, epoch),
+            'finished': format_datetime(object.finished or None, epoch),
             'properties': object.properties
         }
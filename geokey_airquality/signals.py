@@ -0,0 +1,59 @@
+"""Signal receivers of the extension, connected when the app is ready."""
+
+from django.db.models import signals
+
+from geokey.projects.models import Project
+from geokey.categories.models import (
+    Category,
+    TextField,
+    LookupField,
+    LookupValue
+)
+
+from geokey_airquality.models import (
+    post_change_structure,
+    post_save_project,
+    pre_delete_project,
+    post_save_category,
+    pre_delete_category,
+    post_save_field,
+    pre_delete_field
+)
+
+
+def get_receivers():
+    """
+    Gets all receivers of the extension.
+
+    Returns
+    -------
+    list
+        Signal, sender and receiver of each connection.
+    """
+    receivers = [
+        (signal, sender, post_change_structure)
+        for sender in [Project, Category, TextField, LookupField, LookupValue]
+        for signal in [signals.post_save, signals.post_delete]
+    ]
+
+    return receivers + [
+        (signals.post_save, Project, post_save_project),
+        (signals.pre_delete, Project, pre_delete_project),
+        (signals.post_save, Category, post_save_category),
+        (signals.pre_delete, Category, pre_delete_category),
+        (signals.post_save, TextField, post_save_field),
+        (signals.pre_delete, TextField, pre_delete_field),
+    ]
+
+
+def connect_signals():
+    """
+    Connects all receivers of the extension. Each receiver is connected only
+    once, even when called again.
+    """
+    for signal, sender, receiver in get_receivers():
+        signal.connect(
+            receiver,
+            sender=sender,
+            dispatch_uid='geokey_airquality.%s' % receiver.__name__
+        )
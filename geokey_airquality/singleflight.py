@@ -0,0 +1,203 @@
+"""
+Coalescing of identical expensive requests: the first request for a key
+computes the result, while concurrent requests for the same key wait for it
+and share it.
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from geokey_airquality.changes import DEFAULT_CACHE, get_locations_cache
+
+
+LOCK_KEY = 'airquality:flight:lock:%s'
+RESULT_KEY = 'airquality:flight:result:%s'
+
+# Waiting processes check whether the result is ready this often (seconds)
+POLL_INTERVAL = 0.05
+
+# Results are only kept for processes already waiting for them (seconds)
+RESULT_TIMEOUT = 10
+
+# Flights in progress, shared by all threads of the process
+_flights = {}
+_lock = threading.Lock()
+
+
+def get_flight_timeout():
+    """
+    Gets the maximum time of waiting for a result computed by another
+    request.
+
+    Returns
+    -------
+    int
+        Seconds set by `AIRQUALITY_FLIGHT_TIMEOUT`, 60 when not set.
+    """
+    return getattr(settings, 'AIRQUALITY_FLIGHT_TIMEOUT', 60)
+
+
+class Flight(object):
+    """A computation in progress, shared by threads of the process."""
+
+    def __init__(self):
+        """Initiates a new flight."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def wait_for_result(cache, key, token, timeout):
+    """
+    Waits for the result computed by another process, until the lock held
+    by it is released (or expires).
+
+    Parameters
+    ----------
+    cache : django.core.cache.backends.base.BaseCache
+        Cache holding the lock and the result.
+    key : str
+        Identifies the computation.
+    token : str
+        Identifies the process holding the lock.
+    timeout : float
+        Maximum time of waiting in seconds.
+
+    Returns
+    -------
+    tuple
+        The result (as the only item), None when it was not stored.
+    """
+    deadline = time.time() + timeout
+
+    while True:
+        # Checked first, as the result is stored before it is released
+        released = cache.get(LOCK_KEY % key) != token
+        stored = cache.get(RESULT_KEY % key)
+
+        # Results of previous computations are ignored
+        if stored is not None and stored[0] == token:
+            return stored[1:]
+
+        if released or time.time() >= deadline:
+            return None
+
+        time.sleep(POLL_INTERVAL)
+
+
+def share_result(key, compute, timeout):
+    """
+    Computes the result once for all processes sharing the cache. A lock is
+    added to the cache by the first process, the others wait for the result
+    stored by it. When the result is not stored (the computation failed, the
+    lock expired or the result is too large for the cache), processes
+    compute it themselves. Processes only share results when
+    `AIRQUALITY_LOCATIONS_CACHE` is set to a cache shared by them, the
+    default cache is local to each process.
+
+    Parameters
+    ----------
+    key : str
+        Identifies the computation.
+    compute : callable
+        Function computing the result.
+    timeout : float
+        Maximum time of waiting (and of holding the lock) in seconds.
+
+    Returns
+    -------
+    object
+        Computed result.
+    """
+    cache = get_locations_cache()
+
+    if cache is None or cache is DEFAULT_CACHE:
+        return compute()
+
+    token = uuid.uuid4().hex
+
+    if not cache.add(LOCK_KEY % key, token, timeout):
+        holder = cache.get(LOCK_KEY % key)
+
+        if holder is not None:
+            stored = wait_for_result(cache, key, holder, timeout)
+            return compute() if stored is None else stored[0]
+
+        # Released in the meantime, so the lock is added once again
+        if not cache.add(LOCK_KEY % key, token, timeout):
+            return compute()
+
+    try:
+        result = compute()
+        cache.set(RESULT_KEY % key, (token, result), RESULT_TIMEOUT)
+        return result
+    finally:
+        if cache.get(LOCK_KEY % key) == token:
+            cache.delete(LOCK_KEY % key)
+
+
+def single_flight(key, compute, timeout=None):
+    """
+    Computes the result, unless the same computation is already in progress
+    (in another thread or, through the shared cache of responses, in another
+    process). Then the result of that computation is shared instead. Results
+    are not kept once shared, so requests made later compute them again.
+
+    Parameters
+    ----------
+    key : str
+        Identifies the computation, must be a valid cache key.
+    compute : callable
+        Function computing the result.
+    timeout : float
+        Maximum time of waiting in seconds, `AIRQUALITY_FLIGHT_TIMEOUT` when
+        None. Requests waiting longer compute the result themselves.
+
+    Returns
+    -------
+    object
+        Computed (or shared) result.
+
+    Raises
+    ------
+    Exception
+        Raised by the computation of the current process, also for threads
+        waiting for it.
+    """
+    if timeout is None:
+        timeout = get_flight_timeout()
+
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        if not flight.done.wait(timeout):
+            return compute()
+
+        if flight.error is not None:
+            raise flight.error
+
+        return flight.result
+
+    try:
+        flight.result = share_result(key, compute, timeout)
+    except Exception as error:
+        flight.error = error
+        raise
+    finally:
+        with _lock:
+            del _flights[key]
+
+        flight.done.set()
+
+    return flight.result
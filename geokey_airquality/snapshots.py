@@ -0,0 +1,603 @@
+"""
+Snapshots of all Air Quality data, used to copy it between databases without
+copying the whole GeoKey database.
+
+A snapshot is a gzip-compressed stream of MessagePack objects: a header,
+followed by chunks of rows stored column by column. GeoKey users, projects,
+categories and fields referenced by Air Quality are stored first (only what
+is needed to find them again), so that foreign keys can be remapped when the
+snapshot is loaded into another database.
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import binascii
+import collections
+import datetime
+import gzip
+import io
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, models, transaction
+from django.db.models.functions import Lower
+from django.utils import six
+
+from geokey.projects.models import Project
+from geokey.categories.models import Category, Field
+
+from geokey_airquality import __version__
+from geokey_airquality.changes import touch_locations
+from geokey_airquality.imports import get_copy_line
+from geokey_airquality.models import (
+    AirQualityProject,
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+)
+from geokey_airquality.structure import invalidate_structures
+
+
+FORMAT = 'geokey-airquality'
+VERSION = 2
+
+# Code of the MessagePack extension type storing geometries as EWKB
+GEOMETRY_TYPE = 1
+
+# Air Quality models, in the order they can be loaded
+MODELS = [
+    AirQualityProject,
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+]
+
+# Archived measurements keep IDs of measurements, so they take new ones from
+# the same sequence
+SEQUENCES = {AirQualityMeasurementArchive: AirQualityMeasurement}
+
+# Air Quality models added once for each GeoKey object, stored with the
+# column referencing it
+MAPPINGS = {
+    AirQualityProject: 'project_id',
+    AirQualityCategory: 'category_id',
+    AirQualityField: 'field_id'
+}
+
+
+def get_references():
+    """
+    Gets GeoKey models referenced by Air Quality, with columns used to find
+    their objects in another database and querysets of referenced objects.
+
+    Returns
+    -------
+    list
+        Tuples of model, columns and queryset, in the order they can be
+        loaded.
+    """
+    user_ids = models.Q()
+
+    for model in [
+        AirQualityProject,
+        AirQualityLocation,
+        AirQualityMeasurement,
+        AirQualityMeasurementArchive
+    ]:
+        user_ids |= models.Q(id__in=model.objects.values('creator_id'))
+
+    return [
+        (
+            get_user_model(),
+            ['id', 'email', 'display_name'],
+            get_user_model().objects.filter(user_ids)
+        ),
+        (
+            Project,
+            ['id', 'name'],
+            Project.objects.filter(
+                id__in=AirQualityProject.objects.values('project_id')
+            )
+        ),
+        (
+            Category,
+            ['id', 'project_id', 'name'],
+            Category.objects.filter(
+                id__in=AirQualityCategory.objects.values('category_id')
+            )
+        ),
+        (
+            Field,
+            ['id', 'category_id', 'key'],
+            Field.objects.filter(
+                id__in=AirQualityField.objects.values('field_id')
+            )
+        )
+    ]
+
+
+def get_label(model):
+    """Return the label of the model used in snapshots."""
+    return model._meta.label_lower
+
+
+def check_msgpack():
+    """Raise an exception when MessagePack is not installed."""
+    if msgpack is None:
+        raise ImproperlyConfigured(
+            'Snapshots require MessagePack, install it with '
+            'geokey-airquality[msgpack].'
+        )
+
+
+def encode_value(value):
+    """
+    Encodes the value of a column for MessagePack. Dates are stored as text,
+    geometries as EWKB marked by the geometry extension type.
+    """
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return six.text_type(value.isoformat())
+    elif isinstance(value, GEOSGeometry):
+        return msgpack.ExtType(GEOMETRY_TYPE, bytes(value.ewkb))
+
+    return value
+
+
+def decode_ext(code, data):
+    """
+    Decodes a MessagePack extension type. Geometries are returned as
+    hex-encoded EWKB, the way PostGIS reads them with `COPY`.
+    """
+    if code == GEOMETRY_TYPE:
+        return binascii.hexlify(data).decode('ascii')
+
+    return msgpack.ExtType(code, data)
+
+
+def write_chunks(out, packer, label, columns, queryset, batch_size):
+    """
+    Writes rows of the queryset as chunks, each with rows stored column by
+    column. Rows are streamed from the database.
+
+    Returns
+    -------
+    int
+        Number of written rows.
+    """
+    total = 0
+    rows = []
+
+    def write():
+        out.write(packer.pack({
+            'model': six.text_type(label),
+            'columns': [six.text_type(column) for column in columns],
+            'values': [list(values) for values in zip(*rows)]
+        }))
+
+    for row in queryset.order_by('pk').values_list(*columns).iterator():
+        rows.append([encode_value(value) for value in row])
+
+        if len(rows) >= batch_size:
+            write()
+            total += len(rows)
+            rows = []
+
+    if rows:
+        write()
+        total += len(rows)
+
+    return total
+
+
+def dump_snapshot(out, batch_size=10000):
+    """
+    Writes a snapshot of all Air Quality data.
+
+    Parameters
+    ----------
+    out : file
+        File-like object the snapshot is written to, in binary mode.
+    batch_size : int
+        Number of rows in each chunk.
+
+    Returns
+    -------
+    collections.OrderedDict
+        Number of written rows stored by the model label.
+
+    Raises
+    ------
+    django.core.exceptions.ImproperlyConfigured
+        If MessagePack is not installed.
+    """
+    check_msgpack()
+
+    report = collections.OrderedDict()
+    packer = msgpack.Packer(use_bin_type=True)
+    outer = connection.in_atomic_block
+
+    with transaction.atomic():
+        # One snapshot of the database keeps references and rows consistent
+        if connection.vendor == 'postgresql' and not outer:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ'
+                )
+
+        with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) as gz:
+            gz.write(packer.pack({
+                'format': FORMAT,
+                'version': VERSION,
+                'extension': six.text_type(__version__)
+            }))
+
+            for model, columns, queryset in get_references():
+                report[get_label(model)] = write_chunks(
+                    gz,
+                    packer,
+                    get_label(model),
+                    columns,
+                    queryset,
+                    batch_size
+                )
+
+            for model in MODELS:
+                report[get_label(model)] = write_chunks(
+                    gz,
+                    packer,
+                    get_label(model),
+                    [field.attname for field in model._meta.concrete_fields],
+                    model.objects.all(),
+                    batch_size
+                )
+
+    return report
+
+
+class SnapshotLoad(object):
+    """
+    Loads a snapshot into the database, adding its data to the existing one.
+
+    Users are found by their emails (created when not registered yet, without
+    a usable password), GeoKey projects by their names, categories by their
+    names within projects and fields by their keys within categories. Air
+    Quality rows referencing GeoKey objects that cannot be found are skipped.
+    Air Quality projects, categories and fields already added for the same
+    GeoKey objects are reused, so they are never duplicated. Other rows get
+    new IDs and are loaded with PostgreSQL `COPY`.
+    """
+
+    def __init__(self):
+        """Initiates a new load."""
+        self.maps = collections.defaultdict(dict)
+        self.models = {get_label(model): model for model in MODELS}
+        self.references = {
+            get_label(get_user_model()): (get_user_model(), self.map_users),
+            get_label(Project): (Project, self.map_projects),
+            get_label(Category): (Category, self.map_categories),
+            get_label(Field): (Field, self.map_fields)
+        }
+        self.referenced = set(
+            field.related_model
+            for model in MODELS
+            for field in model._meta.concrete_fields
+            if field.is_relation
+        )
+        self.report = collections.OrderedDict()
+
+    def get_unique(self, rows):
+        """Return a map of keys to IDs, leaving out ambiguous keys."""
+        found = {}
+        ambiguous = set()
+
+        for key, object_id in rows:
+            if key in found:
+                ambiguous.add(key)
+
+            found[key] = object_id
+
+        return dict(
+            (key, object_id) for key, object_id in found.items()
+            if key not in ambiguous
+        )
+
+    def map_users(self, rows):
+        """Map users by their emails, creating missing ones."""
+        User = get_user_model()
+        emails = dict((row['email'].lower(), row) for row in rows)
+        found = dict(
+            User.objects.annotate(
+                lower_email=Lower('email')
+            ).filter(
+                lower_email__in=emails.keys()
+            ).values_list('lower_email', 'id')
+        )
+        missing = [email for email in emails if email not in found]
+        taken = set(
+            User.objects.filter(
+                display_name__in=[
+                    emails[email]['display_name'] for email in missing
+                ]
+            ).values_list('display_name', flat=True)
+        )
+
+        for email in missing:
+            row = emails[email]
+            display_name = row['display_name']
+
+            if display_name in taken:
+                suffix = ' (%s)' % row['id']
+                display_name = display_name[:50 - len(suffix)] + suffix
+
+            user = User(email=row['email'], display_name=display_name)
+            user.set_unusable_password()
+            user.save()
+            found[email] = user.id
+
+        for email, row in emails.items():
+            self.maps[User][row['id']] = found[email]
+
+    def map_projects(self, rows):
+        """Map active GeoKey projects by their names."""
+        found = self.get_unique(
+            Project.objects.filter(
+                status='active',
+                name__in=[row['name'] for row in rows]
+            ).values_list('name', 'id')
+        )
+
+        for row in rows:
+            if row['name'] in found:
+                self.maps[Project][row['id']] = found[row['name']]
+
+    def map_categories(self, rows):
+        """Map active categories by their names within projects."""
+        projects = self.maps[Project]
+        found = self.get_unique(
+            ((project_id, name), category_id)
+            for category_id, project_id, name in Category.objects.filter(
+                status='active',
+                project_id__in=[
+                    projects[row['project_id']] for row in rows
+                    if row['project_id'] in projects
+                ]
+            ).values_list('id', 'project_id', 'name')
+        )
+
+        for row in rows:
+            key = (projects.get(row['project_id']), row['name'])
+
+            if key in found:
+                self.maps[Category][row['id']] = found[key]
+
+    def map_fields(self, rows):
+        """Map active fields by their keys within categories."""
+        categories = self.maps[Category]
+        found = dict(
+            ((category_id, key), field_id)
+            for field_id, category_id, key in Field.objects.filter(
+                status='active',
+                category_id__in=[
+                    categories[row['category_id']] for row in rows
+                    if row['category_id'] in categories
+                ]
+            ).values_list('id', 'category_id', 'key')
+        )
+
+        for row in rows:
+            key = (categories.get(row['category_id']), row['key'])
+
+            if key in found:
+                self.maps[Field][row['id']] = found[key]
+
+    def find_existing(self, model, columns, rows):
+        """
+        Maps rows of Air Quality projects, categories or fields to the ones
+        already added for the same GeoKey objects. Rows referencing the same
+        GeoKey object as a previous row of the chunk are mapped to it.
+
+        Returns
+        -------
+        tuple
+            Rows not added yet and IDs of rows added instead of duplicates,
+            stored by the IDs of duplicates.
+        """
+        key_index = columns.index(MAPPINGS[model])
+        pk_index = columns.index(model._meta.pk.attname)
+        # The oldest one is used when already duplicated
+        found = dict(
+            model.objects.filter(**{
+                MAPPINGS[model] + '__in': [row[key_index] for row in rows]
+            }).order_by('-id').values_list(MAPPINGS[model], 'id')
+        )
+        missing = collections.OrderedDict()
+        duplicates = {}
+
+        for row in rows:
+            key = row[key_index]
+
+            if key in found:
+                self.maps[model][row[pk_index]] = found[key]
+            elif key in missing:
+                duplicates[row[pk_index]] = missing[key][pk_index]
+            else:
+                missing[key] = row
+
+        return list(missing.values()), duplicates
+
+    def get_ids(self, cursor, model, count):
+        """Take new IDs from the sequence of the model."""
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+            "FROM generate_series(1, %s)",
+            [SEQUENCES.get(model, model)._meta.db_table, count]
+        )
+
+        return [row[0] for row in cursor.fetchall()]
+
+    def load_rows(self, cursor, model, columns, rows):
+        """
+        Remaps foreign keys of rows and loads them with `COPY`.
+
+        Returns
+        -------
+        tuple
+            Number of skipped rows and of rows already added.
+        """
+        fields = {
+            field.attname: field for field in model._meta.concrete_fields
+        }
+        relations = {
+            index: self.maps[fields[column].related_model]
+            for index, column in enumerate(columns)
+            if fields[column].is_relation
+        }
+        pk_index = columns.index(model._meta.pk.attname)
+        loaded = []
+
+        for row in rows:
+            try:
+                for index, mapped in relations.items():
+                    if row[index] is not None:
+                        row[index] = mapped[row[index]]
+            except KeyError:
+                continue
+
+            loaded.append(row)
+
+        remapped = len(loaded)
+        duplicates = {}
+
+        if model in MAPPINGS:
+            loaded, duplicates = self.find_existing(model, columns, loaded)
+
+        ids = self.get_ids(cursor, model, len(loaded)) if loaded else []
+        lines = []
+
+        for row, new_id in zip(loaded, ids):
+            if model in self.referenced:
+                self.maps[model][row[pk_index]] = new_id
+
+            row[pk_index] = new_id
+            lines.append(get_copy_line([
+                json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in row
+            ]))
+
+        for duplicate_id, original_id in duplicates.items():
+            if original_id in self.maps[model]:
+                self.maps[model][duplicate_id] = self.maps[model][original_id]
+
+        if lines:
+            cursor.copy_expert(
+                'COPY {table} ({columns}) FROM STDIN WITH CSV'.format(
+                    table=model._meta.db_table,
+                    columns=', '.join(
+                        connection.ops.quote_name(fields[column].column)
+                        for column in columns
+                    )
+                ),
+                io.BytesIO(''.join(lines).encode('utf-8'))
+            )
+
+        return len(rows) - remapped, remapped - len(loaded)
+
+    def load_chunk(self, cursor, chunk):
+        """Load a chunk of the snapshot."""
+        label = chunk['model']
+        columns = chunk['columns']
+        rows = [list(row) for row in zip(*chunk['values'])]
+        report = self.report.setdefault(
+            label,
+            collections.OrderedDict([
+                ('loaded', 0),
+                ('existing', 0),
+                ('skipped', 0)
+            ])
+        )
+        existing = 0
+
+        if label in self.models:
+            skipped, existing = self.load_rows(
+                cursor,
+                self.models[label],
+                columns,
+                rows
+            )
+        elif label in self.references:
+            rows = [dict(zip(columns, row)) for row in rows]
+            model, map_rows = self.references[label]
+            before = len(self.maps[model])
+            map_rows(rows)
+            skipped = len(rows) - (len(self.maps[model]) - before)
+        else:
+            raise ValueError('Unknown model in the snapshot: %s.' % label)
+
+        report['loaded'] += len(rows) - skipped - existing
+        report['existing'] += existing
+        report['skipped'] += skipped
+
+    def run(self, input_file):
+        """
+        Runs the load in a single transaction.
+
+        Parameters
+        ----------
+        input_file : file
+            Snapshot file, opened in binary mode.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Numbers of loaded, already existing and skipped rows stored by
+            the model label.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a snapshot of Air Quality.
+        django.core.exceptions.ImproperlyConfigured
+            If MessagePack is not installed.
+        """
+        check_msgpack()
+
+        with gzip.GzipFile(fileobj=input_file, mode='rb') as gz:
+            unpacker = msgpack.Unpacker(gz, raw=False, ext_hook=decode_ext)
+
+            try:
+                header = next(unpacker)
+            except (StopIteration, IOError, ValueError,
+                    msgpack.exceptions.UnpackException):
+                header = None
+
+            if (not isinstance(header, dict) or
+                    header.get('format') != FORMAT):
+                raise ValueError('File is not a snapshot of Air Quality.')
+
+            if header.get('version') != VERSION:
+                raise ValueError(
+                    'Snapshot version %s is not supported.' %
+                    header.get('version')
+                )
+
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for chunk in unpacker:
+                        self.load_chunk(cursor, chunk)
+
+                touch_locations(self.maps[get_user_model()].values())
+
+        invalidate_structures()
+        return self.report
@@ -29,7 +29,7 @@ $(document).ready(function() {
             // Show loader
             loader.removeClass('hidden');
 
-            Control.Ajax.get('airquality/projects/' + val,
+            Control.Ajax.get('airquality/projects/' + val + '/structure',
                 function(response) {
                     project = response;
 
@@ -0,0 +1,115 @@
+"""Summary statistics shown on the index page."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from geokey.contributions.models import Observation
+
+from geokey_airquality.models import (
+    RESULTS_BANDS,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive,
+    AirQualitySummary
+)
+
+
+def get_months():
+    """
+    Counts measurements of both tiers by the month they were started in.
+
+    Returns
+    -------
+    dict
+        Number of measurements stored by the month (YYYY-MM).
+    """
+    months = {}
+
+    started = AirQualityMeasurement.objects.annotate(
+        month=TruncMonth('started')
+    ).order_by().values('month').annotate(total=Count('id'))
+
+    for row in started:
+        month = timezone.localtime(row['month']).strftime('%Y-%m')
+        months[month] = months.get(month, 0) + row['total']
+
+    archived = AirQualityMeasurementArchive.objects.order_by().values(
+        'period'
+    ).annotate(total=Count('id'))
+
+    for row in archived:
+        month = row['period'].strftime('%Y-%m')
+        months[month] = months.get(month, 0) + row['total']
+
+    return months
+
+
+def get_projects():
+    """
+    Counts active contributions submitted to Air Quality categories by
+    project, drafts and deleted contributions are not counted.
+
+    Returns
+    -------
+    dict
+        Number of contributions stored by the Air Quality project ID.
+    """
+    contributions = Observation.objects.prefetch_related(None).filter(
+        category__airquality__isnull=False,
+        status='active'
+    ).order_by().values('category__airquality__project').annotate(
+        total=Count('id', distinct=True)
+    )
+
+    return dict(
+        (str(row['category__airquality__project']), row['total'])
+        for row in contributions
+    )
+
+
+def refresh_summary():
+    """
+    Recalculates all statistics and stores them as the summary.
+
+    Returns
+    -------
+    geokey_airquality.models.AirQualitySummary
+        Refreshed summary.
+    """
+    results = AirQualityMeasurement.objects.results_summary()
+
+    summary, created = AirQualitySummary.objects.update_or_create(
+        pk=1,
+        defaults={
+            'updated': timezone.now(),
+            'total_locations': AirQualityLocation.objects.count(),
+            'total_measurements': AirQualityMeasurement.objects.count(),
+            'total_archived': AirQualityMeasurementArchive.objects.count(),
+            'projects': get_projects(),
+            'bands': dict(
+                (type, results['band_%s' % type]) for type in RESULTS_BANDS
+            ),
+            'months': get_months()
+        }
+    )
+
+    return summary
+
+
+def get_summary():
+    """
+    Gets the stored summary, as last refreshed by `refresh_statistics`. It is
+    never refreshed here, so that requests don't wait for it.
+
+    Returns
+    -------
+    geokey_airquality.models.AirQualitySummary
+        Summary of statistics, not updated yet when never refreshed.
+    """
+    # Created by the migration, unless removed since
+    summary, created = AirQualitySummary.objects.get_or_create(pk=1)
+    return summary
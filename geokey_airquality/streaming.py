@@ -0,0 +1,94 @@
+"""Streaming of large lists for the public API."""
+
+from django.http import StreamingHttpResponse
+
+from geokey_airquality.renderers import FastJSONRenderer
+
+
+def iter_chunks(queryset, chunk_size=500):
+    """
+    Iterates over all objects of the queryset, reading them in chunks ordered
+    by their primary keys. Unlike `QuerySet.iterator`, related objects are
+    still prefetched (for each chunk separately).
+
+    Parameters
+    ----------
+    queryset : django.db.models.query.QuerySet
+        Objects to be read.
+    chunk_size : int
+        Number of objects read at once.
+
+    Returns
+    -------
+    generator
+        Objects of the queryset.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+
+    while True:
+        chunk = queryset
+
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+
+        chunk = list(chunk[:chunk_size])
+
+        for instance in chunk:
+            yield instance
+
+        if len(chunk) < chunk_size:
+            break
+
+        last_pk = chunk[-1].pk
+
+
+def stream_json(items):
+    """
+    Encodes a list as JSON, one item at a time. Items are encoded the same
+    way as by the JSON renderer of the API (with the fast JSON library, when
+    installed).
+
+    Parameters
+    ----------
+    items : iterable
+        Native representations of items.
+
+    Returns
+    -------
+    generator
+        Encoded parts of the list.
+    """
+    renderer = FastJSONRenderer()
+    separator = b'['
+
+    for item in items:
+        yield separator
+        yield renderer.render(item)
+        separator = b','
+
+    yield b'[]' if separator == b'[' else b']'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    A response streaming a list as JSON, so that the whole list (and its
+    encoded content) is never held in memory. It can't be cached or
+    post-processed like a rendered API response.
+    """
+
+    def __init__(self, items, *args, **kwargs):
+        """
+        Initiates a new response.
+
+        Parameters
+        ----------
+        items : iterable
+            Native representations of items, e.g. serialised by a generator.
+        """
+        kwargs.setdefault('content_type', 'application/json')
+        super(StreamingJSONResponse, self).__init__(
+            stream_json(items),
+            *args,
+            **kwargs
+        )
@@ -0,0 +1,173 @@
+"""Lightweight structure of GeoKey projects for the admin pages."""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from geokey.projects.models import Project
+from geokey.categories.models import TextField, LookupField, LookupValue
+
+
+CACHE_KEY = 'airquality:structure:%s:%s'
+VERSION_KEY = 'airquality:structure:version'
+
+
+def get_timeout():
+    """
+    Gets the time structures are cached for. Invalidation reaches other
+    processes only with a shared cache backend, the timeout limits how long
+    a per-process cache can serve outdated structures.
+
+    Returns
+    -------
+    int
+        Timeout, set by `AIRQUALITY_STRUCTURE_TIMEOUT` in seconds.
+    """
+    return getattr(settings, 'AIRQUALITY_STRUCTURE_TIMEOUT', 3600)
+
+
+def get_version():
+    """
+    Gets the current version of cached structures.
+
+    Returns
+    -------
+    str
+        Version, changed every time any structure is invalidated.
+    """
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(VERSION_KEY, version, None)
+
+    return version
+
+
+def invalidate_structures():
+    """Invalidates cached structures of all projects."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def build_structure(project_id):
+    """
+    Builds the structure of an active project: its active categories, with
+    their active text and lookup fields (including lookup values).
+
+    Parameters
+    ----------
+    project_id : int
+        Identifies the project in the database.
+
+    Returns
+    -------
+    dict
+        Structure of the project.
+
+    Raises
+    ------
+    Project.DoesNotExist
+        If the project is not found or is not active.
+    """
+    project = Project.objects.only('id', 'name').get(
+        pk=project_id,
+        status='active'
+    )
+
+    categories = list(project.categories.filter(
+        status='active'
+    ).order_by('order', 'id').only('id', 'name'))
+    fields = dict((category.id, []) for category in categories)
+
+    text_fields = TextField.objects.filter(
+        category__in=categories,
+        status='active'
+    )
+    lookup_fields = list(LookupField.objects.filter(
+        category__in=categories,
+        status='active'
+    ))
+
+    lookup_values = dict((field.id, []) for field in lookup_fields)
+    values = LookupValue.objects.filter(
+        field__in=lookup_fields,
+        status='active'
+    ).order_by('order', 'id')
+
+    for value in values:
+        lookup_values[value.field_id].append({
+            'id': value.id,
+            'name': value.name
+        })
+
+    for field in text_fields:
+        fields[field.category_id].append((field.order, field.id, {
+            'id': field.id,
+            'key': field.key,
+            'name': field.name,
+            'fieldtype': 'TextField'
+        }))
+
+    for field in lookup_fields:
+        fields[field.category_id].append((field.order, field.id, {
+            'id': field.id,
+            'key': field.key,
+            'name': field.name,
+            'fieldtype': 'LookupField',
+            'lookupvalues': lookup_values[field.id]
+        }))
+
+    return {
+        'id': project.id,
+        'name': project.name,
+        'categories': [
+            {
+                'id': category.id,
+                'name': category.name,
+                'fields': [
+                    field for order, pk, field in sorted(fields[category.id])
+                ]
+            }
+            for category in categories
+        ]
+    }
+
+
+def get_structure(project_id):
+    """
+    Gets the structure of an active project, from the cache when possible.
+
+    Parameters
+    ----------
+    project_id : int
+        Identifies the project in the database.
+
+    Returns
+    -------
+    tuple
+        Structure of the project and its ETag.
+
+    Raises
+    ------
+    Project.DoesNotExist
+        If the project is not found or is not active.
+    """
+    key = CACHE_KEY % (get_version(), project_id)
+    cached = cache.get(key)
+
+    if cached is None:
+        structure = build_structure(project_id)
+        etag = '"%s"' % hashlib.md5(
+            json.dumps(structure, sort_keys=True)
+        ).hexdigest()
+
+        cached = (structure, etag)
+        cache.set(key, cached, get_timeout())
+
+    return cached
@@ -0,0 +1,217 @@
+"""Submitting measurements as GeoKey contributions."""
+
+from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+from django.template.defaultfilters import date as filter_date
+
+from geokey.categories.models import Field
+from geokey.contributions.serializers import ContributionSerializer
+
+from geokey_airquality.models import AirQualityCategory, AirQualityField
+
+
+def get_category_type(results):
+    """
+    Gets the type of Air Quality category for the results.
+
+    Parameters
+    ----------
+    results : float
+        Results of the measurement.
+
+    Returns
+    -------
+    str
+        Type of Air Quality category.
+    """
+    category_types = dict(AirQualityCategory.TYPES)
+
+    if results < 40:
+        return category_types['1']
+    elif results >= 40 and results < 60:
+        return category_types['2']
+    elif results >= 60 and results < 80:
+        return category_types['3']
+    elif results >= 80 and results < 100:
+        return category_types['4']
+    else:
+        return category_types['5']
+
+
+def get_mapping(aq_project):
+    """
+    Gets all categories and fields of Air Quality project in two queries.
+
+    Parameters
+    ----------
+    aq_project : geokey_airquality.models.AirQualityProject
+        Air Quality project.
+
+    Returns
+    -------
+    dict
+        Tuples of Air Quality category and its Air Quality fields by type,
+        stored by the type of Air Quality category.
+    """
+    aq_fields = list(AirQualityField.objects.filter(
+        category__project=aq_project
+    ).select_related('category__category'))
+
+    # Field manager selects subclasses, so lookup values stay accessible
+    fields = Field.objects.in_bulk(
+        [aq_field.field_id for aq_field in aq_fields]
+    )
+
+    mapping = {}
+
+    for aq_field in aq_fields:
+        aq_field.field = fields[aq_field.field_id]
+        aq_category = aq_field.category
+
+        if aq_category.type not in mapping:
+            mapping[aq_category.type] = (aq_category, {})
+
+        mapping[aq_category.type][1][aq_field.type] = aq_field
+
+    return mapping
+
+
+def get_properties(instance, results, aq_fields):
+    """
+    Gets the properties of a contribution for the measurement.
+
+    Parameters
+    ----------
+    instance : geokey_airquality.models.AirQualityMeasurement
+        Measurement to be submitted.
+    results : float
+        Results of the measurement.
+    aq_fields : dict
+        Air Quality fields of the category by type.
+
+    Returns
+    -------
+    dict
+        Contribution properties stored by the field key.
+
+    Raises
+    ------
+    KeyError
+        If Air Quality field is not found.
+    LookupValue.DoesNotExist
+        If lookup value for students is not found.
+    AttributeError
+        If field for students is not a lookup field.
+    """
+    field_types = dict(AirQualityField.TYPES)
+    location_properties = instance.location.properties
+
+    properties = {}
+
+    for key, value in field_types.iteritems():
+        aq_field = aq_fields[value]
+
+        value = None
+
+        if key == 'results':
+            value = results
+        elif key == 'date_out':
+            value = filter_date(instance.started, 'd/m/Y')
+        elif key == 'time_out':
+            value = filter_date(instance.started, 'H:i')
+        elif key == 'date_collected':
+            value = filter_date(instance.finished, 'd/m/Y')
+        elif key == 'time_collected':
+            value = filter_date(instance.finished, 'H:i')
+        elif key == 'exposure_min':
+            value = instance.finished - instance.started
+            value = int(value.total_seconds() / 60)
+        elif key == 'distance_from_road':
+            value = '%sm' % location_properties.get('distance')
+        elif key == 'height':
+            value = '%sm' % location_properties.get('height')
+        elif key == 'site_characteristics':
+            value = location_properties.get('characteristics')
+        elif key == 'additional_details':
+            value = instance.properties.get('additional_details')
+        elif key == 'made_by_students':
+            value = instance.properties.get('made_by_students')
+
+            if value:
+                value = 'Yes'
+            else:
+                value = 'No'
+
+            value = aq_field.field.lookupvalues.get(name=value).id
+
+        if value is not None:
+            properties[aq_field.field.key] = str(value)
+
+    return properties
+
+
+def submit_measurement(user, aq_project, instance, results, mapping=None):
+    """
+    Submits the measurement as a contribution to the project. Measurement is
+    removed once the contribution is created.
+
+    Parameters
+    ----------
+    user : geokey.users.models.User
+        User contributing to the project.
+    aq_project : geokey_airquality.models.AirQualityProject
+        Air Quality project.
+    instance : geokey_airquality.models.AirQualityMeasurement
+        Measurement to be submitted.
+    results : float
+        Results of the measurement.
+    mapping : dict
+        Categories and fields of Air Quality project, loaded when not set.
+
+    Returns
+    -------
+    Boolean
+        Indicating if measurement was submitted.
+    """
+    if mapping is None:
+        mapping = get_mapping(aq_project)
+
+    try:
+        results = float(results)
+        aq_category, aq_fields = mapping[get_category_type(results)]
+        properties = get_properties(instance, results, aq_fields)
+    except (
+        ValueError,
+        TypeError,
+        KeyError,
+        AttributeError,
+        ObjectDoesNotExist,
+        MultipleObjectsReturned
+    ):
+        return False
+
+    project = aq_project.project
+
+    if project.can_contribute(user):
+        data = {
+            'type': 'Feature',
+            'meta': {
+                'status': 'active',
+                'category': aq_category.category.id
+            },
+            'location': {
+                'geometry': instance.location.geometry.geojson
+            },
+            'properties': properties
+        }
+
+        serializer = ContributionSerializer(
+            data=data,
+            context={'user': user, 'project': project}
+        )
+
+        if serializer.is_valid(raise_exception=True):
+            serializer.save()
+            instance.delete()
+            return True
+
+    return False
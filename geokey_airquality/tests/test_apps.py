@@ -0,0 +1,71 @@
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import signals
+from django.test import TestCase
+
+from geokey.extensions.base import extensions
+from geokey.projects.models import Project
+from geokey.projects.tests.model_factories import ProjectFactory
+
+from geokey_airquality import __version__
+from geokey_airquality.models import post_change_structure, post_save_project
+from geokey_airquality.signals import connect_signals
+from geokey_airquality.structure import CACHE_KEY, get_version
+from geokey_airquality.tests.model_factories import AirQualityProjectFactory
+from geokey_airquality.warmup import warm_caches
+
+
+class AirQualityConfigTest(TestCase):
+
+    def get_receivers(self, signal, sender):
+
+        return [
+            receiver for receiver in signal._live_receivers(sender)
+            if receiver in [post_change_structure, post_save_project]
+        ]
+
+    def test_ready(self):
+
+        app_config = apps.get_app_config('geokey_airquality')
+        app_config.ready()
+
+        self.assertEqual(app_config.verbose_name, 'Air Quality')
+        self.assertEqual(
+            extensions['geokey_airquality']['version'],
+            __version__
+        )
+        self.assertTrue(extensions['geokey_airquality']['superuser'])
+
+    def test_connect_signals(self):
+
+        connect_signals()
+        connect_signals()
+
+        self.assertEqual(
+            self.get_receivers(signals.post_save, Project),
+            [post_change_structure, post_save_project]
+        )
+        self.assertEqual(
+            self.get_receivers(signals.post_delete, Project),
+            [post_change_structure]
+        )
+
+
+class WarmCachesTest(TestCase):
+
+    def test_warm_caches(self):
+
+        project = ProjectFactory.create()
+        AirQualityProjectFactory.create(project=project)
+        AirQualityProjectFactory.create(
+            project=ProjectFactory.create(status='inactive')
+        )
+        AirQualityProjectFactory.create(
+            status='inactive',
+            project=ProjectFactory.create()
+        )
+
+        self.assertEqual(warm_caches(), [project.id])
+        self.assertIsNotNone(
+            cache.get(CACHE_KEY % (get_version(), project.id))
+        )
@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from geokey_airquality.cache import LRUMemoryCache
+
+
+class LRUMemoryCacheTest(TestCase):
+
+    def setUp(self):
+
+        self.cache = LRUMemoryCache('test', {'OPTIONS': {'MAX_BYTES': 1000}})
+        self.cache.clear()
+
+    def test_set_and_get(self):
+
+        self.cache.set('key', {'value': 1})
+
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.assertTrue(self.cache.has_key('key'))
+        self.assertGreater(self.cache.size, 0)
+
+        self.cache.delete('key')
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_add(self):
+
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+
+    def test_incr(self):
+
+        self.cache.set('key', 1)
+
+        self.assertEqual(self.cache.incr('key'), 2)
+        self.assertEqual(self.cache.incr('key', -3), -1)
+        self.assertEqual(self.cache.get('key'), -1)
+
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired(self):
+
+        self.cache.set('key', 1, timeout=0)
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_evicts_least_recently_used(self):
+
+        for key in ['a', 'b', 'c']:
+            self.cache.set(key, 'x' * 300)
+
+        # Reading "a" makes "b" the least recently used one
+        self.cache.get('a')
+        self.cache.set('d', 'x' * 300)
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertIsNotNone(self.cache.get('d'))
+        self.assertLessEqual(self.cache.size, 1000)
+
+    def test_too_large(self):
+
+        self.cache.set('key', 'x' * 2000)
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_shared_between_instances(self):
+
+        self.cache.set('key', 1)
+        other = LRUMemoryCache('test', {'OPTIONS': {'MAX_BYTES': 1000}})
+
+        self.assertEqual(other.get('key'), 1)
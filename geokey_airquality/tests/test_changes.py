@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from geokey.users.tests.model_factories import UserFactory
+
+from geokey_airquality.changes import (
+    DEFAULT_CACHE,
+    get_etag,
+    get_locations_cache,
+    get_locations_changed,
+    touch_locations
+)
+from geokey_airquality.models import AirQualityChange
+
+
+class GetEtagTest(TestCase):
+
+    def test_get_etag(self):
+
+        etag = get_etag('locations', 1, 'json')
+
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+        self.assertEqual(etag, get_etag('locations', 1, 'json'))
+        self.assertNotEqual(etag, get_etag('locations', 1, 'msgpack'))
+        self.assertNotEqual(etag, get_etag('locations', 2, 'json'))
+
+
+class LocationsChangedTest(TestCase):
+
+    def setUp(self):
+
+        self.user = UserFactory.create()
+        self.other = UserFactory.create()
+
+    def test_get_locations_changed(self):
+
+        changed = get_locations_changed(self.user)
+
+        self.assertEqual(AirQualityChange.objects.count(), 1)
+        self.assertEqual(get_locations_changed(self.user), changed)
+
+    def test_touch_locations(self):
+
+        past = timezone.now() - timedelta(days=1)
+        AirQualityChange.objects.create(user=self.user, changed=past)
+
+        touch_locations([self.user.id, self.other.id])
+
+        self.assertGreater(get_locations_changed(self.user), past)
+        self.assertEqual(AirQualityChange.objects.count(), 1)
+
+
+class LocationsCacheTest(TestCase):
+
+    def test_get_locations_cache(self):
+
+        self.assertIs(get_locations_cache(), DEFAULT_CACHE)
+        self.assertEqual(DEFAULT_CACHE.max_bytes, 64 * 1024 * 1024)
+
+    @override_settings(AIRQUALITY_LOCATIONS_CACHE='default')
+    def test_get_locations_cache_when_set(self):
+
+        self.assertIs(get_locations_cache(), caches['default'])
+
+    @override_settings(AIRQUALITY_LOCATIONS_CACHE=None)
+    def test_get_locations_cache_when_disabled(self):
+
+        self.assertIsNone(get_locations_cache())
@@ -1,12 +1,26 @@
+import json
+import tempfile
+import unittest
+
 from datetime import timedelta
+from StringIO import StringIO
 
 from django.test import TestCase
 from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.utils import timezone
 
 from geokey.users.tests.model_factories import UserFactory
 
+from geokey_airquality.models import (
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive,
+    AirQualitySummary
+)
 from geokey_airquality.management.commands.check_measurements import Command
+from geokey_airquality.snapshots import msgpack
 from geokey_airquality.tests.model_factories import (
     AirQualityLocationFactory,
     AirQualityMeasurementFactory
@@ -104,3 +118,391 @@ class CheckMeasurementsTest(TestCase):
 
         command.check_measurements()
         self.assertEquals(len(mail.outbox), 1)
+
+
+class ImportResultsTest(TestCase):
+
+    def test_import_results(self):
+
+        measurement = AirQualityMeasurementFactory.create(barcode='100001')
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write('Barcode,Results\n100001,45.15\n100002,12\n')
+            csv_file.flush()
+
+            out = StringIO()
+            call_command('import_results', csv_file.name, stdout=out)
+
+        reference = AirQualityMeasurement.objects.get(pk=measurement.id)
+        self.assertEqual(reference.properties['results'], 45.15)
+        self.assertIn('Updated: 1', out.getvalue())
+        self.assertIn('Line 3: barcode 100002 not found', out.getvalue())
+
+    def test_import_results_when_no_project(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            with self.assertRaises(CommandError):
+                call_command('import_results', csv_file.name, project=158)
+
+
+class ImportHistoryTest(TestCase):
+
+    def test_import_history(self):
+
+        UserFactory.create(email='history@example.com')
+
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as ndjson_file:
+            ndjson_file.write(
+                '{"email": "history@example.com", "location": "Park", '
+                '"longitude": -0.14, "latitude": 51.53, "barcode": "200001", '
+                '"started": "2015-03-01T09:00:00Z"}\n'
+                '{"email": "history@example.com", "location": "Park"}\n'
+            )
+            ndjson_file.flush()
+
+            out = StringIO()
+            call_command('import_history', ndjson_file.name, stdout=out)
+
+        self.assertEqual(
+            AirQualityMeasurement.objects.filter(barcode='200001').count(),
+            1
+        )
+        self.assertIn('Read 2 rows (1 rejected)', out.getvalue())
+        self.assertIn('Measurements: 1', out.getvalue())
+        self.assertIn('Line 2: geometry', out.getvalue())
+
+    def test_import_history_when_columns_missing(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write('email,location\n')
+            csv_file.flush()
+
+            with self.assertRaises(CommandError):
+                call_command('import_history', csv_file.name)
+
+
+@unittest.skipIf(msgpack is None, 'MessagePack is not installed.')
+class DumpAndLoadAirQualityTest(TestCase):
+
+    def test_dump_and_load_airquality(self):
+
+        AirQualityMeasurementFactory.create(barcode='100001')
+
+        with tempfile.NamedTemporaryFile(suffix='.aq') as snapshot_file:
+            out = StringIO()
+            call_command('dump_airquality', snapshot_file.name, stdout=out)
+            self.assertIn('geokey_airquality.airqualitymeasurement: 1',
+                          out.getvalue())
+
+            AirQualityLocation.objects.all().delete()
+
+            out = StringIO()
+            call_command('load_airquality', snapshot_file.name, stdout=out)
+            self.assertIn(
+                'geokey_airquality.airqualitymeasurement: '
+                '1 loaded, 0 existing, 0 skipped',
+                out.getvalue()
+            )
+
+        self.assertEqual(
+            AirQualityMeasurement.objects.filter(barcode='100001').count(),
+            1
+        )
+
+    def test_load_airquality_when_not_snapshot(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write('Barcode,Results\n')
+            csv_file.flush()
+
+            with self.assertRaises(CommandError):
+                call_command('load_airquality', csv_file.name)
+
+
+class ExportMeasurementsTest(TestCase):
+
+    def test_export_measurements(self):
+
+        AirQualityMeasurementFactory.create(barcode='100001')
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            out = StringIO()
+            call_command(
+                'export_measurements',
+                csv_file.name,
+                processes=1,
+                shards=2,
+                stdout=out
+            )
+
+            self.assertIn('100001,', csv_file.read())
+            self.assertIn('Exported 2 shards', out.getvalue())
+
+    def test_export_measurements_when_no_processes(self):
+
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            with self.assertRaises(CommandError):
+                call_command('export_measurements', csv_file.name, processes=0)
+
+
+class BenchmarkIndexesTest(TestCase):
+
+    def test_benchmark_indexes(self):
+
+        out = StringIO()
+        call_command(
+            'benchmark_indexes',
+            users=2,
+            locations=2,
+            measurements=2,
+            repeat=1,
+            stdout=out
+        )
+
+        self.assertIn('Seeded 8 measurements', out.getvalue())
+        self.assertIn('check_measurements', out.getvalue())
+        self.assertEqual(AirQualityMeasurement.objects.count(), 0)
+
+    def test_benchmark_indexes_when_no_measurements(self):
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_indexes', measurements=0)
+
+
+class BenchmarkSerializersTest(TestCase):
+
+    def test_benchmark_serializers(self):
+
+        out = StringIO()
+        call_command(
+            'benchmark_serializers',
+            size=10,
+            repeat=1,
+            precision=3,
+            stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            sorted(results.keys()),
+            ['coordinates', 'coordinates_precision', 'geojson']
+        )
+        self.assertLess(
+            results['coordinates_precision']['bytes'],
+            results['geojson']['bytes']
+        )
+
+
+class BenchmarkRenderersTest(TestCase):
+
+    def test_benchmark_renderers(self):
+
+        out = StringIO()
+        call_command(
+            'benchmark_renderers',
+            size=10,
+            measurements=2,
+            repeat=1,
+            stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(results['default']['bytes'], results['fast']['bytes'])
+        self.assertTrue(results['identical'])
+
+    def test_benchmark_renderers_when_no_runs(self):
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_renderers', repeat=0)
+
+
+class BenchmarkImportsTest(TestCase):
+
+    def test_benchmark_imports(self):
+
+        out = StringIO()
+        call_command('benchmark_imports', repeat=1, limit=1000, stdout=out)
+
+        results = json.loads(out.getvalue())
+        self.assertGreater(results['startup_ms'], results['extension_ms'])
+        self.assertIn(
+            'geokey_airquality.views',
+            [cost['module'] for cost in results['modules']]
+        )
+
+    def test_benchmark_imports_when_over_budget(self):
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_imports',
+                repeat=1,
+                budget=0,
+                stdout=StringIO()
+            )
+
+    def test_benchmark_imports_when_no_runs(self):
+
+        with self.assertRaises(CommandError):
+            call_command('benchmark_imports', repeat=0)
+
+
+class BenchmarkExportTest(TestCase):
+
+    def test_benchmark_export(self):
+
+        out = StringIO()
+        call_command(
+            'benchmark_export',
+            users=2,
+            locations=2,
+            measurements=3,
+            repeat=1,
+            stdout=out
+        )
+
+        output = json.loads(out.getvalue())
+        self.assertEqual(output['results']['rows'], 12)
+        self.assertTrue(output['results']['identical'])
+        self.assertEqual(AirQualityMeasurement.objects.count(), 0)
+
+    def test_benchmark_export_when_no_runs(self):
+
+        self.assertRaises(
+            CommandError,
+            call_command,
+            'benchmark_export',
+            repeat=0,
+            stdout=StringIO()
+        )
+
+
+class BenchmarkTest(TestCase):
+
+    def test_benchmark(self):
+
+        out = StringIO()
+        call_command(
+            'benchmark',
+            users=2,
+            locations=1,
+            measurements=2,
+            repeat=1,
+            scenarios=['locations', 'submit'],
+            stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(results['meta']['parameters']['users'], 2)
+        self.assertEqual(
+            sorted(results['scenarios'].keys()),
+            ['locations', 'submit']
+        )
+        self.assertEqual(results['scenarios']['locations']['runs'], 1)
+        self.assertEqual(AirQualityMeasurement.objects.count(), 0)
+
+        baseline = tempfile.NamedTemporaryFile(suffix='.json')
+        baseline.write(out.getvalue())
+        baseline.flush()
+
+        out = StringIO()
+        call_command(
+            'benchmark',
+            users=2,
+            locations=1,
+            measurements=2,
+            repeat=1,
+            scenarios=['locations'],
+            baseline=baseline.name,
+            stdout=out
+        )
+
+        results = json.loads(out.getvalue())
+        self.assertEqual(
+            results['changes']['locations']['queries_change'],
+            0
+        )
+
+    def test_benchmark_with_unknown_scenario(self):
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark',
+                users=2,
+                locations=1,
+                measurements=1,
+                repeat=1,
+                scenarios=['unknown'],
+                stdout=StringIO()
+            )
+
+
+class ArchiveMeasurementsTest(TestCase):
+
+    def test_archive_measurements(self):
+
+        old = AirQualityMeasurementFactory.create(
+            started=timezone.now() - timedelta(days=500),
+            finished=timezone.now() - timedelta(days=470),
+            properties={'results': 45.15}
+        )
+        recent = AirQualityMeasurementFactory.create(
+            started=timezone.now() - timedelta(days=20)
+        )
+        unfinished = AirQualityMeasurementFactory.create(
+            started=timezone.now() - timedelta(days=500)
+        )
+        no_results = AirQualityMeasurementFactory.create(
+            started=timezone.now() - timedelta(days=500),
+            finished=timezone.now() - timedelta(days=470)
+        )
+
+        out = StringIO()
+        call_command('archive_measurements', months=12, stdout=out)
+
+        self.assertEqual(
+            sorted(AirQualityMeasurement.objects.values_list('id', flat=True)),
+            sorted([recent.id, unfinished.id, no_results.id])
+        )
+
+        archived = AirQualityMeasurementArchive.objects.get(pk=old.id)
+        self.assertEqual(archived.barcode, old.barcode)
+        self.assertEqual(archived.results, 45.15)
+        self.assertEqual(archived.period.day, 1)
+        self.assertIn('1 measurement', out.getvalue())
+        self.assertEqual(AirQualityMeasurement.tiers.all().count(), 4)
+
+    def test_archive_measurements_when_dry_run(self):
+
+        AirQualityMeasurementFactory.create(
+            started=timezone.now() - timedelta(days=500),
+            finished=timezone.now() - timedelta(days=470),
+            properties={'results': 45.15}
+        )
+
+        out = StringIO()
+        call_command(
+            'archive_measurements',
+            months=12,
+            dry_run=True,
+            stdout=out
+        )
+
+        self.assertEqual(AirQualityMeasurement.objects.count(), 1)
+        self.assertEqual(AirQualityMeasurementArchive.objects.count(), 0)
+        self.assertIn('1 measurement', out.getvalue())
+
+
+class RefreshStatisticsTest(TestCase):
+
+    def test_refresh_statistics(self):
+
+        location = AirQualityLocationFactory.create()
+        AirQualityMeasurementFactory.create(location=location)
+
+        out = StringIO()
+        call_command('refresh_statistics', stdout=out)
+
+        summary = AirQualitySummary.objects.get(pk=1)
+        self.assertEqual(summary.total_locations, 1)
+        self.assertEqual(summary.total_measurements, 1)
+        self.assertIn('1 location(s), 1 measurement(s)', out.getvalue())
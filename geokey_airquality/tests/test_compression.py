@@ -0,0 +1,105 @@
+import gzip
+import io
+
+from django.http import HttpRequest, HttpResponse
+from django.test import TestCase
+
+from geokey_airquality.compression import (
+    MIN_SIZE,
+    brotli,
+    choose_encoding,
+    compress,
+    encode_response,
+    parse_accept_encoding
+)
+
+
+class CompressTest(TestCase):
+
+    def test_compress(self):
+
+        content = b'{"name": "Location"}' * 100
+        bodies = compress(content)
+
+        self.assertEqual(bodies['identity'], content)
+        self.assertEqual(
+            gzip.GzipFile(fileobj=io.BytesIO(bodies['gzip'])).read(),
+            content
+        )
+        self.assertEqual(bodies, compress(content))
+
+        if brotli is not None:
+            self.assertEqual(brotli.decompress(bodies['br']), content)
+        else:
+            self.assertNotIn('br', bodies)
+
+    def test_compress_when_small(self):
+
+        self.assertEqual(
+            compress(b'x' * (MIN_SIZE - 1)),
+            {'identity': b'x' * (MIN_SIZE - 1)}
+        )
+
+
+class ChooseEncodingTest(TestCase):
+
+    def test_parse_accept_encoding(self):
+
+        self.assertEqual(
+            parse_accept_encoding('gzip, br;q=0.5, identity; q=0, *;q=x'),
+            {'gzip': 1.0, 'br': 0.5, 'identity': 0.0, '*': 0.0}
+        )
+        self.assertEqual(parse_accept_encoding(''), {})
+
+    def test_choose_encoding(self):
+
+        available = ['identity', 'gzip', 'br']
+
+        self.assertEqual(choose_encoding('', available), 'identity')
+        self.assertEqual(choose_encoding('gzip, deflate', available), 'gzip')
+        self.assertEqual(choose_encoding('gzip, br', available), 'br')
+        self.assertEqual(choose_encoding('gzip, br;q=0.5', available), 'gzip')
+        self.assertEqual(choose_encoding('*', available), 'br')
+        self.assertEqual(choose_encoding('br', ['identity']), 'identity')
+        self.assertEqual(
+            choose_encoding('gzip;q=0, identity;q=0', available),
+            'identity'
+        )
+
+
+class EncodeResponseTest(TestCase):
+
+    def test_encode_response(self):
+
+        request = HttpRequest()
+        request.META['HTTP_ACCEPT_ENCODING'] = 'gzip'
+        response = HttpResponse()
+        response['ETag'] = '"abc"'
+
+        encode_response(
+            request,
+            response,
+            {'identity': b'content', 'gzip': b'compressed'}
+        )
+
+        self.assertEqual(response.content, b'compressed')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
+
+    def test_encode_response_when_not_accepted(self):
+
+        request = HttpRequest()
+        response = HttpResponse()
+        response['ETag'] = '"abc"'
+
+        encode_response(
+            request,
+            response,
+            {'identity': b'content', 'gzip': b'compressed'}
+        )
+
+        self.assertEqual(response.content, b'content')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['ETag'], '"abc"')
+        self.assertEqual(response['Vary'], 'Accept, Accept-Encoding')
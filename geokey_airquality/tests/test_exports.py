@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+import csv
+import gzip
+import io
+import os
+
+from datetime import timedelta
+from StringIO import StringIO
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geokey.users.tests.model_factories import UserFactory
+from geokey.projects.tests.model_factories import ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory,
+    LookupFieldFactory,
+    LookupValueFactory
+)
+
+from geokey_airquality.exports import (
+    FIELDNAMES,
+    UNIFIED_FIELDNAMES,
+    copy_measurements,
+    export_measurements,
+    get_id_ranges,
+    get_measurements,
+    open_export,
+    read_measurements,
+    stream_measurements,
+    stream_unified,
+    write_export,
+    write_measurements
+)
+from geokey_airquality.models import (
+    AirQualityField,
+    AirQualityMeasurementArchive
+)
+from geokey_airquality.submissions import submit_measurement
+from geokey_airquality.tests.model_factories import (
+    AirQualityProjectFactory,
+    AirQualityCategoryFactory,
+    AirQualityFieldFactory,
+    AirQualityLocationFactory,
+    AirQualityMeasurementFactory
+)
+
+
+def get_rows(out):
+    """Read rows of the exported CSV, ignoring their order."""
+    reader = csv.reader(StringIO(out.getvalue()))
+    header = next(reader)
+    return header, sorted(reader)
+
+
+class ExportsTest(TestCase):
+
+    def setUp(self):
+
+        started = timezone.now() - timedelta(days=28, seconds=30)
+        creator = UserFactory.create(display_name='Jane, "J" Doe')
+
+        location_1 = AirQualityLocationFactory.create(
+            creator=creator,
+            properties={
+                'height': 2.5,
+                'distance': 0,
+                'characteristics': 'Busy road'
+            }
+        )
+        location_2 = AirQualityLocationFactory.create(
+            creator=creator,
+            properties={'height': None, 'characteristics': ''}
+        )
+
+        self.measurement = AirQualityMeasurementFactory.create(
+            location=location_1,
+            creator=creator,
+            barcode='100001',
+            started=started,
+            finished=timezone.now(),
+            properties={
+                'results': 45.15,
+                'additional_details': 'Tube\nmoved',
+                'made_by_students': True
+            }
+        )
+        AirQualityMeasurementFactory.create(
+            location=location_2,
+            creator=creator,
+            barcode='100002',
+            started=started,
+            finished=None,
+            properties={'made_by_students': False}
+        )
+        AirQualityMeasurementArchive.objects.create(
+            id=1000000,
+            location=location_2,
+            creator=creator,
+            barcode='100003',
+            started=started - timedelta(days=400),
+            finished=started - timedelta(days=372),
+            properties={'results': 30},
+            period=(started - timedelta(days=400)).date()
+        )
+
+    def test_get_measurements(self):
+
+        measurements = list(get_measurements(chunk_size=1))
+
+        self.assertEqual(
+            [measurement.barcode for measurement in measurements],
+            ['100001', '100002', '100003']
+        )
+        self.assertIsInstance(
+            measurements[2],
+            AirQualityMeasurementArchive
+        )
+
+    def test_write_measurements(self):
+
+        out = StringIO()
+        write_measurements(out)
+        header, rows = get_rows(out)
+
+        self.assertEqual(header, FIELDNAMES)
+        self.assertEqual(len(rows), 3)
+
+    def test_copy_measurements(self):
+
+        written = StringIO()
+        write_measurements(written)
+
+        copied = StringIO()
+        copy_measurements(copied)
+
+        self.assertEqual(get_rows(copied), get_rows(written))
+
+        header, rows = get_rows(copied)
+        row = dict(zip(header, rows[0]))
+
+        self.assertEqual(row['Barcode'], '100001')
+        self.assertEqual(row['Height from ground (m)'], '2.5')
+        self.assertEqual(row['Distance from the road (m)'], '')
+        self.assertEqual(row['Additional details'], 'Tube\nmoved')
+        self.assertEqual(row['Exposure time (min)'], '40320')
+        self.assertEqual(row['Exposure time (hr)'], '672')
+        self.assertEqual(row['Diffusion tube made by students'], 'True')
+        self.assertEqual(row['Added by'], 'Jane, "J" Doe')
+
+    def test_read_measurements(self):
+
+        rows = list(read_measurements(chunk_size=2))
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            sorted(row['Barcode'] for row in rows),
+            ['100001', '100002', '100003']
+        )
+
+    def test_stream_measurements(self):
+
+        written = StringIO()
+        write_measurements(written)
+
+        streamed = StringIO()
+        streamed.writelines(stream_measurements())
+
+        self.assertEqual(get_rows(streamed), get_rows(written))
+
+    def test_open_export(self):
+
+        copied = StringIO()
+        copy_measurements(copied)
+
+        with open_export() as export_file:
+            self.assertEqual(export_file.read(), copied.getvalue())
+
+    def test_write_export_when_stale(self):
+
+        stale = write_export()
+        os.utime(stale, (0, 0))
+        path = write_export()
+
+        # Files of previous exports are removed
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(path))
+        os.remove(path)
+
+    def test_get_id_ranges(self):
+
+        id_ranges = get_id_ranges(2)
+
+        self.assertEqual(len(id_ranges), 2)
+        self.assertEqual(id_ranges[0][0], self.measurement.id)
+        self.assertEqual(id_ranges[0][1], id_ranges[1][0])
+        self.assertEqual(id_ranges[1][1], 1000001)
+
+    def test_export_measurements(self):
+
+        copied = StringIO()
+        copy_measurements(copied)
+
+        exported = io.BytesIO()
+        shards = export_measurements(exported, shards=3)
+
+        self.assertEqual(shards, 3)
+        self.assertEqual(get_rows(exported), get_rows(copied))
+
+        # Header is written once, rows are ordered by IDs
+        lines = exported.getvalue().splitlines()
+        self.assertEqual(lines.count(lines[0]), 1)
+        self.assertTrue(lines[-1].startswith('100003,'))
+
+    def test_export_measurements_compressed(self):
+
+        exported = io.BytesIO()
+        export_measurements(exported, shards=3)
+
+        compressed = io.BytesIO()
+        export_measurements(compressed, shards=3, compress=True)
+        compressed.seek(0)
+
+        self.assertEqual(
+            gzip.GzipFile(fileobj=compressed).read(),
+            exported.getvalue()
+        )
+
+    def test_stream_unified(self):
+
+        project = ProjectFactory.create(
+            name='Schools',
+            add_contributors=[self.measurement.creator]
+        )
+        aq_project = AirQualityProjectFactory.create(project=project)
+        category = CategoryFactory.create(project=project)
+        aq_category = AirQualityCategoryFactory.create(
+            type='40-60',
+            category=category,
+            project=aq_project
+        )
+
+        for key, value in AirQualityField.TYPES:
+            if key == 'made_by_students':
+                field = LookupFieldFactory.create(category=category)
+                LookupValueFactory(**{'field': field, 'name': 'Yes'})
+                LookupValueFactory(**{'field': field, 'name': 'No'})
+            else:
+                field = TextFieldFactory.create(category=category)
+
+            AirQualityFieldFactory.create(
+                type=value,
+                field=field,
+                category=aq_category
+            )
+
+        self.assertTrue(submit_measurement(
+            self.measurement.creator,
+            aq_project,
+            self.measurement,
+            45.15
+        ))
+
+        out = StringIO()
+        out.writelines(stream_unified())
+        header, rows = get_rows(out)
+
+        self.assertEqual(header, UNIFIED_FIELDNAMES)
+        self.assertEqual(len(rows), 3)
+
+        # Submitted measurement has no barcode, so it is sorted first
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row['Submitted to'], 'Schools')
+        self.assertEqual(row['Barcode'], '')
+        self.assertEqual(row['Results'], '45.15')
+        self.assertEqual(row['Height from ground (m)'], '2.5')
+        self.assertEqual(row['Distance from the road (m)'], '0')
+        self.assertEqual(row['Site characteristics'], 'Busy road')
+        self.assertEqual(row['Additional details'], 'Tube\nmoved')
+        self.assertEqual(row['Exposure time (min)'], '40320')
+        self.assertEqual(row['Exposure time (hr)'], '672')
+        self.assertEqual(row['Diffusion tube made by students'], 'True')
+        self.assertEqual(row['Added by'], 'Jane, "J" Doe')
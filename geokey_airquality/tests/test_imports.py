@@ -0,0 +1,308 @@
+from io import BytesIO
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geokey.users.tests.model_factories import UserFactory
+from geokey.projects.tests.model_factories import ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory,
+    LookupFieldFactory,
+    LookupValueFactory
+)
+from geokey.contributions.models import Observation
+
+from geokey_airquality.models import (
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+)
+from geokey_airquality.imports import HistoryImport, ResultsImport
+from geokey_airquality.tests.model_factories import (
+    AirQualityProjectFactory,
+    AirQualityCategoryFactory,
+    AirQualityFieldFactory,
+    AirQualityLocationFactory,
+    AirQualityMeasurementFactory
+)
+
+
+class ResultsImportTest(TestCase):
+
+    def setUp(self):
+
+        self.location = AirQualityLocationFactory.create(
+            properties={'height': 2, 'distance': 10}
+        )
+        self.measurement_1 = AirQualityMeasurementFactory.create(
+            location=self.location,
+            creator=self.location.creator,
+            barcode='100001',
+            started=timezone.now() - timedelta(days=28),
+            finished=timezone.now(),
+            properties={'additional_details': 'Heavy traffic.'}
+        )
+        self.measurement_2 = AirQualityMeasurementFactory.create(
+            location=self.location,
+            creator=self.location.creator,
+            barcode='100002'
+        )
+        AirQualityMeasurementFactory.create(barcode='100003')
+        AirQualityMeasurementFactory.create(barcode='100003')
+
+    def test_run(self):
+
+        csv_file = BytesIO(
+            'Barcode,NO2 (ug/m3)\n'
+            '100001,45.15\n'
+            '100002,61.2\n'
+            '100003,30\n'
+            '100004,12.5\n'
+            '100001,45.15\n'
+            '100005,n/a\n'
+        )
+        report = ResultsImport(batch_size=2).run(csv_file)
+
+        self.assertEqual(report['updated'], 2)
+        self.assertEqual(report['unmatched'], [
+            {'line': 5, 'barcode': '100004'}
+        ])
+        self.assertEqual(
+            [row['line'] for row in report['ambiguous']],
+            [4, 6]
+        )
+        self.assertEqual(
+            [row['line'] for row in report['invalid']],
+            [7]
+        )
+
+        reference = AirQualityMeasurement.objects.get(
+            pk=self.measurement_1.id
+        )
+        self.assertEqual(reference.properties, {
+            'additional_details': 'Heavy traffic.',
+            'results': 45.15
+        })
+        reference = AirQualityMeasurement.objects.get(
+            pk=self.measurement_2.id
+        )
+        self.assertEqual(reference.properties, {'results': 61.2})
+
+    def test_run_without_header(self):
+
+        csv_file = BytesIO('100001,45.15\n\n100002,61.2\n')
+        report = ResultsImport().run(csv_file)
+
+        self.assertEqual(report['updated'], 2)
+        self.assertEqual(report['invalid'], [])
+
+    def test_run_when_no_results_column(self):
+
+        csv_file = BytesIO('Barcode,Comment\n100001,Broken\n')
+
+        with self.assertRaises(ValueError):
+            ResultsImport().run(csv_file)
+
+    def test_run_when_submitting(self):
+
+        project = ProjectFactory.create(
+            add_contributors=[self.location.creator]
+        )
+        aq_project = AirQualityProjectFactory.create(project=project)
+        category = CategoryFactory.create(project=project)
+        aq_category = AirQualityCategoryFactory.create(
+            type='40-60',
+            category=category,
+            project=aq_project
+        )
+
+        for key, value in AirQualityField.TYPES:
+            if key == 'made_by_students':
+                field = LookupFieldFactory.create(category=category)
+                LookupValueFactory(**{'field': field, 'name': 'Yes'})
+                LookupValueFactory(**{'field': field, 'name': 'No'})
+            else:
+                field = TextFieldFactory.create(category=category)
+
+            AirQualityFieldFactory.create(
+                type=value,
+                field=field,
+                category=aq_category
+            )
+
+        csv_file = BytesIO('Barcode,Results\n100001,45.15\n100002,41\n')
+        report = ResultsImport(aq_project).run(csv_file)
+
+        self.assertEqual(report['updated'], 2)
+        self.assertEqual(report['submitted'], 1)
+        self.assertEqual(report['not_submitted'], ['100002'])
+        self.assertEqual(
+            AirQualityMeasurement.objects.filter(
+                pk=self.measurement_1.id).exists(),
+            False
+        )
+        self.assertEqual(Observation.objects.count(), 1)
+
+
+class HistoryImportTest(TestCase):
+
+    def setUp(self):
+
+        self.user = UserFactory.create(email='history@example.com')
+        self.location = AirQualityLocationFactory.create(
+            name='Existing',
+            creator=self.user,
+            properties={'height': 2}
+        )
+        AirQualityMeasurementFactory.create(
+            location=self.location,
+            creator=self.user,
+            barcode='200001',
+            started=datetime(2015, 3, 1, 9, tzinfo=timezone.utc)
+        )
+
+    def test_run(self):
+
+        x, y = self.location.geometry.coords
+        csv_file = BytesIO(
+            'email,location,longitude,latitude,height,characteristics,'
+            'barcode,started,finished,results,made_by_students\n'
+            'History@example.com,Existing,%r,%r,2,,200001,'
+            '2015-03-01T09:00:00Z,,,\n'
+            'history@example.com,Existing,%r,%r,2,,200002,'
+            '2015-04-01T09:00:00Z,2015-04-29T09:00:00Z,41.5,yes\n'
+            'history@example.com,"School, ""Main"" gate",-0.13,51.52,'
+            '1.5,Road,200003,2015-04-01 10:00,,,no\n'
+            'history@example.com,"School, ""Main"" gate",-0.13,51.52,'
+            '1.5,Road,200004,2015-05-01 10:00,,,\n'
+            'history@example.com,Park,-0.14,51.53,,,,,,,\n'
+            'unknown@example.com,Park,-0.14,51.53,,,200005,'
+            '2015-05-01 10:00,,,\n'
+            'history@example.com,Park,,51.53,,,200006,2015-05-01 10:00,,,\n'
+            'history@example.com,Park,-0.14,51.53,,,200007,yesterday,,,\n'
+            % (x, y, x, y)
+        )
+        report = HistoryImport(batch_size=3).run(csv_file)
+
+        self.assertEqual(report['read'], 8)
+        self.assertEqual(report['locations'], 2)
+        self.assertEqual(report['measurements'], 3)
+        self.assertEqual(report['skipped'], 1)
+        self.assertEqual(
+            [row['line'] for row in report['rejected']],
+            [7, 8, 9]
+        )
+
+        self.assertEqual(AirQualityLocation.objects.count(), 3)
+        self.assertEqual(AirQualityMeasurement.objects.count(), 4)
+
+        location = AirQualityLocation.objects.get(name='School, "Main" gate')
+        self.assertEqual(location.creator, self.user)
+        self.assertEqual(location.geometry.coords, (-0.13, 51.52))
+        self.assertEqual(location.properties, {
+            'height': 1.5,
+            'characteristics': 'Road'
+        })
+        self.assertEqual(location.height, 1.5)
+        self.assertEqual(location.measurements.count(), 2)
+
+        measurement = AirQualityMeasurement.objects.get(barcode='200002')
+        self.assertEqual(measurement.location, self.location)
+        self.assertEqual(measurement.results, 41.5)
+        self.assertEqual(measurement.made_by_students, True)
+        self.assertEqual(
+            measurement.finished - measurement.started,
+            timedelta(days=28)
+        )
+
+        # Importing the same file again changes nothing
+        csv_file.seek(0)
+        report = HistoryImport().run(csv_file)
+
+        self.assertEqual(report['locations'], 0)
+        self.assertEqual(report['measurements'], 0)
+        self.assertEqual(report['skipped'], 4)
+
+    def test_run_when_repeated_or_archived(self):
+
+        started = datetime(2014, 3, 1, 9, tzinfo=timezone.utc)
+        AirQualityMeasurementArchive.objects.create(
+            id=1000,
+            location=self.location,
+            barcode='200009',
+            creator=self.user,
+            started=started,
+            finished=started + timedelta(days=28),
+            properties={},
+            results=30.0,
+            period=started.date()
+        )
+
+        x, y = self.location.geometry.coords
+        csv_file = BytesIO(
+            'email,location,longitude,latitude,height,barcode,started,'
+            'results\n'
+            'history@example.com,Existing,%r,%r,2,200009,'
+            '2014-03-01T09:00:00Z,30\n'
+            'history@example.com,Existing,%r,%r,2,200010,'
+            '2015-06-01T09:00:00Z,40\n'
+            'history@example.com,Existing,%r,%r,2,200010,'
+            '2015-06-01T09:00:00Z,45\n'
+            % (x, y, x, y, x, y)
+        )
+        report = HistoryImport().run(csv_file)
+
+        self.assertEqual(report['measurements'], 1)
+        self.assertEqual(report['skipped'], 2)
+        self.assertEqual(
+            AirQualityMeasurement.objects.filter(barcode='200009').exists(),
+            False
+        )
+        self.assertEqual(
+            AirQualityMeasurement.objects.get(barcode='200010').results,
+            40.0
+        )
+
+    def test_run_ndjson(self):
+
+        ndjson_file = BytesIO(
+            '{"email": "history@example.com", "location": "Park", '
+            '"longitude": -0.14, "latitude": 51.53, "barcode": 200008, '
+            '"started": 1425200400, "made_by_students": true}\n'
+            '\n'
+            'not json\n'
+        )
+        report = HistoryImport().run(ndjson_file, 'ndjson')
+
+        self.assertEqual(report['measurements'], 1)
+        self.assertEqual(report['rejected'], [
+            {'line': 3, 'error': 'Row cannot be read.'}
+        ])
+
+        measurement = AirQualityMeasurement.objects.get(barcode='200008')
+        self.assertEqual(
+            measurement.started,
+            datetime(2015, 3, 1, 9, tzinfo=timezone.utc)
+        )
+        self.assertEqual(measurement.made_by_students, True)
+
+    def test_run_when_dry_run(self):
+
+        csv_file = BytesIO(
+            'email,location,longitude,latitude\n'
+            'history@example.com,Park,-0.14,51.53\n'
+        )
+        report = HistoryImport().run(csv_file, dry_run=True)
+
+        self.assertEqual(report['locations'], 1)
+        self.assertEqual(AirQualityLocation.objects.count(), 1)
+
+    def test_run_when_columns_missing(self):
+
+        csv_file = BytesIO('email,location\nhistory@example.com,Park\n')
+
+        with self.assertRaises(ValueError):
+            HistoryImport().run(csv_file)
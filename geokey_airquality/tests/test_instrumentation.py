@@ -0,0 +1,166 @@
+from django.core.urlresolvers import resolve
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, RequestFactory
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from geokey.users.models import User
+
+from geokey_airquality.instrumentation import (
+    Histogram,
+    Registry,
+    InstrumentationMiddleware,
+    registry
+)
+
+
+class HistogramTest(TestCase):
+
+    def test_observe(self):
+
+        histogram = Histogram((1, 5, 10))
+        histogram.observe(1)
+        histogram.observe(3)
+        histogram.observe(50)
+
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.sum, 54)
+        self.assertEqual(
+            histogram.get_cumulative(),
+            [(1, 1), (5, 2), (10, 2), ('+Inf', 3)]
+        )
+
+
+class RegistryTest(TestCase):
+
+    def test_render(self):
+
+        metrics = Registry()
+        metrics.observe('response_size_bytes', 100, view='api_sheet')
+        metrics.observe('response_size_bytes', 2000, view='api_sheet')
+        rendered = metrics.render()
+
+        self.assertIn(
+            '# TYPE airquality_response_size_bytes histogram',
+            rendered
+        )
+        self.assertIn(
+            'airquality_response_size_bytes_bucket'
+            '{view="api_sheet",le="256.0"} 1',
+            rendered
+        )
+        self.assertIn(
+            'airquality_response_size_bytes_bucket'
+            '{view="api_sheet",le="+Inf"} 2',
+            rendered
+        )
+        self.assertIn(
+            'airquality_response_size_bytes_sum{view="api_sheet"} 2100.0',
+            rendered
+        )
+
+        metrics.reset()
+        self.assertNotIn('_count', metrics.render())
+
+
+class InstrumentationMiddlewareTest(TestCase):
+
+    def setUp(self):
+
+        self.middleware = InstrumentationMiddleware()
+        self.labels = (('method', 'GET'), ('view', 'api_sheet'))
+        registry.reset()
+
+    def tearDown(self):
+
+        registry.reset()
+
+    def get_request(self, path):
+
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        self.middleware.process_request(request)
+        self.middleware.process_view(request, None, (), {})
+        return request
+
+    def test_response(self):
+
+        request = self.get_request('/api/airquality/sheet/')
+        User.objects.count()
+        User.objects.count()
+        self.middleware.process_response(request, HttpResponse('abc'))
+
+        queries = registry.histograms[('sql_queries', self.labels)]
+        self.assertEqual(queries.sum, 2)
+
+        size = registry.histograms[('response_size_bytes', self.labels)]
+        self.assertEqual(size.sum, 3)
+
+        self.assertNotIn(
+            ('serialization_duration_seconds', self.labels),
+            registry.histograms
+        )
+
+    def test_streaming_response(self):
+
+        def stream():
+            yield str(User.objects.count())
+            yield 'abc'
+
+        request = self.get_request('/api/airquality/sheet/')
+        response = self.middleware.process_response(
+            request,
+            StreamingHttpResponse(stream())
+        )
+
+        # Observed only once the streamed response is closed
+        self.assertEqual(registry.histograms, {})
+
+        content = b''.join(response.streaming_content)
+
+        # Closed as by `response.close()`, which would close the connection
+        for closable in response._closable_objects:
+            closable.close()
+
+        queries = registry.histograms[('sql_queries', self.labels)]
+        self.assertEqual(queries.sum, 1)
+
+        size = registry.histograms[('response_size_bytes', self.labels)]
+        self.assertEqual(size.sum, len(content))
+
+        # Queries are no longer recorded
+        User.objects.count()
+        self.assertEqual(queries.sum, 1)
+
+    def test_template_response(self):
+
+        request = self.get_request('/api/airquality/sheet/')
+        response = Response({'results': []})
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = 'application/json'
+        response.renderer_context = {}
+
+        response = self.middleware.process_template_response(
+            request,
+            response
+        )
+        response.render()
+        self.middleware.process_response(request, response)
+
+        self.assertEqual(
+            registry.histograms[
+                ('serialization_duration_seconds', self.labels)
+            ].count,
+            1
+        )
+
+    def test_other_view(self):
+
+        request = RequestFactory().get('/admin/airquality/')
+        request.resolver_match = None
+        self.middleware.process_request(request)
+        self.middleware.process_view(request, None, (), {})
+        self.middleware.process_response(request, HttpResponse())
+
+        self.assertEqual(registry.histograms, {})
@@ -1,5 +1,11 @@
+import json
+from datetime import timedelta
+from importlib import import_module
+
 from django.core import mail
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
 
 from geokey.projects.models import Project
 from geokey.projects.tests.model_factories import ProjectFactory
@@ -13,6 +19,10 @@ from geokey_airquality.models import (
     AirQualityProject,
     AirQualityCategory,
     AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive,
+    get_float,
     post_save_project,
     pre_delete_project,
     post_save_category,
@@ -23,10 +33,46 @@ from geokey_airquality.models import (
 from geokey_airquality.tests.model_factories import (
     AirQualityProjectFactory,
     AirQualityCategoryFactory,
-    AirQualityFieldFactory
+    AirQualityFieldFactory,
+    AirQualityLocationFactory,
+    AirQualityMeasurementFactory
 )
 
 
+class GetFloatTest(TestCase):
+
+    values = [
+        1.5, '2', ' 3e2 ', '.5', '-1.', True, False, 'NaN', 'nan',
+        'Infinity', '-inf', '1e400', 1e300, '1e-400', 'n/a', '', None, [1], {}
+    ]
+
+    def test_get_float(self):
+
+        self.assertEqual(
+            [get_float(value) for value in self.values],
+            [
+                1.5, 2.0, 300.0, 0.5, -1.0, None, None, None, None,
+                None, None, None, 1e300, 0.0, None, None, None, None, None
+            ]
+        )
+
+    def test_get_float_same_as_migration(self):
+
+        migration = import_module(
+            'geokey_airquality.migrations.0005_typed_properties'
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(migration.CREATE_FLOAT_FUNCTION)
+
+            for value in self.values:
+                cursor.execute(
+                    'SELECT airquality_float(%s::jsonb)',
+                    [json.dumps(value)]
+                )
+                self.assertEqual(cursor.fetchone()[0], get_float(value))
+
+
 class ProjectSaveTest(TestCase):
 
     def test_post_save_when_project_made_inactive(self):
@@ -299,3 +345,153 @@ class FieldDeleteTest(TestCase):
         reference = AirQualityProject.objects.get(pk=aq_project.id)
         self.assertEqual(reference.status, 'active')
         self.assertEquals(len(mail.outbox), 0)
+
+
+class LocationSaveTest(TestCase):
+
+    def test_save_copies_properties(self):
+
+        location = AirQualityLocationFactory.create(properties={
+            'height': '2.5',
+            'distance': 10,
+            'characteristics': 'Busy road'
+        })
+
+        reference = AirQualityLocation.objects.get(pk=location.id)
+        self.assertEqual(reference.height, 2.5)
+        self.assertEqual(reference.distance, 10)
+        self.assertEqual(reference.characteristics, 'Busy road')
+
+    def test_save_when_properties_are_incorrect(self):
+
+        location = AirQualityLocationFactory.create(properties={
+            'height': 'high'
+        })
+
+        reference = AirQualityLocation.objects.get(pk=location.id)
+        self.assertEqual(reference.height, None)
+        self.assertEqual(reference.distance, None)
+        self.assertEqual(reference.characteristics, None)
+
+
+class MeasurementQuerySetTest(TestCase):
+
+    def setUp(self):
+
+        self.measurement_1 = AirQualityMeasurementFactory.create(
+            properties={'results': 35.5, 'made_by_students': True}
+        )
+        self.measurement_2 = AirQualityMeasurementFactory.create(
+            properties={'results': '45.15', 'made_by_students': False}
+        )
+        self.measurement_3 = AirQualityMeasurementFactory.create(
+            properties={'results': 112}
+        )
+        self.measurement_4 = AirQualityMeasurementFactory.create(
+            properties={}
+        )
+
+    def test_save_copies_properties(self):
+
+        reference = AirQualityMeasurement.objects.get(
+            pk=self.measurement_2.id
+        )
+        self.assertEqual(reference.results, 45.15)
+        self.assertEqual(reference.made_by_students, False)
+
+        reference.properties = {'results': 61.2, 'made_by_students': 1}
+        reference.save(update_fields=['properties'])
+
+        reference = AirQualityMeasurement.objects.get(
+            pk=self.measurement_2.id
+        )
+        self.assertEqual(reference.results, 61.2)
+        self.assertEqual(reference.made_by_students, True)
+
+    def test_in_band(self):
+
+        self.assertEqual(
+            [m.id for m in AirQualityMeasurement.objects.in_band('1')],
+            [self.measurement_1.id]
+        )
+        self.assertEqual(
+            [m.id for m in AirQualityMeasurement.objects.in_band('2')],
+            [self.measurement_2.id]
+        )
+        self.assertEqual(AirQualityMeasurement.objects.in_band('3').count(), 0)
+        self.assertEqual(
+            [m.id for m in AirQualityMeasurement.objects.in_band('5')],
+            [self.measurement_3.id]
+        )
+
+    def test_made_by_students(self):
+
+        self.assertEqual(
+            [m.id for m in AirQualityMeasurement.objects.made_by_students()],
+            [self.measurement_1.id]
+        )
+        self.assertEqual(
+            AirQualityMeasurement.objects.made_by_students(False).count(),
+            1
+        )
+
+    def test_results_summary(self):
+
+        summary = AirQualityMeasurement.objects.results_summary()
+
+        self.assertEqual(summary['total'], 3)
+        self.assertEqual(summary['minimum'], 35.5)
+        self.assertEqual(summary['maximum'], 112)
+        self.assertEqual(summary['band_1'], 1)
+        self.assertEqual(summary['band_2'], 1)
+        self.assertEqual(summary['band_3'], 0)
+        self.assertEqual(summary['band_5'], 1)
+
+
+class TieredMeasurementManagerTest(TestCase):
+
+    def setUp(self):
+
+        self.measurement = AirQualityMeasurementFactory.create(
+            finished=timezone.now(),
+            properties={'results': 35.5}
+        )
+        self.archived = AirQualityMeasurementArchive.objects.create(
+            id=self.measurement.id + 1000,
+            location=self.measurement.location,
+            barcode='100001',
+            creator=self.measurement.creator,
+            started=timezone.now() - timedelta(days=500),
+            finished=None,
+            properties={},
+            period=(timezone.now() - timedelta(days=500)).date()
+        )
+
+    def test_all(self):
+
+        measurements = sorted(
+            AirQualityMeasurement.tiers.all(),
+            key=lambda measurement: measurement.id
+        )
+
+        self.assertEqual(len(measurements), 2)
+        self.assertEqual(measurements[0].id, self.measurement.id)
+        self.assertEqual(measurements[1].id, self.archived.id)
+        self.assertEqual(measurements[1].barcode, '100001')
+        self.assertIsInstance(measurements[1], AirQualityMeasurement)
+
+    def test_filter(self):
+
+        measurements = list(AirQualityMeasurement.tiers.filter(
+            finished__isnull=True
+        ))
+
+        self.assertEqual(len(measurements), 1)
+        self.assertEqual(measurements[0].id, self.archived.id)
+
+    def test_exclude(self):
+
+        self.assertEqual(
+            AirQualityMeasurement.tiers.exclude(barcode='100001').count(),
+            1
+        )
@@ -0,0 +1,429 @@
+import re
+import json
+import collections
+
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.http import HttpRequest
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.gis.geos import Point
+from django.contrib.messages.storage.fallback import FallbackStorage
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from geokey.users.models import User
+from geokey.categories.models import Category, TextField
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory
+)
+from geokey.users.tests.model_factories import UserFactory
+
+from geokey_airquality import views
+from geokey_airquality.benchmarks.data import seed_project
+from geokey_airquality.management.commands.check_measurements import Command
+from geokey_airquality.models import (
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement
+)
+
+
+def get_fingerprint(sql):
+    """Replace literals in the SQL, so that similar queries are grouped."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    sql = re.sub(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def format_report(sizes, captured):
+    """List queries with a different count for each size by fingerprint."""
+    counts = collections.OrderedDict()
+
+    for index, queries in enumerate(captured):
+        for sql in queries:
+            fingerprint = get_fingerprint(sql)
+            counts.setdefault(fingerprint, [0] * len(captured))[index] += 1
+
+    lines = ['Number of queries changed with the number of rows:']
+    lines.extend(
+        '%s  %s' % (
+            ' -> '.join(
+                '%s (%s rows)' % (count, size)
+                for size, count in zip(sizes, totals)
+            ),
+            fingerprint
+        )
+        for fingerprint, totals in counts.items()
+        if len(set(totals)) > 1
+    )
+
+    return '\n'.join(lines)
+
+
+def create_locations(creator, size, measurements=1, **kwargs):
+    """Create locations with measurements in bulk."""
+    locations = AirQualityLocation.objects.bulk_create([
+        AirQualityLocation(
+            name='Location %s' % index,
+            geometry=Point(-0.1276, 51.5072),
+            creator=creator,
+            created=timezone.now(),
+            properties={'height': 2, 'distance': 10}
+        )
+        for index in range(size)
+    ])
+
+    AirQualityMeasurement.objects.bulk_create([
+        AirQualityMeasurement(
+            location=location,
+            barcode='%06d' % (location.id * measurements + index),
+            creator=creator,
+            started=kwargs.get('started', timezone.now() - timedelta(28)),
+            finished=kwargs.get('finished'),
+            properties={'results': 45.15}
+        )
+        for location in locations
+        for index in range(measurements)
+    ])
+
+    return locations
+
+
+class FingerprintTest(TestCase):
+
+    def test_get_fingerprint(self):
+
+        self.assertEqual(
+            get_fingerprint(
+                "SELECT * FROM t WHERE id IN (1, 2, 3)\n"
+                "AND name = 'O''Hara' AND U0.x = 5.5"
+            ),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? AND U0.x = ?'
+        )
+
+
+class QueryCountTestMixin(object):
+    """
+    Runs a scenario against different numbers of rows and asserts that the
+    number of queries does not change. Data of each size is rolled back.
+    """
+
+    sizes = (10, 1000)
+
+    def assertQueryCountStable(self, seed, run):
+        captured = []
+
+        for size in self.sizes:
+            savepoint = transaction.savepoint()
+            context = seed(size)
+
+            with CaptureQueriesContext(connection) as queries:
+                run(context)
+
+            captured.append([query['sql'] for query in queries])
+            transaction.savepoint_rollback(savepoint)
+
+        if len(set(len(queries) for queries in captured)) > 1:
+            self.fail(format_report(self.sizes, captured))
+
+
+class ViewsQueryCountTest(QueryCountTestMixin, TestCase):
+
+    def setUp(self):
+
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.creator = UserFactory.create()
+        self.factory = APIRequestFactory()
+        self.aq_project = seed_project(self.superuser, [self.creator])
+        self.location = create_locations(self.creator, 1)[0]
+
+    def seed_measurements(self, size):
+
+        return create_locations(
+            self.creator,
+            size,
+            finished=timezone.now()
+        )
+
+    def test_index(self):
+
+        def run(context):
+            request = HttpRequest()
+            request.method = 'GET'
+            request.user = self.superuser
+            setattr(request, 'session', 'session')
+            setattr(request, '_messages', FallbackStorage(request))
+
+            response = views.AQIndexView.as_view()(request).render()
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_export(self):
+
+        def run(context):
+            request = HttpRequest()
+            request.method = 'GET'
+            request.user = self.superuser
+
+            response = views.AQExportView.as_view()(
+                request,
+                file='measurements'
+            )
+            self.assertEqual(response.status_code, 200)
+            b''.join(response.streaming_content)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_barcodes(self):
+
+        def run(context):
+            request = self.factory.get('/ajax/airquality/barcodes/')
+            force_authenticate(request, user=self.superuser)
+
+            response = views.AQBarcodesAjaxView.as_view()(request).render()
+            self.assertEqual(response.status_code, 200)
+
+            request = self.factory.post(
+                '/ajax/airquality/barcodes/',
+                json.dumps({'barcodes': list(
+                    AirQualityMeasurement.objects.values_list(
+                        'barcode',
+                        flat=True
+                    )
+                )}),
+                content_type='application/json'
+            )
+            force_authenticate(request, user=self.superuser)
+
+            response = views.AQBarcodesAjaxView.as_view()(request).render()
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_sheet(self):
+
+        def run(context):
+            request = self.factory.get('/api/airquality/sheet/')
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQSheetAPIView.as_view()(request).render()
+            self.assertEqual(response.status_code, 204)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_projects(self):
+
+        def run(context):
+            request = self.factory.get('/api/airquality/projects/')
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQProjectsAPIView.as_view()(request).render()
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_locations(self):
+
+        def run(context):
+            request = self.factory.get('/api/airquality/locations/')
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQLocationsAPIView.as_view()(request).render()
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_locations_single(self):
+
+        def seed(size):
+            return create_locations(self.creator, 1, measurements=size)[0]
+
+        def run(location):
+            url = '/api/airquality/locations/%s/' % location.id
+
+            request = self.factory.patch(
+                url,
+                json.dumps({
+                    'name': 'Updated',
+                    'geometry': {
+                        'type': 'Point',
+                        'coordinates': [-0.1276, 51.5072]
+                    }
+                }),
+                content_type='application/json'
+            )
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQLocationsSingleAPIView.as_view()(
+                request,
+                location_id=location.id
+            ).render()
+            self.assertEqual(response.status_code, 200)
+
+            request = self.factory.delete(url)
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQLocationsSingleAPIView.as_view()(
+                request,
+                location_id=location.id
+            ).render()
+            self.assertEqual(response.status_code, 204)
+
+        self.assertQueryCountStable(seed, run)
+
+    def test_measurements(self):
+
+        def run(context):
+            request = self.factory.post(
+                '/api/airquality/locations/%s/measurements/' % (
+                    self.location.id
+                ),
+                json.dumps({
+                    'barcode': '123456',
+                    'started': (
+                        timezone.now() - timedelta(days=28)
+                    ).isoformat(),
+                    'finished': timezone.now().isoformat(),
+                    'project': self.aq_project.project.id,
+                    'properties': {'results': 45.15}
+                }),
+                content_type='application/json'
+            )
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQMeasurementsAPIView.as_view()(
+                request,
+                location_id=self.location.id
+            ).render()
+            self.assertEqual(response.status_code, 204)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+    def test_measurements_single(self):
+
+        def run(context):
+            measurement = self.location.measurements.first()
+            url = '/api/airquality/locations/%s/measurements/%s/' % (
+                self.location.id,
+                measurement.id
+            )
+
+            request = self.factory.patch(
+                url,
+                json.dumps({
+                    'barcode': measurement.barcode,
+                    'finished': timezone.now().isoformat(),
+                    'project': self.aq_project.project.id,
+                    'properties': {'results': 45.15}
+                }),
+                content_type='application/json'
+            )
+            force_authenticate(request, user=self.creator)
+
+            response = views.AQMeasurementsSingleAPIView.as_view()(
+                request,
+                location_id=self.location.id,
+                measurement_id=measurement.id
+            ).render()
+            self.assertEqual(response.status_code, 204)
+
+        self.assertQueryCountStable(self.seed_measurements, run)
+
+
+class CommandsQueryCountTest(QueryCountTestMixin, TestCase):
+
+    def test_check_measurements(self):
+
+        def seed(size):
+            users = User.objects.bulk_create([
+                UserFactory.build() for index in range(size)
+            ])
+
+            for user in users:
+                create_locations(user, 1)
+
+        def run(context):
+            Command().check_measurements()
+
+        self.assertQueryCountStable(seed, run)
+
+
+class SignalsQueryCountTest(QueryCountTestMixin, TestCase):
+
+    def setUp(self):
+
+        self.creator = UserFactory.create()
+        self.aq_project = seed_project(self.creator, [self.creator])
+
+    def seed(self, size):
+
+        # Deleting the project cascades to all its categories and fields
+        project = self.aq_project.project
+        categories = Category.objects.bulk_create([
+            CategoryFactory.build(project=project, creator=self.creator)
+            for index in range(size)
+        ])
+        aq_categories = AirQualityCategory.objects.bulk_create([
+            AirQualityCategory(
+                type=AirQualityCategory.TYPES[index % 5][1],
+                category=category,
+                project=self.aq_project
+            )
+            for index, category in enumerate(categories)
+        ])
+
+        field = TextFieldFactory.create(category=categories[0])
+        AirQualityField.objects.bulk_create([
+            AirQualityField(
+                type=AirQualityField.TYPES[1][1],
+                field=field,
+                category=aq_category
+            )
+            for aq_category in aq_categories
+        ])
+
+    def test_post_save_project(self):
+
+        def run(context):
+            project = self.aq_project.project
+            project.status = 'inactive'
+            project.save()
+
+        self.assertQueryCountStable(self.seed, run)
+
+    def test_pre_delete_project(self):
+
+        def run(context):
+            self.aq_project.project.delete()
+
+        self.assertQueryCountStable(self.seed, run)
+
+    def test_post_save_category(self):
+
+        def run(context):
+            category = self.aq_project.categories.first().category
+            category.status = 'inactive'
+            category.save()
+
+        self.assertQueryCountStable(self.seed, run)
+
+    def test_post_save_field(self):
+
+        def run(context):
+            aq_field = AirQualityField.objects.filter(
+                category__project=self.aq_project,
+                type='01. Results'
+            ).order_by('id').first()
+            field = TextField.objects.get(pk=aq_field.field_id)
+            field.status = 'inactive'
+            field.save()
+
+        self.assertQueryCountStable(self.seed, run)
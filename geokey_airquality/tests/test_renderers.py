@@ -0,0 +1,157 @@
+import io
+import unittest
+
+from datetime import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import six, timezone
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from geokey_airquality.parsers import (
+    FastJSONParser,
+    MessagePackParser,
+    get_parser_classes
+)
+from geokey_airquality.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+    encode_value,
+    get_renderer_classes,
+    msgpack
+)
+
+
+class EncodeValueTest(TestCase):
+
+    def test_encode_value(self):
+
+        self.assertEqual(
+            encode_value(datetime(2016, 1, 1, tzinfo=timezone.utc)),
+            1451606400
+        )
+        self.assertEqual(encode_value(Decimal('45.15')), 45.15)
+        self.assertRaises(TypeError, encode_value, object())
+
+
+@unittest.skipIf(msgpack is None, 'MessagePack is not installed.')
+class MessagePackTest(TestCase):
+
+    def test_get_classes(self):
+
+        self.assertIn(MessagePackRenderer, get_renderer_classes())
+        self.assertIn(MessagePackParser, get_parser_classes())
+
+    def test_render_and_parse(self):
+
+        data = {
+            'type': 'Feature',
+            'name': u'Caf\xe9',
+            'created': datetime(2016, 1, 1, tzinfo=timezone.utc),
+            'properties': {'results': 45.15, 'height': None}
+        }
+
+        content = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(io.BytesIO(content))
+
+        # Native strings are unpacked as text by strict clients too
+        unpacked = msgpack.unpackb(content, raw=False)
+        self.assertTrue(
+            all(isinstance(key, six.text_type) for key in unpacked)
+        )
+        self.assertIsInstance(unpacked['type'], six.text_type)
+
+        self.assertEqual(parsed['type'], u'Feature')
+        self.assertEqual(parsed['name'], u'Caf\xe9')
+        self.assertEqual(parsed['created'], 1451606400)
+        self.assertEqual(parsed['properties'], data['properties'])
+
+    def test_render_when_no_data(self):
+
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_parse_when_invalid(self):
+
+        self.assertRaises(
+            ParseError,
+            MessagePackParser().parse,
+            io.BytesIO(b'\xc1')
+        )
+
+
+class FastJSONTest(TestCase):
+
+    def setUp(self):
+
+        self.data = [{
+            'id': 1,
+            'name': u'Caf\xe9 \u2028 "quoted"',
+            'created': datetime(2016, 1, 1, 12, 30, tzinfo=timezone.utc),
+            'properties': {
+                'height': Decimal('2.5'),
+                'results': 45.15,
+                'made_by_students': True,
+                'additional_details': None
+            },
+            'measurements': []
+        }]
+
+    def test_get_classes(self):
+
+        self.assertIn(FastJSONRenderer, get_renderer_classes())
+        self.assertNotIn(JSONRenderer, get_renderer_classes())
+        self.assertIn(FastJSONParser, get_parser_classes())
+        self.assertNotIn(JSONParser, get_parser_classes())
+
+    def test_render_same_as_default(self):
+
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data)
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_render_indented(self):
+
+        self.assertEqual(
+            FastJSONRenderer().render(
+                self.data,
+                'application/json; indent=4'
+            ),
+            JSONRenderer().render(self.data, 'application/json; indent=4')
+        )
+
+    def test_parse_same_as_default(self):
+
+        content = JSONRenderer().render(self.data)
+
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(content)),
+            JSONParser().parse(io.BytesIO(content))
+        )
+
+    def test_parse_when_invalid(self):
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": '))
+
+    def test_parse_when_not_compliant(self):
+
+        for content in [b'{"results": NaN}', b'[Infinity]', b'-Infinity']:
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(content))
+
+            # Also when parsed by the standard library
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(
+                    io.BytesIO(content),
+                    parser_context={'encoding': 'latin-1'}
+                )
+
+    def test_parse_when_not_utf8(self):
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name": "\xff"}'))
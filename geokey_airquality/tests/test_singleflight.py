@@ -0,0 +1,195 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from geokey_airquality import singleflight
+from geokey_airquality.changes import DEFAULT_CACHE
+from geokey_airquality.singleflight import (
+    LOCK_KEY,
+    RESULT_KEY,
+    single_flight
+)
+
+
+class CountingLock(object):
+    """A lock counting how many times it was acquired."""
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def __enter__(self):
+
+        self.lock.acquire()
+        self.count += 1
+
+    def __exit__(self, *args):
+
+        self.lock.release()
+
+
+@override_settings(AIRQUALITY_LOCATIONS_CACHE='default')
+class SingleFlightTest(TestCase):
+
+    def setUp(self):
+
+        self.cache = caches['default']
+        self.cache.clear()
+        self.calls = []
+        self.lock = singleflight._lock
+        singleflight._lock = CountingLock()
+
+    def tearDown(self):
+
+        singleflight._lock = self.lock
+
+    def compute(self, result='result'):
+
+        self.calls.append(result)
+        return result
+
+    def wait_for_requests(self, count):
+
+        # Each request takes the lock once, when joining a flight
+        while singleflight._lock.count < count:
+            time.sleep(0.01)
+
+    def test_single_flight(self):
+
+        self.assertEqual(single_flight('key', self.compute), 'result')
+        self.assertEqual(single_flight('key', self.compute), 'result')
+
+        # Results are not kept once shared
+        self.assertEqual(len(self.calls), 2)
+        self.assertNotIn('key', singleflight._flights)
+        self.assertIsNone(self.cache.get(LOCK_KEY % 'key'))
+
+    def test_concurrent_threads(self):
+
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def compute():
+            started.set()
+            release.wait()
+            return self.compute()
+
+        def request():
+            results.append(single_flight('key', compute))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        threads[0].start()
+        started.wait()
+
+        for thread in threads[1:]:
+            thread.start()
+
+        self.wait_for_requests(4)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['result'] * 4)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_concurrent_threads_when_failed(self):
+
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def compute():
+            started.set()
+            release.wait()
+            raise ValueError('Failed')
+
+        def request():
+            try:
+                single_flight('key', compute)
+            except ValueError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+
+        for thread in threads[1:]:
+            thread.start()
+
+        self.wait_for_requests(3)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertNotIn('key', singleflight._flights)
+        self.assertIsNone(self.cache.get(LOCK_KEY % 'key'))
+
+    def test_locked_by_another_process(self):
+
+        self.cache.add(LOCK_KEY % 'key', 'other')
+
+        def finish():
+            time.sleep(0.1)
+            self.cache.set(RESULT_KEY % 'key', ('other', 'shared'))
+            self.cache.delete(LOCK_KEY % 'key')
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        result = single_flight('key', self.compute)
+        thread.join()
+
+        self.assertEqual(result, 'shared')
+        self.assertEqual(len(self.calls), 0)
+
+    def test_locked_by_another_process_when_failed(self):
+
+        self.cache.add(LOCK_KEY % 'key', 'other')
+        self.cache.set(RESULT_KEY % 'key', ('previous', 'outdated'))
+
+        def fail():
+            time.sleep(0.1)
+            self.cache.delete(LOCK_KEY % 'key')
+
+        thread = threading.Thread(target=fail)
+        thread.start()
+        result = single_flight('key', self.compute)
+        thread.join()
+
+        self.assertEqual(result, 'result')
+        self.assertEqual(len(self.calls), 1)
+
+    def test_locked_by_another_process_when_timed_out(self):
+
+        self.cache.add(LOCK_KEY % 'key', 'other')
+
+        self.assertEqual(single_flight('key', self.compute, 0.1), 'result')
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.cache.get(LOCK_KEY % 'key'), 'other')
+
+    @override_settings(AIRQUALITY_LOCATIONS_CACHE=None)
+    def test_single_flight_when_not_cached(self):
+
+        self.assertEqual(single_flight('key', self.compute), 'result')
+        self.assertEqual(len(self.calls), 1)
+
+    @override_settings()
+    def test_single_flight_when_cache_not_shared(self):
+
+        del settings.AIRQUALITY_LOCATIONS_CACHE
+        DEFAULT_CACHE.add(LOCK_KEY % 'key', 'other')
+
+        # Not waiting for other processes, as they can't share the result
+        try:
+            self.assertEqual(single_flight('key', self.compute), 'result')
+        finally:
+            DEFAULT_CACHE.delete(LOCK_KEY % 'key')
+
+        self.assertEqual(len(self.calls), 1)
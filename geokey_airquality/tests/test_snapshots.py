@@ -0,0 +1,222 @@
+import gzip
+import io
+import unittest
+
+from datetime import date
+
+from django.test import TestCase
+from django.utils import six
+
+from geokey.users.tests.model_factories import UserFactory
+from geokey.projects.tests.model_factories import ProjectFactory
+from geokey.categories.tests.model_factories import (
+    CategoryFactory,
+    TextFieldFactory
+)
+
+from geokey_airquality.models import (
+    AirQualityProject,
+    AirQualityCategory,
+    AirQualityField,
+    AirQualityLocation,
+    AirQualityMeasurement,
+    AirQualityMeasurementArchive
+)
+from geokey_airquality.snapshots import (
+    GEOMETRY_TYPE,
+    SnapshotLoad,
+    dump_snapshot,
+    msgpack
+)
+from geokey_airquality.tests.model_factories import (
+    AirQualityProjectFactory,
+    AirQualityCategoryFactory,
+    AirQualityFieldFactory,
+    AirQualityLocationFactory,
+    AirQualityMeasurementFactory
+)
+
+
+@unittest.skipIf(msgpack is None, 'MessagePack is not installed.')
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+
+        self.user = UserFactory.create()
+        self.project = ProjectFactory.create(creator=self.user)
+        aq_project = AirQualityProjectFactory.create(
+            creator=self.user,
+            project=self.project
+        )
+        category = CategoryFactory.create(project=self.project)
+        aq_category = AirQualityCategoryFactory.create(
+            category=category,
+            project=aq_project
+        )
+        AirQualityFieldFactory.create(
+            field=TextFieldFactory.create(category=category),
+            category=aq_category
+        )
+
+        self.location = AirQualityLocationFactory.create(
+            creator=self.user,
+            properties={'height': 2, 'characteristics': 'Road'}
+        )
+        self.measurement = AirQualityMeasurementFactory.create(
+            location=self.location,
+            creator=self.user,
+            barcode='100001',
+            properties={'results': 45.15, 'made_by_students': True}
+        )
+        AirQualityMeasurementArchive.objects.create(
+            id=self.measurement.id + 1000,
+            location=self.location,
+            barcode='100002',
+            creator=self.user,
+            started=self.measurement.started,
+            properties={'results': 12.5},
+            results=12.5,
+            period=date(2015, 1, 1)
+        )
+
+        self.snapshot = io.BytesIO()
+        self.dumped = dump_snapshot(self.snapshot, batch_size=1)
+        self.snapshot.seek(0)
+
+    def delete_all(self):
+
+        AirQualityProject.objects.all().delete()
+        AirQualityMeasurementArchive.objects.all().delete()
+        AirQualityLocation.objects.all().delete()
+
+    def test_dump_and_load(self):
+
+        self.assertEqual(
+            self.dumped['geokey_airquality.airqualitylocation'],
+            1
+        )
+        self.assertEqual(
+            self.dumped['geokey_airquality.airqualitymeasurementarchive'],
+            1
+        )
+
+        self.delete_all()
+        report = SnapshotLoad().run(self.snapshot)
+
+        for label, counts in report.items():
+            self.assertEqual(counts['skipped'], 0, label)
+
+        self.assertEqual(AirQualityProject.objects.get().project, self.project)
+        self.assertEqual(AirQualityCategory.objects.count(), 1)
+        self.assertEqual(AirQualityField.objects.count(), 1)
+
+        location = AirQualityLocation.objects.get()
+        self.assertNotEqual(location.id, self.location.id)
+        self.assertEqual(location.creator, self.user)
+        self.assertEqual(
+            location.geometry.coords,
+            self.location.geometry.coords
+        )
+        self.assertEqual(location.properties, self.location.properties)
+        self.assertEqual(location.characteristics, 'Road')
+
+        measurement = location.measurements.get()
+        self.assertEqual(measurement.started, self.measurement.started)
+        self.assertEqual(measurement.results, 45.15)
+        self.assertEqual(measurement.made_by_students, True)
+
+        archived = AirQualityMeasurementArchive.objects.get()
+        self.assertEqual(archived.location, location)
+        self.assertEqual(archived.period, date(2015, 1, 1))
+        self.assertNotEqual(archived.id, measurement.id)
+
+    def test_dump_types(self):
+
+        with gzip.GzipFile(fileobj=self.snapshot, mode='rb') as gz:
+            chunks = list(msgpack.Unpacker(gz, raw=False))
+
+        self.snapshot.seek(0)
+
+        for key, value in chunks[0].items():
+            self.assertIsInstance(key, six.text_type)
+            self.assertIsInstance(value, (six.text_type, int))
+
+        chunks = dict((chunk['model'], chunk) for chunk in chunks[1:])
+        location = dict(zip(
+            chunks['geokey_airquality.airqualitylocation']['columns'],
+            chunks['geokey_airquality.airqualitylocation']['values']
+        ))
+        archived = dict(zip(
+            chunks['geokey_airquality.airqualitymeasurementarchive'][
+                'columns'],
+            chunks['geokey_airquality.airqualitymeasurementarchive'][
+                'values']
+        ))
+
+        # Text is never packed as binary, geometries are marked
+        for label, chunk in chunks.items():
+            self.assertIsInstance(label, six.text_type)
+
+            for column in chunk['columns']:
+                self.assertIsInstance(column, six.text_type)
+
+        self.assertIsInstance(location['created'][0], six.text_type)
+        self.assertIsInstance(archived['started'][0], six.text_type)
+        self.assertIsInstance(archived['period'][0], six.text_type)
+        self.assertEqual(location['geometry'][0].code, GEOMETRY_TYPE)
+
+    def test_load_when_already_added(self):
+
+        aq_project = AirQualityProject.objects.get()
+        report = SnapshotLoad().run(self.snapshot)
+
+        for label in [
+            'geokey_airquality.airqualityproject',
+            'geokey_airquality.airqualitycategory',
+            'geokey_airquality.airqualityfield'
+        ]:
+            self.assertEqual(report[label]['loaded'], 0, label)
+            self.assertEqual(report[label]['existing'], 1, label)
+
+        self.assertEqual(AirQualityProject.objects.get(), aq_project)
+        self.assertEqual(AirQualityCategory.objects.count(), 1)
+        self.assertEqual(AirQualityField.objects.count(), 1)
+
+        # Locations are added again, with measurements
+        self.assertEqual(AirQualityLocation.objects.count(), 2)
+        self.assertEqual(AirQualityMeasurement.objects.count(), 2)
+
+        # Receivers find the single Air Quality project
+        self.project.delete()
+        self.assertEqual(AirQualityProject.objects.count(), 0)
+
+    def test_load_when_references_missing(self):
+
+        self.delete_all()
+        self.project.name = 'Renamed'
+        self.project.save()
+        self.user.email = 'renamed@example.com'
+        self.user.save()
+
+        report = SnapshotLoad().run(self.snapshot)
+
+        self.assertEqual(
+            report['geokey_airquality.airqualityproject']['skipped'],
+            1
+        )
+        self.assertEqual(
+            report['geokey_airquality.airqualityfield']['skipped'],
+            1
+        )
+        self.assertEqual(AirQualityProject.objects.count(), 0)
+
+        # Users not found are created, with display names kept unique
+        location = AirQualityLocation.objects.get()
+        self.assertNotEqual(location.creator, self.user)
+        self.assertFalse(location.creator.has_usable_password())
+        self.assertEqual(AirQualityMeasurement.objects.count(), 1)
+
+    def test_load_when_not_snapshot(self):
+
+        with self.assertRaises(ValueError):
+            SnapshotLoad().run(io.BytesIO(b'Barcode,Results\n'))
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from geokey.categories.tests.model_factories import CategoryFactory
+from geokey.contributions.tests.model_factories import ObservationFactory
+
+from geokey_airquality.models import (
+    AirQualityMeasurementArchive,
+    AirQualitySummary
+)
+from geokey_airquality.statistics import get_summary, refresh_summary
+from geokey_airquality.tests.model_factories import (
+    AirQualityProjectFactory,
+    AirQualityCategoryFactory,
+    AirQualityMeasurementFactory
+)
+
+
+class RefreshSummaryTest(TestCase):
+
+    def setUp(self):
+
+        started = timezone.make_aware(timezone.datetime(2016, 5, 10))
+
+        self.measurement = AirQualityMeasurementFactory.create(
+            started=started,
+            finished=started + timedelta(days=28),
+            properties={'results': 45.5}
+        )
+        AirQualityMeasurementArchive.objects.create(
+            id=self.measurement.id + 1000,
+            location=self.measurement.location,
+            barcode='100001',
+            creator=self.measurement.creator,
+            started=started - timedelta(days=365),
+            finished=None,
+            properties={},
+            period=date(2015, 5, 1)
+        )
+
+        self.aq_project = AirQualityProjectFactory.create()
+        self.category = CategoryFactory.create(
+            project=self.aq_project.project
+        )
+        AirQualityCategoryFactory.create(
+            category=self.category,
+            project=self.aq_project
+        )
+        ObservationFactory.create_batch(
+            2,
+            project=self.aq_project.project,
+            category=self.category
+        )
+
+        for status in ['draft', 'deleted']:
+            ObservationFactory.create(
+                project=self.aq_project.project,
+                category=self.category,
+                status=status
+            )
+
+    def test_refresh_summary(self):
+
+        summary = refresh_summary()
+
+        self.assertEqual(summary.total_locations, 1)
+        self.assertEqual(summary.total_measurements, 1)
+        self.assertEqual(summary.total_archived, 1)
+        self.assertEqual(summary.bands['2'], 1)
+        self.assertEqual(summary.bands['1'], 0)
+        self.assertEqual(summary.months, {'2016-05': 1, '2015-05': 1})
+        self.assertEqual(
+            summary.get_months(),
+            [('2016-05', 1), ('2015-05', 1)]
+        )
+        self.assertEqual(summary.projects, {str(self.aq_project.id): 2})
+        self.assertEqual(AirQualitySummary.objects.count(), 1)
+
+    def test_get_summary(self):
+
+        summary = get_summary()
+        self.assertIsNone(summary.updated)
+        self.assertEqual(summary.total_measurements, 0)
+
+        refresh_summary()
+        AirQualityMeasurementFactory.create()
+
+        summary = get_summary()
+        self.assertIsNotNone(summary.updated)
+        self.assertEqual(summary.total_measurements, 1)
+
+        # Outdated summaries are served as they are
+        summary.updated = timezone.now() - timedelta(days=1)
+        summary.save()
+        self.assertEqual(get_summary().total_measurements, 1)
+
+    def test_get_summary_when_removed(self):
+
+        AirQualitySummary.objects.all().delete()
+
+        self.assertIsNone(get_summary().updated)
+        self.assertEqual(AirQualitySummary.objects.count(), 1)
@@ -0,0 +1,63 @@
+import json
+
+from django.test import TestCase
+
+from geokey_airquality.models import AirQualityLocation
+from geokey_airquality.streaming import (
+    StreamingJSONResponse,
+    iter_chunks,
+    stream_json
+)
+from geokey_airquality.tests.model_factories import (
+    AirQualityLocationFactory,
+    AirQualityMeasurementFactory
+)
+
+
+class IterChunksTest(TestCase):
+
+    def test_iter_chunks(self):
+
+        locations = AirQualityLocationFactory.create_batch(5)
+
+        for location in locations:
+            AirQualityMeasurementFactory.create(location=location)
+
+        queryset = AirQualityLocation.objects.prefetch_related('measurements')
+
+        # Two queries for each of 3 chunks: locations and their measurements
+        with self.assertNumQueries(6):
+            iterated = [
+                (location.id, len(location.measurements.all()))
+                for location in iter_chunks(queryset, chunk_size=2)
+            ]
+
+        self.assertEqual(
+            iterated,
+            [(location.id, 1) for location in locations]
+        )
+
+    def test_iter_chunks_when_empty(self):
+
+        self.assertEqual(
+            list(iter_chunks(AirQualityLocation.objects.all())),
+            []
+        )
+
+
+class StreamJSONTest(TestCase):
+
+    def test_stream_json(self):
+
+        items = [{'id': 1, 'name': u'Caf\xe9'}, {'id': 2, 'name': None}]
+        content = b''.join(stream_json(iter(items)))
+
+        self.assertEqual(json.loads(content.decode('utf-8')), items)
+        self.assertEqual(b''.join(stream_json([])), b'[]')
+
+    def test_response(self):
+
+        response = StreamingJSONResponse(iter([{'id': 1}]))
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(b''.join(response.streaming_content), b'[{"id":1}]')
@@ -1,5 +1,5 @@
 from django.test import TestCase
-from django.core.urlresolvers import reverse, resolve
+from django.core.urlresolvers import reverse, resolve, Resolver404
 
 from geokey_airquality import views
 
@@ -71,6 +71,53 @@ class UrlPatternsTests(TestCase):
         self.assertEqual(resolved_url.func.func_name, view.__name__)
         self.assertEqual(int(resolved_url.kwargs['project_id']), 1)
 
+    def test_metrics(self):
+
+        reversed_url = reverse('geokey_airquality:metrics')
+        self.assertEqual(reversed_url, '/admin/airquality/metrics/')
+
+        resolved_url = resolve('/admin/airquality/metrics/')
+        view = views.AQMetricsView
+
+        self.assertEqual(resolved_url.func.func_name, view.__name__)
+
+    def test_ajax_projects_structure(self):
+
+        reversed_url = reverse(
+            'geokey_airquality:ajax_projects_structure',
+            kwargs={'project_id': 1}
+        )
+        self.assertEqual(
+            reversed_url,
+            '/ajax/airquality/projects/1/structure/'
+        )
+
+        resolved_url = resolve('/ajax/airquality/projects/1/structure/')
+        view = views.AQProjectsStructureAjaxView
+
+        self.assertEqual(resolved_url.func.func_name, view.__name__)
+        self.assertEqual(int(resolved_url.kwargs['project_id']), 1)
+
+    def test_ajax_barcodes_single(self):
+
+        reversed_url = reverse(
+            'geokey_airquality:ajax_barcodes_single',
+            kwargs={'barcode': 'AQ.100001'}
+        )
+        self.assertEqual(
+            reversed_url,
+            '/ajax/airquality/barcodes/AQ.100001/'
+        )
+
+        resolved_url = resolve('/ajax/airquality/barcodes/AQ.100001/')
+        view = views.AQBarcodesSingleAjaxView
+
+        self.assertEqual(resolved_url.func.func_name, view.__name__)
+        self.assertEqual(resolved_url.kwargs['barcode'], 'AQ.100001')
+
+        with self.assertRaises(Resolver404):
+            resolve('/ajax/airquality/barcodes/%s/' % ('1' * 26))
+
     def test_api_sheet(self):
 
         reversed_url = reverse('geokey_airquality:api_sheet')
@@ -1,15 +1,23 @@
+import io
+import gzip
 import json
+import calendar
 import collections
 import operator
+import unittest
 
 from datetime import timedelta
 
 from django.core import mail
-from django.http import HttpRequest
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpRequest, QueryDict
 from django.template.loader import render_to_string
-from django.utils import timezone
-from django.test import TestCase
+from django.utils import six, timezone
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.gis.geos import Point
 from django.contrib.messages import get_messages
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sites.shortcuts import get_current_site
@@ -31,12 +39,20 @@ from geokey.categories.tests.model_factories import (
 from geokey.contributions.models import Location, Observation
 
 from geokey_airquality import views
+from geokey_airquality.changes import (
+    get_cached_response,
+    get_locations_cache
+)
+from geokey_airquality.instrumentation import registry
+from geokey_airquality.renderers import msgpack
+from geokey_airquality.singleflight import LOCK_KEY, RESULT_KEY
 from geokey_airquality.models import (
     AirQualityProject,
     AirQualityCategory,
     AirQualityField,
     AirQualityLocation,
-    AirQualityMeasurement
+    AirQualityMeasurement,
+    AirQualitySummary
 )
 from geokey_airquality.tests.model_factories import (
     AirQualityProjectFactory,
@@ -54,6 +70,22 @@ permission_denied = 'Managing Air Quality is for superusers only.'
 # ADMIN PAGES
 # ###########################
 
+def get_configuration_data(project):
+    """Create a category and fields for all types, return the POST data."""
+    data = QueryDict('', mutable=True)
+    data['project'] = str(project.id)
+
+    for key in sorted(dict(AirQualityCategory.TYPES).keys()):
+        category = CategoryFactory.create(project=project)
+        data[key] = str(category.id)
+
+        for field_key, field_type in AirQualityField.TYPES:
+            field = TextFieldFactory.create(category=category)
+            data.appendlist(field_key, str(field.id))
+
+    return data
+
+
 class AQIndexViewTest(TestCase):
 
     def setUp(self):
@@ -107,6 +139,7 @@ class AQIndexViewTest(TestCase):
         self.request.user = self.superuser
         response = self.view(self.request).render()
 
+        self.project.contributions = 0
         rendered = render_to_string(
             self.template,
             {
@@ -114,6 +147,7 @@ class AQIndexViewTest(TestCase):
                 'GEOKEY_VERSION': version.get_version(),
                 'user': self.request.user,
                 'projects': [self.project],
+                'summary': AirQualitySummary.objects.get(pk=1),
                 'total_locations': 0,
                 'total_measurements': 0
             }
@@ -155,6 +189,81 @@ class AQExportViewTest(TestCase):
         response = self.view(self.request, file='measurements')
 
         self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'Barcode,')
+        )
+
+    def test_get_all_with_superuser(self):
+
+        self.request.user = self.superuser
+        response = self.view(self.request, file='all')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn(
+            'Submitted to',
+            b''.join(response.streaming_content).decode('utf-8')
+        )
+
+
+class AQMetricsViewTest(TestCase):
+
+    def setUp(self):
+
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.user = UserFactory.create(**{'is_superuser': False})
+        self.anonym = AnonymousUser()
+
+        self.view = views.AQMetricsView.as_view()
+        self.request = HttpRequest()
+        self.request.method = 'GET'
+
+        registry.reset()
+        registry.observe('sql_queries', 3, view='api_sheet', method='GET')
+
+    def tearDown(self):
+
+        registry.reset()
+
+    def test_get_with_anonymous(self):
+
+        self.request.user = self.anonym
+        response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_user(self):
+
+        self.request.user = self.user
+        response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(AIRQUALITY_METRICS_TOKEN='secret')
+    def test_get_with_token(self):
+
+        self.request.user = self.anonym
+        self.request.META['HTTP_AUTHORIZATION'] = 'Bearer wrong'
+        response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 403)
+
+        self.request.META['HTTP_AUTHORIZATION'] = 'Bearer secret'
+        response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_with_superuser(self):
+
+        self.request.user = self.superuser
+        response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'airquality_sql_queries_count{method="GET",view="api_sheet"} 1',
+            response.content.decode('utf-8')
+        )
 
 
 class AQAddViewTest(TestCase):
@@ -382,6 +491,45 @@ class AQAddViewTest(TestCase):
         response = render_helpers.remove_csrf(response.content.decode('utf-8'))
         self.assertEqual(response, rendered)
 
+    def test_post_with_superuser(self):
+
+        self.request.user = self.superuser
+        self.request.method = 'POST'
+        self.request.POST = get_configuration_data(self.project)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.view(self.request)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(AirQualityProject.objects.count(), 1)
+        self.assertEqual(AirQualityCategory.objects.count(), 5)
+        self.assertEqual(AirQualityField.objects.count(), 55)
+        self.assertEqual(
+            Project.objects.get(pk=self.project.id).islocked,
+            True
+        )
+
+    def test_post_when_field_not_found(self):
+
+        self.request.user = self.superuser
+        self.request.method = 'POST'
+        self.request.POST = get_configuration_data(self.project)
+        self.request.POST.setlist(
+            'height',
+            self.request.POST.getlist('height')[:4] + ['158']
+        )
+        response = self.view(self.request).render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AirQualityProject.objects.count(), 0)
+        self.assertEqual(AirQualityCategory.objects.count(), 0)
+        self.assertEqual(AirQualityField.objects.count(), 0)
+        self.assertEqual(
+            Project.objects.get(pk=self.project.id).islocked,
+            False
+        )
+
 
 class AQProjectViewTest(TestCase):
 
@@ -721,6 +869,58 @@ class AQProjectViewTest(TestCase):
         response = render_helpers.remove_csrf(response.content.decode('utf-8'))
         self.assertEqual(response, rendered)
 
+    def test_post_with_superuser(self):
+
+        self.request.user = self.superuser
+        self.request.method = 'POST'
+        self.request.POST = get_configuration_data(self.project)
+        response = self.view(self.request, project_id=self.aq_project.id)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(AirQualityCategory.objects.count(), 5)
+        self.assertEqual(AirQualityField.objects.count(), 55)
+
+        field = TextFieldFactory.create(
+            category=Category.objects.get(pk=self.request.POST['5'])
+        )
+        self.request.POST.setlist(
+            'results',
+            self.request.POST.getlist('results')[:4] + [str(field.id)]
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.view(self.request, project_id=self.aq_project.id)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(AirQualityCategory.objects.count(), 5)
+        self.assertEqual(AirQualityField.objects.count(), 55)
+        self.assertEqual(
+            AirQualityField.objects.get(
+                category__type='100+',
+                type='01. Results'
+            ).field_id,
+            field.id
+        )
+
+    def test_post_when_category_not_found(self):
+
+        self.request.user = self.superuser
+        self.request.method = 'POST'
+        self.request.POST = get_configuration_data(self.project)
+        self.view(self.request, project_id=self.aq_project.id)
+
+        self.request.POST['3'] = '158'
+        response = self.view(
+            self.request,
+            project_id=self.aq_project.id
+        ).render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AirQualityProject.objects.count(), 1)
+        self.assertEqual(AirQualityCategory.objects.count(), 5)
+        self.assertEqual(AirQualityField.objects.count(), 55)
+
 
 class AQRemoveViewTest(TestCase):
 
@@ -926,6 +1126,121 @@ class AQProjectsSingleAjaxViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class AQProjectsStructureAjaxViewTest(TestCase):
+
+    def setUp(self):
+
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.user = UserFactory.create(**{'is_superuser': False})
+        self.anonym = AnonymousUser()
+
+        self.project = ProjectFactory.create()
+        self.category = CategoryFactory.create(project=self.project)
+        self.text_field = TextFieldFactory.create(category=self.category)
+        self.lookup_field = LookupFieldFactory.create(category=self.category)
+        self.lookup_value = LookupValueFactory.create(
+            field=self.lookup_field,
+            name='Yes'
+        )
+        CategoryFactory.create(project=self.project, status='inactive')
+
+        self.url = '/ajax/airquality/projects/%s/structure/' % (
+            self.project.id
+        )
+
+        self.factory = APIRequestFactory()
+        self.request_get = self.factory.get(self.url)
+        self.view = views.AQProjectsStructureAjaxView.as_view()
+
+    def test_get_with_anonymous(self):
+
+        force_authenticate(self.request_get, user=self.anonym)
+        response = self.view(
+            self.request_get,
+            project_id=self.project.id
+        ).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_user(self):
+
+        force_authenticate(self.request_get, user=self.user)
+        response = self.view(
+            self.request_get,
+            project_id=self.project.id
+        ).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_superuser(self):
+
+        force_authenticate(self.request_get, user=self.superuser)
+        response = self.view(
+            self.request_get,
+            project_id=self.project.id
+        ).render()
+        structure = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(structure['id'], self.project.id)
+        self.assertEqual(len(structure['categories']), 1)
+        self.assertEqual(
+            sorted(
+                (field['id'], field['fieldtype'])
+                for field in structure['categories'][0]['fields']
+            ),
+            sorted([
+                (self.text_field.id, 'TextField'),
+                (self.lookup_field.id, 'LookupField')
+            ])
+        )
+
+        request = self.factory.get(
+            self.url,
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        force_authenticate(request, user=self.superuser)
+        response = self.view(request, project_id=self.project.id).render()
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_when_field_changed(self):
+
+        force_authenticate(self.request_get, user=self.superuser)
+        response = self.view(
+            self.request_get,
+            project_id=self.project.id
+        ).render()
+        etag = response['ETag']
+
+        self.text_field.name = 'Changed'
+        self.text_field.save()
+
+        request = self.factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.superuser)
+        response = self.view(request, project_id=self.project.id).render()
+        structure = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(
+            'Changed',
+            [field['name'] for field in structure['categories'][0]['fields']]
+        )
+
+    def test_get_when_project_marked_as_inactive(self):
+
+        self.project.status = 'inactive'
+        self.project.save()
+        force_authenticate(self.request_get, user=self.superuser)
+        response = self.view(
+            self.request_get,
+            project_id=self.project.id
+        ).render()
+
+        self.assertEqual(response.status_code, 404)
+
+
 class AQCategoriesSingleAjaxViewTest(TestCase):
 
     def setUp(self):
@@ -1060,38 +1375,34 @@ class AQCategoriesSingleAjaxViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
-# ###########################
-# PUBLIC API
-# ###########################
-
-class AQSheetAPIViewTest(TestCase):
+class AQBarcodesAjaxViewTest(TestCase):
 
     def setUp(self):
 
-        self.creator = UserFactory.create()
-        self.user = UserFactory.create()
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.user = UserFactory.create(**{'is_superuser': False})
         self.anonym = AnonymousUser()
 
-        self.url = '/api/airquality/sheet/'
+        self.url = '/ajax/airquality/barcodes/'
+        self.data = {'barcodes': ['100001', 100002, '100003', '100001']}
+
         self.factory = APIRequestFactory()
         self.request_get = self.factory.get(self.url)
-        self.view = views.AQSheetAPIView.as_view()
-
-        self.location_1 = AirQualityLocationFactory.create(
-            creator=self.creator
-        )
-        self.location_2 = AirQualityLocationFactory.create(
-            creator=UserFactory.create()
+        self.request_post = self.factory.post(
+            self.url,
+            json.dumps(self.data),
+            content_type='application/json'
         )
+        self.view = views.AQBarcodesAjaxView.as_view()
 
-        AirQualityMeasurementFactory.create(
-            location=self.location_1,
-            creator=self.location_1.creator,
-            finished=timezone.now()
+        self.measurement_1 = AirQualityMeasurementFactory.create(
+            barcode='100001'
         )
-        AirQualityMeasurementFactory.create(
-            location=self.location_1,
-            creator=self.location_1.creator
+        self.measurement_2 = AirQualityMeasurementFactory.create(
+            barcode='100002'
+        )
+        self.measurement_3 = AirQualityMeasurementFactory.create(
+            barcode='100002'
         )
 
     def test_get_with_anonymous(self):
@@ -1106,35 +1417,293 @@ class AQSheetAPIViewTest(TestCase):
         force_authenticate(self.request_get, user=self.user)
         response = self.view(self.request_get).render()
 
-        self.assertEqual(response.status_code, 204)
-        self.assertEquals(len(mail.outbox), 1)
+        self.assertEqual(response.status_code, 403)
 
-    def test_get_with_creator(self):
+    def test_get_with_superuser(self):
 
-        force_authenticate(self.request_get, user=self.creator)
+        force_authenticate(self.request_get, user=self.superuser)
         response = self.view(self.request_get).render()
+        duplicates = json.loads(response.content)
 
-        self.assertEqual(response.status_code, 204)
-        self.assertEquals(len(mail.outbox), 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(duplicates, [{'barcode': '100002', 'total': 2}])
 
+    def test_post_with_anonymous(self):
 
-class AQProjectsAPIViewTest(TestCase):
+        force_authenticate(self.request_post, user=self.anonym)
+        response = self.view(self.request_post).render()
 
-    def setUp(self):
+        self.assertEqual(response.status_code, 403)
 
-        self.contributor = UserFactory.create()
-        self.user = UserFactory.create()
-        self.anonym = AnonymousUser()
+    def test_post_with_user(self):
 
-        self.url = '/api/airquality/projects/'
-        self.factory = APIRequestFactory()
-        self.request_get = self.factory.get(self.url)
-        self.view = views.AQProjectsAPIView.as_view()
+        force_authenticate(self.request_post, user=self.user)
+        response = self.view(self.request_post).render()
 
-        self.project_1 = ProjectFactory.create(
-            add_contributors=[self.contributor]
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_with_superuser(self):
+
+        force_authenticate(self.request_post, user=self.superuser)
+        response = self.view(self.request_post).render()
+        lookup = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(lookup['measurements']), 3)
+        self.assertEqual(
+            lookup['measurements']['100001'][0]['id'],
+            self.measurement_1.id
         )
-        self.project_2 = ProjectFactory.create(
+        self.assertEqual(
+            lookup['measurements']['100001'][0]['location']['id'],
+            self.measurement_1.location.id
+        )
+        self.assertEqual(len(lookup['measurements']['100002']), 2)
+        self.assertEqual(lookup['missing'], ['100003'])
+        self.assertEqual(lookup['duplicates'], ['100002'])
+
+    def test_post_when_barcodes_not_list(self):
+
+        self.request_post = self.factory.post(
+            self.url,
+            json.dumps({'barcodes': '100001'}),
+            content_type='application/json'
+        )
+        force_authenticate(self.request_post, user=self.superuser)
+        response = self.view(self.request_post).render()
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_when_barcode_not_valid(self):
+
+        self.request_post = self.factory.post(
+            self.url,
+            json.dumps({'barcodes': ['100001', '1' * 26]}),
+            content_type='application/json'
+        )
+        force_authenticate(self.request_post, user=self.superuser)
+        response = self.view(self.request_post).render()
+
+        self.assertEqual(response.status_code, 400)
+
+
+class AQBarcodesSingleAjaxViewTest(TestCase):
+
+    def setUp(self):
+
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.user = UserFactory.create(**{'is_superuser': False})
+        self.anonym = AnonymousUser()
+
+        self.measurement = AirQualityMeasurementFactory.create(
+            barcode='100001'
+        )
+
+        self.url = '/ajax/airquality/barcodes/%s/' % self.measurement.barcode
+
+        self.factory = APIRequestFactory()
+        self.request_get = self.factory.get(self.url)
+        self.view = views.AQBarcodesSingleAjaxView.as_view()
+
+    def test_get_with_anonymous(self):
+
+        force_authenticate(self.request_get, user=self.anonym)
+        response = self.view(
+            self.request_get,
+            barcode=self.measurement.barcode
+        ).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_user(self):
+
+        force_authenticate(self.request_get, user=self.user)
+        response = self.view(
+            self.request_get,
+            barcode=self.measurement.barcode
+        ).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_superuser(self):
+
+        force_authenticate(self.request_get, user=self.superuser)
+        response = self.view(
+            self.request_get,
+            barcode=self.measurement.barcode
+        ).render()
+        measurements = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(measurements), 1)
+        self.assertEqual(measurements[0]['id'], self.measurement.id)
+
+    def test_get_when_no_measurement(self):
+
+        force_authenticate(self.request_get, user=self.superuser)
+        response = self.view(
+            self.request_get,
+            barcode='999999'
+        ).render()
+
+        self.assertEqual(response.status_code, 404)
+
+
+class AQResultsAjaxViewTest(TestCase):
+
+    def setUp(self):
+
+        self.superuser = UserFactory.create(**{'is_superuser': True})
+        self.user = UserFactory.create(**{'is_superuser': False})
+        self.anonym = AnonymousUser()
+
+        self.measurement = AirQualityMeasurementFactory.create(
+            barcode='100001'
+        )
+
+        self.url = '/ajax/airquality/results/'
+        self.factory = APIRequestFactory()
+        self.view = views.AQResultsAjaxView.as_view()
+
+    def get_request(self, data):
+
+        return self.factory.post(self.url, data, format='multipart')
+
+    def get_file(self):
+
+        return SimpleUploadedFile(
+            'results.csv',
+            'Barcode,Results\n100001,45.15\n100002,12\n',
+            content_type='text/csv'
+        )
+
+    def test_post_with_anonymous(self):
+
+        request = self.get_request({'file': self.get_file()})
+        force_authenticate(request, user=self.anonym)
+        response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_with_user(self):
+
+        request = self.get_request({'file': self.get_file()})
+        force_authenticate(request, user=self.user)
+        response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_with_superuser(self):
+
+        request = self.get_request({'file': self.get_file()})
+        force_authenticate(request, user=self.superuser)
+        response = self.view(request).render()
+        report = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(report['updated'], 1)
+        self.assertEqual(report['unmatched'], [
+            {'line': 3, 'barcode': '100002'}
+        ])
+        self.assertEqual(
+            AirQualityMeasurement.objects.get(
+                pk=self.measurement.id).properties['results'],
+            45.15
+        )
+
+    def test_post_when_no_file(self):
+
+        request = self.get_request({})
+        force_authenticate(request, user=self.superuser)
+        response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_when_no_project(self):
+
+        request = self.get_request({'file': self.get_file(), 'project': 158})
+        force_authenticate(request, user=self.superuser)
+        response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 404)
+
+
+# ###########################
+# PUBLIC API
+# ###########################
+
+class AQSheetAPIViewTest(TestCase):
+
+    def setUp(self):
+
+        self.creator = UserFactory.create()
+        self.user = UserFactory.create()
+        self.anonym = AnonymousUser()
+
+        self.url = '/api/airquality/sheet/'
+        self.factory = APIRequestFactory()
+        self.request_get = self.factory.get(self.url)
+        self.view = views.AQSheetAPIView.as_view()
+
+        self.location_1 = AirQualityLocationFactory.create(
+            creator=self.creator
+        )
+        self.location_2 = AirQualityLocationFactory.create(
+            creator=UserFactory.create()
+        )
+
+        AirQualityMeasurementFactory.create(
+            location=self.location_1,
+            creator=self.location_1.creator,
+            finished=timezone.now()
+        )
+        AirQualityMeasurementFactory.create(
+            location=self.location_1,
+            creator=self.location_1.creator
+        )
+
+    def test_get_with_anonymous(self):
+
+        force_authenticate(self.request_get, user=self.anonym)
+        response = self.view(self.request_get).render()
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_user(self):
+
+        force_authenticate(self.request_get, user=self.user)
+        response = self.view(self.request_get).render()
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEquals(len(mail.outbox), 1)
+
+    def test_get_with_creator(self):
+
+        force_authenticate(self.request_get, user=self.creator)
+        response = self.view(self.request_get).render()
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEquals(len(mail.outbox), 1)
+
+
+class AQProjectsAPIViewTest(TestCase):
+
+    def setUp(self):
+
+        self.contributor = UserFactory.create()
+        self.user = UserFactory.create()
+        self.anonym = AnonymousUser()
+
+        self.url = '/api/airquality/projects/'
+        self.factory = APIRequestFactory()
+        self.request_get = self.factory.get(self.url)
+        self.view = views.AQProjectsAPIView.as_view()
+        get_locations_cache().clear()
+
+        self.project_1 = ProjectFactory.create(
+            add_contributors=[self.contributor]
+        )
+        self.project_2 = ProjectFactory.create(
             add_contributors=[self.contributor]
         )
         self.project_3 = ProjectFactory.create(
@@ -1189,6 +1758,82 @@ class AQProjectsAPIViewTest(TestCase):
         self.assertEqual(len(projects), 1)
         self.assertEqual(AirQualityProject.objects.count(), 2)
 
+    def test_get_when_everyone_contributes(self):
+
+        self.project_1.everyone_contributes = 'auth'
+        self.project_1.save()
+
+        force_authenticate(self.request_get, user=self.user)
+        response = self.view(self.request_get).render()
+        projects = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(projects), 1)
+        self.assertEqual(projects[0]['id'], self.project_1.id)
+
+    @override_settings(AIRQUALITY_LOCATIONS_CACHE='default')
+    def test_get_when_queried_by_another_process(self):
+
+        self.project_1.everyone_contributes = 'false'
+        cache = get_locations_cache()
+        cache.add(LOCK_KEY % 'projects', 'other')
+        cache.set(RESULT_KEY % 'projects', ('other', [
+            (self.project_1, set(), set()),
+            (self.project_3, set(), set([self.contributor.id]))
+        ]))
+        self.addCleanup(cache.clear)
+
+        force_authenticate(self.request_get, user=self.contributor)
+        response = self.view(self.request_get).render()
+        projects = json.loads(response.content)
+
+        # Projects queried by the other process are shared, filtered for
+        # the user
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(projects), 1)
+        self.assertEqual(projects[0]['id'], self.project_3.id)
+
+    def test_get_when_not_modified(self):
+
+        force_authenticate(self.request_get, user=self.contributor)
+        response = self.view(self.request_get).render()
+        etag = response['ETag']
+
+        request = self.factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.contributor)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.project_1.name = 'Renamed'
+        self.project_1.save()
+
+        request = self.factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.contributor)
+        response = self.view(request).render()
+        projects = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(projects[0]['name'], 'Renamed')
+
+    def test_get_when_cached(self):
+
+        force_authenticate(self.request_get, user=self.contributor)
+        response = self.view(self.request_get).render()
+
+        self.assertIsNotNone(get_cached_response(response['ETag']))
+
+        request = self.factory.get(self.url)
+        force_authenticate(request, user=self.contributor)
+        cached = self.view(request)
+
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+
 
 class AQLocationsAPIViewTest(TestCase):
 
@@ -1219,6 +1864,7 @@ class AQLocationsAPIViewTest(TestCase):
             content_type='application/json'
         )
         self.view = views.AQLocationsAPIView.as_view()
+        get_locations_cache().clear()
 
         self.location_1 = AirQualityLocationFactory.create(
             creator=self.creator
@@ -1253,6 +1899,59 @@ class AQLocationsAPIViewTest(TestCase):
         self.assertEqual(len(locations), 1)
         self.assertEqual(len(locations[0]['measurements']), 0)
 
+    def test_get_when_streaming(self):
+
+        AirQualityMeasurementFactory.create(
+            location=self.location_1,
+            creator=self.creator
+        )
+        AirQualityLocationFactory.create(creator=self.creator)
+
+        force_authenticate(self.request_get, user=self.creator)
+        rendered = json.loads(self.view(self.request_get).render().content)
+
+        request = self.factory.get(self.url, {'stream': 'true'})
+        force_authenticate(request, user=self.creator)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('ETag', response)
+
+        locations = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual(
+            sorted(locations, key=lambda location: location['id']),
+            sorted(rendered, key=lambda location: location['id'])
+        )
+        self.assertEqual(len(locations[0]['measurements']), 1)
+
+    def test_get_with_precision(self):
+
+        self.location_1.geometry = Point(-0.1234567, 51.7654321)
+        self.location_1.save()
+
+        force_authenticate(self.request_get, user=self.creator)
+        response = self.view(self.request_get).render()
+        locations = json.loads(response.content)
+
+        self.assertEqual(
+            locations[0]['geometry'],
+            {'type': 'Point', 'coordinates': [-0.1234567, 51.7654321]}
+        )
+
+        request = self.factory.get(self.url, {'precision': 3})
+        force_authenticate(request, user=self.creator)
+        response = self.view(request).render()
+        locations = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            locations[0]['geometry'],
+            {'type': 'Point', 'coordinates': [-0.123, 51.765]}
+        )
+
     def test_get_together_with_measurements(self):
 
         AirQualityMeasurementFactory.create(
@@ -1288,6 +1987,178 @@ class AQLocationsAPIViewTest(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(AirQualityLocation.objects.count(), 3)
 
+    def test_get_when_not_modified(self):
+
+        force_authenticate(self.request_get, user=self.creator)
+        response = self.view(self.request_get).render()
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        request = self.factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.creator)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Dates can't tell changes made within the same second apart
+        request = self.factory.get(
+            self.url,
+            HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        force_authenticate(request, user=self.creator)
+        response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], last_modified)
+
+        request = self.factory.get(
+            self.url,
+            {'precision': 3},
+            HTTP_IF_NONE_MATCH=etag
+        )
+        force_authenticate(request, user=self.creator)
+        response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_when_cached(self):
+
+        force_authenticate(self.request_get, user=self.creator)
+        response = self.view(self.request_get).render()
+        content = response.content
+
+        request = self.factory.get(self.url)
+        force_authenticate(request, user=self.creator)
+
+        with self.assertNumQueries(1):
+            response = self.view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, content)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_get_when_compressed(self):
+
+        AirQualityMeasurementFactory.create_batch(
+            5,
+            location=self.location_1,
+            creator=self.creator
+        )
+
+        force_authenticate(self.request_get, user=self.creator)
+        content = self.view(self.request_get).render().content
+
+        for cached in [False, True]:
+            request = self.factory.get(
+                self.url,
+                HTTP_ACCEPT_ENCODING='gzip, deflate'
+            )
+            force_authenticate(request, user=self.creator)
+            response = self.view(request)
+
+            if not cached:
+                response = response.render()
+
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertTrue(response['ETag'].startswith('W/'))
+            self.assertEqual(
+                gzip.GzipFile(fileobj=io.BytesIO(response.content)).read(),
+                content
+            )
+
+    @override_settings(AIRQUALITY_LOCATIONS_CACHE=None)
+    def test_get_when_not_cached(self):
+
+        force_authenticate(self.request_get, user=self.creator)
+        self.view(self.request_get).render()
+
+        request = self.factory.get(self.url)
+        force_authenticate(request, user=self.creator)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.view(request).render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(queries), 1)
+
+    def test_get_when_changed(self):
+
+        force_authenticate(self.request_get, user=self.creator)
+        response = self.view(self.request_get).render()
+        etag = response['ETag']
+
+        force_authenticate(self.request_post, user=self.creator)
+        self.view(self.request_post).render()
+
+        request = self.factory.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.creator)
+        response = self.view(request).render()
+        locations = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(locations), 2)
+
+    @unittest.skipIf(msgpack is None, 'MessagePack is not installed.')
+    def test_get_with_msgpack(self):
+
+        AirQualityMeasurementFactory.create(
+            location=self.location_1,
+            creator=self.location_1.creator
+        )
+
+        request = self.factory.get(self.url, HTTP_ACCEPT='application/msgpack')
+        force_authenticate(request, user=self.creator)
+        response = self.view(request).render()
+        locations = msgpack.unpackb(response.content, raw=False)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(len(locations), 1)
+        self.assertTrue(
+            all(isinstance(key, six.text_type) for key in locations[0])
+        )
+        self.assertIsInstance(locations[0]['name'], six.text_type)
+        self.assertEqual(
+            locations[0]['created'],
+            calendar.timegm(self.location_1.created.utctimetuple())
+        )
+        self.assertEqual(
+            locations[0]['measurements'][0]['started'],
+            calendar.timegm(
+                self.location_1.measurements.get().started.utctimetuple()
+            )
+        )
+
+    @unittest.skipIf(msgpack is None, 'MessagePack is not installed.')
+    def test_post_with_msgpack(self):
+
+        created = timezone.now() - timedelta(hours=1)
+        data = dict(self.data, **{
+            'created': calendar.timegm(created.utctimetuple()),
+            'called': calendar.timegm(timezone.now().utctimetuple())
+        })
+
+        request = self.factory.post(
+            self.url,
+            msgpack.packb(data, use_bin_type=True),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack'
+        )
+        force_authenticate(request, user=self.user)
+        response = self.view(request).render()
+        location = msgpack.unpackb(response.content, raw=False)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(location['name'], 'Test Location')
+        self.assertAlmostEqual(
+            location['created'],
+            calendar.timegm(created.utctimetuple()),
+            delta=5
+        )
+
 
 class AQLocationsSingleAPIViewTest(TestCase):
 
@@ -1635,6 +2506,33 @@ class AQMeasurementsAPIViewTest(TestCase):
         self.assertEqual(Location.objects.count(), 1)
         self.assertEqual(Observation.objects.count(), 1)
 
+    def test_post_when_submitting_and_students_field_not_lookup(self):
+
+        self.aq_field_11.field = TextFieldFactory.create(
+            category=self.category
+        )
+        self.aq_field_11.save()
+
+        self.data['finished'] = timezone.now().isoformat()
+        self.data['project'] = self.project.id
+        self.data['properties'] = {'results': 48.05}
+
+        self.request_post = self.factory.post(
+            self.url,
+            json.dumps(self.data),
+            content_type='application/json'
+        )
+        force_authenticate(self.request_post, user=self.creator)
+        response = self.view(
+            self.request_post,
+            location_id=self.location.id
+        ).render()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AirQualityMeasurement.objects.count(), 1)
+        self.assertEqual(Location.objects.count(), 0)
+        self.assertEqual(Observation.objects.count(), 0)
+
     def test_post_when_no_location(self):
 
         AirQualityLocation.objects.get(pk=self.location.id).delete()
@@ -35,6 +35,9 @@ urlpatterns = [
     url(r'^admin/airquality/(?P<project_id>[0-9]+)/remove/$',
         views.AQRemoveView.as_view(),
         name='remove'),
+    url(r'^admin/airquality/metrics/$',
+        views.AQMetricsView.as_view(),
+        name='metrics'),
 
     # ###########################
     # ADMIN AJAX
@@ -44,11 +47,27 @@ urlpatterns = [
         r'projects/(?P<project_id>[0-9]+)/$',
         views.AQProjectsSingleAjaxView.as_view(),
         name='ajax_projects_single'),
+    url(r'^ajax/airquality/'
+        r'projects/(?P<project_id>[0-9]+)/structure/$',
+        views.AQProjectsStructureAjaxView.as_view(),
+        name='ajax_projects_structure'),
     url(r'^ajax/airquality/'
         r'projects/(?P<project_id>[0-9]+)/'
         r'categories/(?P<category_id>[0-9]+)/$',
         views.AQCategoriesSingleAjaxView.as_view(),
         name='ajax_categories_single'),
+    url(r'^ajax/airquality/'
+        r'barcodes/$',
+        views.AQBarcodesAjaxView.as_view(),
+        name='ajax_barcodes'),
+    url(r'^ajax/airquality/'
+        r'barcodes/(?P<barcode>%s)/$' % views.BARCODE_PATTERN,
+        views.AQBarcodesSingleAjaxView.as_view(),
+        name='ajax_barcodes_single'),
+    url(r'^ajax/airquality/'
+        r'results/$',
+        views.AQResultsAjaxView.as_view(),
+        name='ajax_results'),
 
     # ###########################
     # PUBLIC API
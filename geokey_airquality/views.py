@@ -3,19 +3,26 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import calendar
 import collections
 import operator
 import csv
+import re
 import StringIO
 
 from django.conf import settings
 from django.core import mail
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
+from django.db import connection, transaction
+from django.db.models import Count, prefetch_related_objects
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.views.generic import View, TemplateView
 from django.template.defaultfilters import date as filter_date
 from django.shortcuts import redirect
-from django.utils import timezone, dateformat
+from django.utils import six, timezone, dateformat
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
 from django.contrib import messages
 
 from rest_framework import status
@@ -24,11 +31,12 @@ from rest_framework.response import Response
 from braces.views import LoginRequiredMixin
 
 from geokey.core.decorators import handle_exceptions_for_ajax
+from geokey.core.exceptions import MalformedRequestData
 from geokey.projects.models import Project
 from geokey.projects.serializers import ProjectSerializer
 from geokey.categories.models import Category, Field
 from geokey.categories.serializers import CategorySerializer
-from geokey.contributions.serializers import ContributionSerializer
+from geokey.users.models import UserGroup
 from geokey.extensions.mixins import SuperuserMixin
 
 from geokey_airquality.models import (
@@ -38,14 +46,94 @@ from geokey_airquality.models import (
     AirQualityLocation,
     AirQualityMeasurement
 )
+from geokey_airquality.imports import ResultsImport
+from geokey_airquality.changes import (
+    get_etag,
+    get_locations_changed,
+    get_cached_locations,
+    get_cached_response,
+    cache_locations,
+    cache_response,
+    touch_locations
+)
+from geokey_airquality.compression import encode_response
+from geokey_airquality.exports import open_export, stream_unified
+from geokey_airquality.instrumentation import registry
+from geokey_airquality.parsers import get_parser_classes
+from geokey_airquality.renderers import get_renderer_classes
+from geokey_airquality.singleflight import single_flight
 from geokey_airquality.serializers import (
     LocationSerializer,
     MeasurementSerializer
 )
+from geokey_airquality.statistics import get_summary
+from geokey_airquality.streaming import StreamingJSONResponse, iter_chunks
+from geokey_airquality.structure import get_structure
+from geokey_airquality.submissions import submit_measurement
 
 
 permission_denied = 'Managing Air Quality is for superusers only.'
 
+# Barcodes fit the measurement field and can be used in URLs
+BARCODE_PATTERN = r'[^/]{1,25}'
+BARCODE = re.compile(r'^%s$' % BARCODE_PATTERN)
+
+
+def get_id(value):
+    """Convert value to an ID, or return None when it is not a number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_precision(value):
+    """
+    Convert value to a number of decimal places for coordinates, or return
+    None when it is not set or not valid.
+    """
+    precision = get_id(value)
+
+    if precision is None or precision < 0:
+        return None
+
+    return min(precision, 15)
+
+
+def update_foreign_keys(model, column, instances):
+    """
+    Updates a foreign key column of all instances in a single query.
+
+    Parameters
+    ----------
+    model : django.db.models.Model
+        Model of the instances.
+    column : str
+        Name of the foreign key column.
+    instances : list
+        Instances with the new value set.
+    """
+    if not instances:
+        return
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    sql = (
+        'UPDATE {table} SET {column} = v.value '
+        'FROM (VALUES {values}) AS v (id, value) '
+        'WHERE {table}.id = v.id'
+    ).format(
+        table=table,
+        column=connection.ops.quote_name(column),
+        values=', '.join(['(%s, %s)'] * len(instances))
+    )
+    params = []
+
+    for instance in instances:
+        params.extend([instance.pk, getattr(instance, column)])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
 
 # ###########################
 # ADMIN PAGES
@@ -62,22 +150,66 @@ class AQIndexView(LoginRequiredMixin, SuperuserMixin, TemplateView):
         GET method for the template.
 
         Return the context to render the view. Overwrite the method by adding
-        all Air Quality projects to the context.
+        all Air Quality projects and the stored statistics to the context.
 
         Returns
         -------
         dict
             Context.
         """
+        summary = get_summary()
+        projects = list(
+            AirQualityProject.objects.select_related('project', 'creator')
+        )
+
+        for project in projects:
+            project.contributions = summary.projects.get(str(project.id), 0)
+
         return super(AQIndexView, self).get_context_data(
-            projects=AirQualityProject.objects.all(),
-            total_locations=AirQualityLocation.objects.count(),
-            total_measurements=AirQualityMeasurement.objects.count(),
+            projects=projects,
+            summary=summary,
+            total_locations=summary.total_locations,
+            total_measurements=summary.total_measurements,
             *args,
             **kwargs
         )
 
 
+class AQMetricsView(View):
+    """A view to expose the instrumentation of Air Quality endpoints."""
+
+    def get(self, request, *args, **kwargs):
+        """
+        GET method for the view.
+
+        Return all histograms recorded by this process in the Prometheus text
+        format. Available to superusers, or to scrapers sending the token set
+        as `AIRQUALITY_METRICS_TOKEN` in the Authorization header.
+
+        Parameters
+        ----------
+        request : django.http.HttpRequest
+            Represents the request.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            Metrics.
+        """
+        token = getattr(settings, 'AIRQUALITY_METRICS_TOKEN', None)
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+
+        if not request.user.is_superuser and not (
+            token and constant_time_compare(authorization, 'Bearer %s' % token)
+        ):
+            return HttpResponse(status=403)
+
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
 class AQExportView(View):
     """A view to export all measurements."""
 
@@ -85,7 +217,10 @@ class AQExportView(View):
         """
         GET method for the view.
 
-        Export all measurements to a CSV file.
+        Export all measurements to a CSV file, streamed in chunks. Concurrent
+        exports share the same file, exported once. Measurements already
+        submitted as contributions are also included (streamed one line at a
+        time), when the file is "all".
 
         Parameters
         ----------
@@ -96,81 +231,167 @@ class AQExportView(View):
 
         Returns
         -------
-        django.http.HttpResponse
+        django.http.StreamingHttpResponse
             CSV file.
         """
         if not request.user.is_superuser:
             return HttpResponse(status=403)
 
-        out = HttpResponse(content_type='text/csv')
+        if file == 'all':
+            name = 'Measurements and contributions'
+            out = StreamingHttpResponse(
+                stream_unified(),
+                content_type='text/csv'
+            )
+        else:
+            name = 'Measurements'
+            out = FileResponse(open_export(), content_type='text/csv')
+
         out['Content-Disposition'] = 'attachment; filename="%s - %s.csv"' % (
-            'Measurements',
+            name,
             dateformat.format(timezone.now(), 'l, jS \\o\\f F, Y')
         )
 
-        fieldnames = [
-            'Barcode',
-            'Location',
-            'Site characteristics',
-            'Height from ground (m)',
-            'Distance from the road (m)',
-            'Additional details',
-            'Date out',
-            'Date in',
-            'Time out',
-            'Time in',
-            'Exposure time (min)',
-            'Exposure time (hr)',
-            'Diffusion tube made by students',
-            'Added by'
-        ]
+        return out
 
-        writer = csv.DictWriter(out, fieldnames=fieldnames)
-        writer.writeheader()
 
-        for measurement in AirQualityMeasurement.objects.all():
-            location = measurement.location
+class ProjectConfigurationMixin(object):
+    """Shared handling of categories and fields submitted for a project."""
 
-            if measurement.finished:
-                exposure = measurement.finished - measurement.started
-                exposure_min = int(exposure.total_seconds() / 60)
-                exposure_hr = int(exposure.total_seconds() / 3600)
-                date_in = filter_date(measurement.finished, 'd/m/Y')
-                time_in = filter_date(measurement.finished, 'H:i')
-            else:
-                exposure_min = None
-                exposure_hr = None
-                date_in = None
-                time_in = None
+    def get_configuration(self, data, category_types, field_types):
+        """
+        Gets categories and fields submitted for all category and field
+        types, validating them with a single query for each model.
 
-            row = {
-                'Barcode': measurement.barcode,
-                'Location': location.name,
-                'Site characteristics': location.properties.get(
-                    'characteristics'),
-                'Height from ground (m)': location.properties.get(
-                    'height'),
-                'Distance from the road (m)': location.properties.get(
-                    'distance'),
-                'Additional details': measurement.properties.get(
-                    'additional_details'),
-                'Date out': filter_date(measurement.started, 'd/m/Y'),
-                'Date in': date_in,
-                'Time out': filter_date(measurement.started, 'H:i'),
-                'Time in': time_in,
-                'Exposure time (min)': exposure_min,
-                'Exposure time (hr)': exposure_hr,
-                'Diffusion tube made by students': measurement.properties.get(
-                    'made_by_students'),
-                'Added by': measurement.creator.display_name
-            }
+        Parameters
+        ----------
+        data : django.http.QueryDict
+            Submitted data.
+        category_types : collections.OrderedDict
+            Available category types.
+        field_types : collections.OrderedDict
+            Available field types.
 
-            writer.writerow({key: str(value).encode('utf-8') if value else None for key, value in row.iteritems()})
+        Returns
+        -------
+        tuple
+            Active categories stored by the category type key, and active
+            fields stored by the category and field type keys.
 
-        return out
+        Raises
+        ------
+        Category.DoesNotExist
+            If any of the categories is not found or is not active.
+        Field.DoesNotExist
+            If any of the fields is not found or is not active.
+        """
+        category_ids = {}
+        field_ids = {}
+
+        for key in category_types.keys():
+            category_ids[key] = get_id(data.get(key))
+            index = int(key) - 1
+
+            for field_key in field_types.keys():
+                values = data.getlist(field_key)
+                field_ids[(key, field_key)] = get_id(
+                    values[index] if index < len(values) else None
+                )
+
+        categories = Category.objects.filter(status='active').in_bulk(
+            [pk for pk in category_ids.values() if pk is not None]
+        )
+
+        if any(pk not in categories for pk in category_ids.values()):
+            raise Category.DoesNotExist
+
+        fields = Field.objects.filter(status='active').in_bulk(
+            [pk for pk in field_ids.values() if pk is not None]
+        )
+
+        if any(pk not in fields for pk in field_ids.values()):
+            raise Field.DoesNotExist
+
+        return (
+            dict((key, categories[pk]) for key, pk in category_ids.items()),
+            dict((key, fields[pk]) for key, pk in field_ids.items())
+        )
+
+    def save_configuration(self, aq_project, category_types, field_types,
+                           categories, fields):
+        """
+        Saves categories and fields of the Air Quality project, creating the
+        missing ones and updating the changed ones in bulk.
+
+        Parameters
+        ----------
+        aq_project : geokey_airquality.models.AirQualityProject
+            Air Quality project, already saved.
+        category_types : collections.OrderedDict
+            Available category types.
+        field_types : collections.OrderedDict
+            Available field types.
+        categories : dict
+            Categories stored by the category type key.
+        fields : dict
+            Fields stored by the category and field type keys.
+        """
+        aq_categories = dict(
+            (aq_category.type, aq_category)
+            for aq_category in AirQualityCategory.objects.filter(
+                project=aq_project
+            )
+        )
+        created = []
+        updated = []
+
+        for key, category in categories.items():
+            aq_category = aq_categories.get(category_types[key])
+
+            if aq_category is None:
+                created.append(AirQualityCategory(
+                    type=category_types[key],
+                    category=category,
+                    project=aq_project
+                ))
+            elif aq_category.category_id != category.id:
+                aq_category.category = category
+                updated.append(aq_category)
+
+        update_foreign_keys(AirQualityCategory, 'category_id', updated)
+
+        for aq_category in AirQualityCategory.objects.bulk_create(created):
+            aq_categories[aq_category.type] = aq_category
+
+        aq_fields = dict(
+            ((aq_field.category_id, aq_field.type), aq_field)
+            for aq_field in AirQualityField.objects.filter(
+                category__project=aq_project
+            )
+        )
+        created = []
+        updated = []
 
+        for (key, field_key), field in fields.items():
+            aq_category = aq_categories[category_types[key]]
+            aq_field = aq_fields.get((aq_category.id, field_types[field_key]))
 
-class AQAddView(LoginRequiredMixin, SuperuserMixin, TemplateView):
+            if aq_field is None:
+                created.append(AirQualityField(
+                    type=field_types[field_key],
+                    field=field,
+                    category=aq_category
+                ))
+            elif aq_field.field_id != field.id:
+                aq_field.field = field
+                updated.append(aq_field)
+
+        update_foreign_keys(AirQualityField, 'field_id', updated)
+        AirQualityField.objects.bulk_create(created)
+
+
+class AQAddView(LoginRequiredMixin, SuperuserMixin,
+                ProjectConfigurationMixin, TemplateView):
     """Add new Air Quality project page."""
 
     template_name = 'aq_add.html'
@@ -231,15 +452,6 @@ class AQAddView(LoginRequiredMixin, SuperuserMixin, TemplateView):
         category_types = context.get('category_types')
         field_types = context.get('field_types')
 
-        categories = {}
-
-        if category_types is not None:
-            for key, value in category_types.items():
-                try:
-                    categories[key] = data.get(key)
-                except:
-                    missing = True
-
         if field_types is not None:
             for key, value in field_types.items():
                 try:
@@ -250,51 +462,28 @@ class AQAddView(LoginRequiredMixin, SuperuserMixin, TemplateView):
         if project and missing is False:
             try:
                 project = Project.objects.get(pk=project, status='active')
-                aq_project = AirQualityProject.objects.create(
-                    status='active',
-                    creator=request.user,
-                    project=project
+                categories, fields = self.get_configuration(
+                    data,
+                    category_types,
+                    field_types
                 )
 
-                try:
-                    for key, value in categories.items():
-                        category = Category.objects.get(
-                            pk=value,
-                            status='active'
-                        )
-                        aq_category = AirQualityCategory.objects.create(
-                            type=category_types.get(key),
-                            category=category,
-                            project=aq_project
-                        )
-
-                        index = int(key) - 1
-
-                        try:
-                            for key, value in field_types.items():
-                                list = data.getlist(key)
-                                field = list[index]
-
-                                field = Field.objects.get(
-                                    pk=field,
-                                    status='active'
-                                )
-                                AirQualityField.objects.create(
-                                    type=field_types.get(key),
-                                    field=field,
-                                    category=aq_category
-                                )
-                        except Field.DoesNotExist:
-                            messages.error(self.request, 'Field not found.')
-                            aq_project.delete()
-                            return self.render_to_response(context)
-                except Category.DoesNotExist:
-                    messages.error(self.request, 'Category not found.')
-                    aq_project.delete()
-                    return self.render_to_response(context)
-
-                project.islocked = True
-                project.save()
+                with transaction.atomic():
+                    aq_project = AirQualityProject.objects.create(
+                        status='active',
+                        creator=request.user,
+                        project=project
+                    )
+                    self.save_configuration(
+                        aq_project,
+                        category_types,
+                        field_types,
+                        categories,
+                        fields
+                    )
+
+                    project.islocked = True
+                    project.save()
 
                 messages.success(
                     self.request,
@@ -303,12 +492,19 @@ class AQAddView(LoginRequiredMixin, SuperuserMixin, TemplateView):
                 return redirect('geokey_airquality:index')
             except Project.DoesNotExist:
                 messages.error(self.request, 'Project not found.')
+            except Category.DoesNotExist:
+                messages.error(self.request, 'Category not found.')
+                return self.render_to_response(context)
+            except Field.DoesNotExist:
+                messages.error(self.request, 'Field not found.')
+                return self.render_to_response(context)
 
         messages.error(self.request, 'An error occurred.')
         return self.render_to_response(context)
 
 
-class AQProjectView(LoginRequiredMixin, SuperuserMixin, TemplateView):
+class AQProjectView(LoginRequiredMixin, SuperuserMixin,
+                    ProjectConfigurationMixin, TemplateView):
     """Air Quality project page."""
 
     template_name = 'aq_project.html'
@@ -387,15 +583,6 @@ class AQProjectView(LoginRequiredMixin, SuperuserMixin, TemplateView):
         category_types = context.get('category_types')
         field_types = context.get('field_types')
 
-        categories = {}
-
-        if category_types is not None:
-            for key, value in category_types.items():
-                try:
-                    categories[key] = data.get(key)
-                except:
-                    missing = True
-
         if field_types is not None:
             for key, value in field_types.items():
                 try:
@@ -405,85 +592,40 @@ class AQProjectView(LoginRequiredMixin, SuperuserMixin, TemplateView):
 
         if aq_project is not None and missing is False:
             try:
-                error = False
-
                 project = Project.objects.get(pk=project, status='active')
+                categories, fields = self.get_configuration(
+                    data,
+                    category_types,
+                    field_types
+                )
 
-                # Changing project should not be allowed, but just in case...
-                if aq_project.project != project:
-                    aq_project.project = project
-
-                aq_project.status = 'active'
-                aq_project.save()
+                with transaction.atomic():
+                    # Changing project should not be allowed, but just in case
+                    if aq_project.project != project:
+                        aq_project.project = project
 
-                try:
-                    for key, value in categories.items():
-                        category = Category.objects.get(
-                            pk=value,
-                            status='active'
-                        )
-
-                        try:
-                            aq_category = AirQualityCategory.objects.get(
-                                type=category_types.get(key),
-                                project=aq_project
-                            )
-
-                            if aq_category.category != category:
-                                aq_category.category = category
-                                aq_category.save()
-                        except AirQualityCategory.DoesNotExist:
-                            aq_category = AirQualityCategory.objects.create(
-                                type=category_types.get(key),
-                                category=category,
-                                project=aq_project
-                            )
-
-                        index = int(key) - 1
-
-                        try:
-                            for key, value in field_types.items():
-                                list = data.getlist(key)
-                                field = list[index]
-
-                                field = Field.objects.get(
-                                    pk=field,
-                                    status='active'
-                                )
-
-                                try:
-                                    aq_field = AirQualityField.objects.get(
-                                        type=field_types.get(key),
-                                        category=aq_category
-                                    )
-
-                                    if aq_field.field != field:
-                                        aq_field.field = field
-                                        aq_field.save()
-                                except AirQualityField.DoesNotExist:
-                                    AirQualityField.objects.create(
-                                        type=field_types.get(key),
-                                        field=field,
-                                        category=aq_category
-                                    )
-                        except Field.DoesNotExist:
-                            missing = True
-                            aq_category.delete()
-                            aq_project.delete()
-                            error = True
-                except Category.DoesNotExist:
-                    missing = True
-                    aq_project.delete()
-                    error = True
+                    aq_project.status = 'active'
+                    aq_project.save()
 
-                if error is False:
-                    messages.success(
-                        self.request,
-                        'The project has been updated.'
+                    self.save_configuration(
+                        aq_project,
+                        category_types,
+                        field_types,
+                        categories,
+                        fields
                     )
-                    return redirect('geokey_airquality:index')
+
+                messages.success(
+                    self.request,
+                    'The project has been updated.'
+                )
+                return redirect('geokey_airquality:index')
             except Project.DoesNotExist:
                 messages.error(self.request, 'Project not found.')
+            except Category.DoesNotExist:
+                messages.error(self.request, 'Category not found.')
+            except Field.DoesNotExist:
+                messages.error(self.request, 'Field not found.')
 
         messages.error(self.request, 'An error occurred.')
         return self.render_to_response(context)
@@ -560,6 +702,46 @@ class AQProjectsSingleAjaxView(APIView):
         return Response(serializer.data)
 
 
+class AQProjectsStructureAjaxView(APIView):
+    """
+    Ajax API endpoints for a structure of a single project.
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, project_id):
+        """
+        Gets active categories of the project with their active text and
+        lookup fields. The structure is cached and sent with an ETag, so
+        unchanged structures are answered with 304 Not Modified.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        project_id : int
+            Identifies the project in the database.
+
+        Return
+        ------
+        rest_framework.response.Response
+            Contains the project structure or an error message.
+        """
+
+        if not request.user.is_superuser:
+            raise PermissionDenied(permission_denied)
+
+        structure, etag = get_structure(project_id)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+
+        if etag in [value.strip() for value in if_none_match.split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(structure)
+
+        response['ETag'] = etag
+        return response
+
+
 class AQCategoriesSingleAjaxView(APIView):
     """
     Ajax API endpoints for a single category.
@@ -595,11 +777,396 @@ class AQCategoriesSingleAjaxView(APIView):
         return Response(serializer.data)
 
 
+class BarcodeAjaxMixin(object):
+    """Shared handling of barcodes submitted to Ajax API endpoints."""
+
+    def get_barcodes(self, data):
+        """
+        Gets the list of barcodes from the request data.
+
+        Parameters
+        ----------
+        data : dict
+            Request data, either JSON or form encoded.
+
+        Returns
+        -------
+        list
+            Unique barcodes in the order they were submitted.
+
+        Raises
+        ------
+        MalformedRequestData
+            If barcodes are not submitted as a list, or a barcode is not
+            valid.
+        """
+
+        if hasattr(data, 'getlist'):
+            barcodes = data.getlist('barcodes')
+        else:
+            barcodes = data.get('barcodes')
+
+        if not isinstance(barcodes, list):
+            raise MalformedRequestData('Barcodes must be a list.')
+
+        barcodes = [six.text_type(barcode).strip() for barcode in barcodes]
+        barcodes = [barcode for barcode in barcodes if barcode]
+
+        if not all(BARCODE.match(barcode) for barcode in barcodes):
+            raise MalformedRequestData(
+                'Barcodes must have up to 25 characters and no slashes.'
+            )
+
+        return list(collections.OrderedDict.fromkeys(barcodes))
+
+    def lookup_barcodes(self, barcodes):
+        """
+        Finds all measurements with the barcodes in a single query.
+
+        Parameters
+        ----------
+        barcodes : list
+            Barcodes to look up.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Serialised measurements grouped by barcode.
+        """
+
+        found = collections.OrderedDict((barcode, []) for barcode in barcodes)
+        measurements = AirQualityMeasurement.objects.filter(
+            barcode__in=barcodes
+        ).select_related('location', 'creator').order_by('id')
+
+        for measurement in measurements:
+            found[measurement.barcode].append({
+                'id': measurement.id,
+                'barcode': measurement.barcode,
+                'started': str(measurement.started),
+                'finished': (
+                    str(measurement.finished) if measurement.finished
+                    else None
+                ),
+                'properties': measurement.properties,
+                'location': {
+                    'id': measurement.location.id,
+                    'name': measurement.location.name
+                },
+                'creator': {
+                    'id': measurement.creator.id,
+                    'display_name': measurement.creator.display_name
+                }
+            })
+
+        return found
+
+
+class AQBarcodesAjaxView(BarcodeAjaxMixin, APIView):
+    """
+    Ajax API endpoints for barcodes.
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request):
+        """
+        Gets all barcodes that are used by more than one measurement.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+
+        Return
+        ------
+        rest_framework.response.Response
+            Contains the duplicated barcodes or an error message.
+        """
+
+        if not request.user.is_superuser:
+            raise PermissionDenied(permission_denied)
+
+        duplicates = AirQualityMeasurement.objects.values(
+            'barcode'
+        ).annotate(
+            total=Count('id')
+        ).filter(
+            total__gt=1
+        ).order_by('barcode')
+
+        return Response([
+            {'barcode': duplicate['barcode'], 'total': duplicate['total']}
+            for duplicate in duplicates
+        ])
+
+    @handle_exceptions_for_ajax
+    def post(self, request):
+        """
+        Looks up a batch of barcodes.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+
+        Return
+        ------
+        rest_framework.response.Response
+            Contains the measurements grouped by barcode, together with
+            missing and duplicated barcodes, or an error message.
+        """
+
+        if not request.user.is_superuser:
+            raise PermissionDenied(permission_denied)
+
+        barcodes = self.get_barcodes(request.data)
+        found = self.lookup_barcodes(barcodes)
+
+        return Response({
+            'measurements': found,
+            'missing': [
+                barcode for barcode, measurements in found.items()
+                if len(measurements) == 0
+            ],
+            'duplicates': [
+                barcode for barcode, measurements in found.items()
+                if len(measurements) > 1
+            ]
+        })
+
+
+class AQBarcodesSingleAjaxView(BarcodeAjaxMixin, APIView):
+    """
+    Ajax API endpoints for a single barcode.
+    """
+
+    @handle_exceptions_for_ajax
+    def get(self, request, barcode):
+        """
+        Gets all measurements with the barcode.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        barcode : str
+            Identifies the measurements in the database.
+
+        Return
+        ------
+        rest_framework.response.Response
+            Contains the serialised measurements or an error message.
+        """
+
+        if not request.user.is_superuser:
+            raise PermissionDenied(permission_denied)
+
+        measurements = self.lookup_barcodes([barcode])[barcode]
+
+        if len(measurements) == 0:
+            return Response(
+                {'error': 'Measurement not found.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(measurements)
+
+
+class AQResultsAjaxView(APIView):
+    """
+    Ajax API endpoints for lab results.
+    """
+
+    @handle_exceptions_for_ajax
+    def post(self, request):
+        """
+        Imports lab results of measurements from the uploaded CSV file.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+
+        Return
+        ------
+        rest_framework.response.Response
+            Contains the report of the import or an error message.
+        """
+
+        if not request.user.is_superuser:
+            raise PermissionDenied(permission_denied)
+
+        csv_file = request.data.get('file')
+        project = request.data.get('project')
+        aq_project = None
+
+        if csv_file is None:
+            raise MalformedRequestData('File must be uploaded.')
+
+        if project:
+            try:
+                aq_project = AirQualityProject.objects.select_related(
+                    'project'
+                ).get(
+                    status='active',
+                    project__pk=project,
+                    project__status='active'
+                )
+            except (AirQualityProject.DoesNotExist, ValueError):
+                return Response(
+                    {'error': 'Project not found.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+        try:
+            report = ResultsImport(aq_project).run(csv_file)
+        except (ValueError, csv.Error) as error:
+            raise MalformedRequestData(str(error))
+
+        return Response(report)
+
+
 # ###########################
 # PUBLIC API
 # ###########################
 
-class AQSheetAPIView(APIView):
+class PublicAPIMixin(object):
+
+    """
+    Content negotiation of the public API. Besides JSON, the app can use
+    MessagePack (when installed) for both requests and responses.
+    """
+
+    renderer_classes = get_renderer_classes()
+    parser_classes = get_parser_classes()
+
+    def uses_epoch(self, request):
+        """
+        Checks if datetimes should be sent as seconds since the epoch.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+
+        Returns
+        -------
+        Boolean
+            Indicating if the accepted renderer uses epoch datetimes.
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+        return getattr(renderer, 'epoch_datetimes', False)
+
+    def uses_streaming(self, request):
+        """
+        Checks if a list should be streamed, rather than rendered at once.
+        Only JSON lists are streamed, when requested with `stream`.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+
+        Returns
+        -------
+        Boolean
+            Indicating if the list should be streamed.
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+
+        return (
+            getattr(renderer, 'format', None) == 'json' and
+            request.query_params.get('stream') in ['1', 'true']
+        )
+
+    def set_validators(self, response, etag, last_modified=None):
+        """
+        Sets validators of the representation on the response.
+
+        Parameters
+        ----------
+        response : django.http.HttpResponse
+            Response to be sent.
+        etag : str
+            Quoted ETag of the representation.
+        last_modified : datetime.datetime
+            Time the representation was changed last time, can be None.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            The same response.
+        """
+        response['ETag'] = etag
+
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(
+                calendar.timegm(last_modified.utctimetuple())
+            )
+
+        return response
+
+    def get_cached_response(self, request, cached, etag, last_modified=None):
+        """
+        Gets the response from cached bodies, with the body accepted by the
+        client (without compressing it again).
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        cached : tuple
+            Bodies stored by the content coding and the content type.
+        etag : str
+            Quoted ETag of the representation.
+        last_modified : datetime.datetime
+            Time the representation was changed last time, can be None.
+
+        Returns
+        -------
+        django.http.HttpResponse
+            Response with the cached body.
+        """
+        bodies, content_type = cached
+        response = self.set_validators(
+            HttpResponse(content_type=content_type),
+            etag,
+            last_modified
+        )
+
+        return encode_response(request, response, bodies)
+
+    def get_not_modified(self, request, etag, last_modified=None):
+        """
+        Checks the `If-None-Match` header of the request against the ETag of
+        the current representation. `If-Modified-Since` is ignored, as dates
+        have a precision of seconds and would miss changes made within the
+        same second as the previous response.
+
+        Parameters
+        ----------
+        request : rest_framework.request.Request
+            Represents the request.
+        etag : str
+            Quoted ETag of the representation.
+        last_modified : datetime.datetime
+            Time the representation was changed last time, sent back with the
+            ETag, can be None.
+
+        Returns
+        -------
+        django.http.HttpResponseNotModified
+            When the representation has not changed, otherwise None.
+        """
+        response = get_conditional_response(request, etag=etag)
+
+        if response is not None:
+            self.set_validators(response, etag, last_modified)
+
+        return response
+
+
+class AQSheetAPIView(PublicAPIMixin, APIView):
 
     """
     API endpoint for a sheet.
@@ -649,9 +1216,13 @@ class AQSheetAPIView(APIView):
         writer = csv.DictWriter(out, fieldnames=fieldnames)
         writer.writeheader()
 
-        for measurement in AirQualityMeasurement.objects.filter(
-                creator=user
-        ).exclude(finished=None).distinct():
+        measurements = list(AirQualityMeasurement.tiers.filter(
+            creator=user,
+            finished__isnull=False
+        ))
+        prefetch_related_objects(measurements, 'location')
+
+        for measurement in measurements:
             location = measurement.location
             exposure = measurement.finished - measurement.started
 
@@ -694,7 +1265,45 @@ class AQSheetAPIView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class AQProjectsAPIView(APIView):
+def get_contributable_projects():
+    """
+    Gets all active projects added to Air Quality, with users allowed to
+    contribute to them as administrators or members of user groups.
+
+    Returns
+    -------
+    list
+        Projects ordered by their IDs, each with a set of IDs of
+        administrators and a set of IDs of contributing members.
+    """
+    projects = list(Project.objects.filter(
+        status='active',
+        airquality__status='active'
+    ).prefetch_related(None).distinct().order_by('id'))
+    project_ids = [project.id for project in projects]
+    admins = collections.defaultdict(set)
+    members = collections.defaultdict(set)
+
+    for project_id, user_id in Project.objects.filter(
+        id__in=project_ids,
+        admins__isnull=False
+    ).values_list('id', 'admins'):
+        admins[project_id].add(user_id)
+
+    for project_id, user_id in UserGroup.objects.filter(
+        project_id__in=project_ids,
+        can_contribute=True,
+        users__isnull=False
+    ).values_list('project_id', 'users'):
+        members[project_id].add(user_id)
+
+    return [
+        (project, admins[project.id], members[project.id])
+        for project in projects
+    ]
+
+
+class AQProjectsAPIView(PublicAPIMixin, APIView):
 
     """
     API endpoint for all projects.
@@ -704,6 +1313,9 @@ class AQProjectsAPIView(APIView):
         """
         Returns a list of all projects, added to Air Quality. It includes only
         active projects, to which current user is allowed to contribute.
+        Returns 304 when the list has not changed since the ETag was sent.
+        Rendered responses are cached (compressed) by their ETags, concurrent
+        requests (of all users) share the query of projects.
 
         Parameters
         ----------
@@ -724,21 +1336,55 @@ class AQProjectsAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        aq_projects = []
+        # Same conditions as `Project.can_contribute`, checked for the user
+        aq_projects = [
+            project
+            for project, admin_ids, member_ids in single_flight(
+                'projects',
+                get_contributable_projects
+            )
+            if project.everyone_contributes != 'false' or
+            user.id in admin_ids or user.id in member_ids
+        ]
+
+        etag = get_etag(
+            'projects',
+            user.id,
+            request.accepted_renderer.format,
+            *['%s:%s' % (project.id, project.name) for project in aq_projects]
+        )
+        not_modified = self.get_not_modified(request, etag)
+
+        if not_modified is not None:
+            return not_modified
+
+        cached = get_cached_response(etag)
 
-        for aq_project in AirQualityProject.objects.filter(status='active'):
-            if aq_project.project.can_contribute(user):
-                aq_projects.append(aq_project.project)
+        if cached is not None:
+            return self.get_cached_response(request, cached, etag)
 
         serializer = ProjectSerializer(
             aq_projects, many=True, context={'user': user},
             fields=('id', 'name')
         )
 
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response.add_post_render_callback(
+            lambda response: encode_response(
+                request,
+                response,
+                cache_response(
+                    etag,
+                    response.content,
+                    response['Content-Type']
+                )
+            )
+        )
+
+        return self.set_validators(response, etag)
 
 
-class AQLocationsAPIView(APIView):
+class AQLocationsAPIView(PublicAPIMixin, APIView):
 
     """
     API endpoint for all locations.
@@ -746,7 +1392,12 @@ class AQLocationsAPIView(APIView):
 
     def get(self, request):
         """
-        Returns a list of all locations created by the user.
+        Returns a list of all locations created by the user. Coordinates are
+        rounded to the number of decimal places set by `precision`. Returns
+        304 when locations have not changed since the ETag (or the time of
+        the last change) was sent. Rendered responses are cached (compressed)
+        until the next change. With `stream`, JSON is streamed one location
+        at a time instead (and not cached).
 
         Parameters
         ----------
@@ -767,13 +1418,67 @@ class AQLocationsAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        serializer = LocationSerializer(
-            AirQualityLocation.objects.filter(creator=user),
-            many=True,
-            context={'user': user}
+        precision = get_precision(request.query_params.get('precision'))
+        streaming = self.uses_streaming(request)
+
+        # Read before locations, so that a concurrent change is never missed
+        changed = get_locations_changed(user)
+        etag = get_etag(
+            'locations',
+            user.id,
+            changed.isoformat(),
+            request.accepted_renderer.format,
+            precision,
+            streaming
         )
+        not_modified = self.get_not_modified(request, etag, changed)
+
+        if not_modified is not None:
+            return not_modified
+
+        context = {
+            'user': user,
+            'epoch': self.uses_epoch(request),
+            'precision': precision
+        }
+        locations = AirQualityLocation.objects.filter(
+            creator=user
+        ).prefetch_related('measurements')
+
+        if streaming:
+            serializer = LocationSerializer(context=context)
+
+            return self.set_validators(
+                StreamingJSONResponse(
+                    serializer.to_representation(location)
+                    for location in iter_chunks(locations)
+                ),
+                etag,
+                changed
+            )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cached = get_cached_locations(user, changed, etag)
+
+        if cached is not None:
+            return self.get_cached_response(request, cached, etag, changed)
+
+        serializer = LocationSerializer(locations, many=True, context=context)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        response.add_post_render_callback(
+            lambda response: encode_response(
+                request,
+                response,
+                cache_locations(
+                    user,
+                    changed,
+                    etag,
+                    response.content,
+                    response['Content-Type']
+                )
+            )
+        )
+
+        return self.set_validators(response, etag, changed)
 
     def post(self, request):
         """
@@ -800,15 +1505,20 @@ class AQLocationsAPIView(APIView):
             )
 
         serializer = LocationSerializer(
-            data=data, context={'user': user, 'data': data}
+            data=data, context={
+                'user': user,
+                'data': data,
+                'epoch': self.uses_epoch(request)
+            }
         )
 
         if serializer.is_valid(raise_exception=True):
             serializer.save()
+            touch_locations([user.id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class AQLocationsSingleAPIView(APIView):
+class AQLocationsSingleAPIView(PublicAPIMixin, APIView):
 
     """
     API endpoint for a single location.
@@ -849,11 +1559,16 @@ class AQLocationsSingleAPIView(APIView):
             )
 
         serializer = LocationSerializer(
-            location, data=data, context={'user': user, 'data': data}
+            location, data=data, context={
+                'user': user,
+                'data': data,
+                'epoch': self.uses_epoch(request)
+            }
         )
 
         if serializer.is_valid(raise_exception=True):
             serializer.save()
+            touch_locations([user.id])
             return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, location_id):
@@ -888,12 +1603,9 @@ class AQLocationsSingleAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        measurements = AirQualityMeasurement.objects.filter(location=location)
-
-        for measurement in measurements:
-            measurement.delete()
-
+        AirQualityMeasurement.objects.filter(location=location).delete()
         location.delete()
+        touch_locations([location.creator_id])
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -912,120 +1624,23 @@ class MeasurementAPIMixin(object):
 
             if finished is not None and results is not None:
                 try:
-                    project = Project.objects.get(pk=project, status='active')
-                    aq_project = AirQualityProject.objects.get(
+                    aq_project = AirQualityProject.objects.select_related(
+                        'project'
+                    ).get(
                         status='active',
-                        project=project
-                    )
-
-                    category_types = dict(AirQualityCategory.TYPES)
-                    field_types = dict(AirQualityField.TYPES)
-                    results = float(results)
-
-                    if results < 40:
-                        category = category_types['1']
-                    elif results >= 40 and results < 60:
-                        category = category_types['2']
-                    elif results >= 60 and results < 80:
-                        category = category_types['3']
-                    elif results >= 80 and results < 100:
-                        category = category_types['4']
-                    else:
-                        category = category_types['5']
-
-                    aq_category = AirQualityCategory.objects.get(
-                        type=category,
-                        project=aq_project
+                        project__pk=project,
+                        project__status='active'
                     )
-
-                    properties = {}
-
-                    for key, value in field_types.iteritems():
-                        aq_field = AirQualityField.objects.get(
-                            type=value,
-                            category=aq_category
-                        )
-                        instance_properties = instance.location.properties
-
-                        value = None
-
-                        if key == 'results':
-                            value = results
-                        elif key == 'date_out':
-                            value = filter_date(instance.started, 'd/m/Y')
-                        elif key == 'time_out':
-                            value = filter_date(instance.started, 'H:i')
-                        elif key == 'date_collected':
-                            value = filter_date(instance.finished, 'd/m/Y')
-                        elif key == 'time_collected':
-                            value = filter_date(instance.finished, 'H:i')
-                        elif key == 'exposure_min':
-                            value = instance.finished - instance.started
-                            value = int(value.total_seconds() / 60)
-                        elif key == 'distance_from_road':
-                            value = '%sm' % instance_properties.get(
-                                'distance'
-                            )
-                        elif key == 'height':
-                            value = '%sm' % instance_properties.get(
-                                'height'
-                            )
-                        elif key == 'site_characteristics':
-                            value = instance_properties.get(
-                                'characteristics'
-                            )
-                        elif key == 'additional_details':
-                            value = instance.properties.get(
-                                'additional_details'
-                            )
-                        elif key == 'made_by_students':
-                            value = instance.properties.get(
-                                'made_by_students'
-                            )
-
-                            if value:
-                                value = 'Yes'
-                            else:
-                                value = 'No'
-
-                            try:
-                                value = aq_field.field.lookupvalues.get(
-                                    name=value).id
-                            except Field.DoesNotExist:
-                                return False
-
-                        if value is not None:
-                            properties[aq_field.field.key] = str(value)
-                except:
+                except (AirQualityProject.DoesNotExist, ValueError):
                     return False
 
-                if project.can_contribute(user):
-                    data = {
-                        'type': 'Feature',
-                        'meta': {
-                            'status': 'active',
-                            'category': aq_category.category.id
-                        },
-                        'location': {
-                            'geometry': instance.location.geometry.geojson
-                        },
-                        'properties': properties
-                    }
-
-                    serializer = ContributionSerializer(
-                        data=data,
-                        context={'user': user, 'project': project}
-                    )
-
-                    if serializer.is_valid(raise_exception=True):
-                        serializer.save()
-                        instance.delete()
-                        return True
+                return submit_measurement(user, aq_project, instance, results)
 
         return False
 
 
-class AQMeasurementsAPIView(MeasurementAPIMixin, APIView):
+class AQMeasurementsAPIView(MeasurementAPIMixin, PublicAPIMixin,
+                            APIView):
 
     """
     API endpoint for all measurements.
@@ -1069,7 +1684,8 @@ class AQMeasurementsAPIView(MeasurementAPIMixin, APIView):
             data=data, context={
                 'user': user,
                 'location': location,
-                'data': data
+                'data': data,
+                'epoch': self.uses_epoch(request)
             }
         )
 
@@ -1078,14 +1694,17 @@ class AQMeasurementsAPIView(MeasurementAPIMixin, APIView):
 
             data = serializer.data
             instance = serializer.instance
+            submitted = self.submit_measurement(request, data, instance)
+            touch_locations([user.id])
 
-            if self.submit_measurement(request, data, instance):
+            if submitted:
                 return Response(status=status.HTTP_204_NO_CONTENT)
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class AQMeasurementsSingleAPIView(MeasurementAPIMixin, APIView):
+class AQMeasurementsSingleAPIView(MeasurementAPIMixin, PublicAPIMixin,
+                                  APIView):
 
     """
     API endpoint for a single measurement.
@@ -1128,7 +1747,11 @@ class AQMeasurementsSingleAPIView(MeasurementAPIMixin, APIView):
             )
 
         serializer = MeasurementSerializer(
-            measurement, data=data, context={'user': user, 'data': data}
+            measurement, data=data, context={
+                'user': user,
+                'data': data,
+                'epoch': self.uses_epoch(request)
+            }
         )
 
         if serializer.is_valid(raise_exception=True):
@@ -1136,8 +1759,10 @@ class AQMeasurementsSingleAPIView(MeasurementAPIMixin, APIView):
 
             data = serializer.data
             instance = serializer.instance
+            submitted = self.submit_measurement(request, data, instance)
+            touch_locations([user.id])
 
-            if self.submit_measurement(request, data, instance):
+            if submitted:
                 return Response(status=status.HTTP_204_NO_CONTENT)
 
             return Response(data, status=status.HTTP_200_OK)
@@ -1177,5 +1802,6 @@ class AQMeasurementsSingleAPIView(MeasurementAPIMixin, APIView):
             )
 
         measurement.delete()
+        touch_locations([measurement.creator_id])
 
         return Response(status=status.HTTP_204_NO_CONTENT)
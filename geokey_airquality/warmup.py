@@ -0,0 +1,78 @@
+"""
+Warm-up of caches, so that the first requests after a deploy don't find
+them cold.
+"""
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from django.db import DatabaseError, connection
+
+from geokey.projects.models import Project
+
+from geokey_airquality.models import AirQualityProject
+from geokey_airquality.structure import get_structure
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_caches():
+    """
+    Caches structures of all active projects added to Air Quality.
+
+    Returns
+    -------
+    list
+        IDs of projects, which structures are cached.
+    """
+    project_ids = AirQualityProject.objects.filter(
+        status='active',
+        project__status='active'
+    ).order_by('project_id').values_list('project_id', flat=True)
+    warmed = []
+
+    for project_id in project_ids:
+        try:
+            get_structure(project_id)
+            warmed.append(project_id)
+        except Project.DoesNotExist:
+            # Made inactive in the meantime
+            pass
+
+    return warmed
+
+
+def warm_up():
+    """
+    Warms up caches, logging (instead of raising) database errors, e.g.
+    when tables are not migrated yet.
+    """
+    try:
+        warmed = warm_caches()
+        logger.info('Cached structures of %s projects.', len(warmed))
+    except DatabaseError:
+        logger.exception('Caches could not be warmed up.')
+    finally:
+        # Opened only for this thread
+        connection.close()
+
+
+def start_warm_up():
+    """
+    Starts warming up caches in the background, so that starting the process
+    is not delayed by it.
+
+    Returns
+    -------
+    threading.Thread
+        Daemon thread warming up caches.
+    """
+    thread = threading.Thread(target=warm_up, name='airquality-warm-up')
+    thread.daemon = True
+    thread.start()
+
+    return thread
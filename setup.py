@@ -28,4 +28,9 @@ setup(
     packages=find_packages(exclude=['*.tests', '*.tests.*', 'tests.*']),
     include_package_data=True,
     install_requires=[],
+    extras_require={
+        'msgpack': ['msgpack>=0.5.2'],
+        'json': ['simplejson>=3.8'],
+        'brotli': ['brotli>=1.0'],
+    },
 )